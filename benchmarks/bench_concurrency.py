@@ -0,0 +1,295 @@
+"""
+concurrency load test: readers, writers and handle users sharing one Namespace
+
+drives a mix of threads against one namespace for a fixed time:
+
+    readers       Namespace.get on random NSIDs, both stable and churning ones
+    writers       add and remove nodes under their own .churn.writer<N> subtree, like a
+                  config reloader
+    handle users  NamespaceHandle.get and attribute access through handles rooted at
+                  the stable groups
+
+and reports throughput, p50/p99/p99.9 latency and consistency violations per role. A
+violation is a result that cannot be right no matter how the threads interleave: a get
+returning a node with another NSID (e.g. resolved from the wrong root), a stable node
+that is not found, or a handle node whose NSID does not match what was asked for. Lookup
+errors on churning nodes are expected and only counted.
+
+the same run_load() is used by the stress-regression test (tests/test_concurrency.py).
+
+usage:
+    python -m benchmarks.bench_concurrency [--readers 4] [--writers 1] [--handle-users 4]
+        [--duration 2] [--groups 8] [--nodes 50] [--switch-interval 0.0005] [--output results.json]
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import threading
+import time
+
+import thewired
+from thewired import Namespace, HandleNode
+from thewired.exceptions import NamespaceLookupError, NamespaceCollisionError
+
+#- most violations kept in the report; all of them are counted
+MAX_VIOLATIONS = 20
+
+
+def percentile(values, fraction):
+    """
+    Output:
+        nearest-rank percentile of <values>, or None if empty
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class RoleStats(object):
+    """
+    Description:
+        what the threads of one role did; each thread writes only its own instance
+    """
+    def __init__(self, role):
+        self.role = role
+        self.latencies = list()
+        self.lookup_errors = 0
+        self.errors = list()
+        self.violations = list()
+
+    def merge(self, other):
+        self.latencies.extend(other.latencies)
+        self.lookup_errors += other.lookup_errors
+        self.errors.extend(other.errors)
+        self.violations.extend(other.violations)
+
+    def report(self, seconds):
+        ops = len(self.latencies)
+        return dict(
+            role=self.role,
+            ops=ops,
+            throughput=ops / seconds if seconds else None,
+            p50_us=_us(percentile(self.latencies, 0.50)),
+            p99_us=_us(percentile(self.latencies, 0.99)),
+            p999_us=_us(percentile(self.latencies, 0.999)),
+            lookup_errors=self.lookup_errors,
+            errors=len(self.errors),
+            violations=len(self.violations),
+            violation_samples=self.violations[:MAX_VIOLATIONS],
+            error_samples=self.errors[:MAX_VIOLATIONS])
+
+
+def _us(seconds):
+    return None if seconds is None else seconds * 1e6
+
+
+def build_namespace(groups, nodes, writers):
+    """
+    Output:
+        (namespace, list of stable leaf NSIDs)
+    """
+    ns = Namespace()
+    stable = list()
+    for g in range(groups):
+        for n in range(nodes):
+            nsid = f'.stable.group{g}.node{n}'
+            ns.add(nsid)
+            stable.append(nsid)
+    for w in range(writers):
+        ns.add(f'.churn.writer{w}')
+    return ns, stable
+
+
+def churn_nsid(writer, n):
+    return f'.churn.writer{writer}.item{n}'
+
+
+def reader(ns, stable, churn, stats, stop, rng):
+    while not stop.is_set():
+        if churn and rng.random() < 0.25:
+            nsid, must_exist = rng.choice(churn), False
+        else:
+            nsid, must_exist = rng.choice(stable), True
+        start = time.perf_counter()
+        try:
+            node = ns.get(nsid)
+        except NamespaceLookupError as err:
+            stats.latencies.append(time.perf_counter() - start)
+            if must_exist:
+                stats.violations.append(f"get({nsid}): stable node not found: {err}")
+            else:
+                stats.lookup_errors += 1
+            continue
+        except Exception as err:
+            stats.latencies.append(time.perf_counter() - start)
+            stats.errors.append(f"get({nsid}): {err!r}")
+            continue
+        stats.latencies.append(time.perf_counter() - start)
+        if str(node.nsid) != nsid:
+            stats.violations.append(f"get({nsid}) returned {node!r}")
+
+
+def writer(ns, index, items, stats, stop, rng):
+    present = set()
+    while not stop.is_set():
+        n = rng.randrange(items)
+        nsid = churn_nsid(index, n)
+        start = time.perf_counter()
+        try:
+            if n in present:
+                ns.remove(nsid)
+                present.discard(n)
+            else:
+                ns.add(nsid)
+                present.add(n)
+        except (NamespaceLookupError, NamespaceCollisionError) as err:
+            #- nobody else writes this subtree
+            stats.violations.append(f"writer{index} {nsid}: {err!r}")
+        except Exception as err:
+            stats.errors.append(f"writer{index} {nsid}: {err!r}")
+        stats.latencies.append(time.perf_counter() - start)
+
+
+def handle_user(ns, group, nodes, stats, stop, rng):
+    prefix = f'.stable.group{group}'
+    handle = ns.get_handle(prefix)
+    while not stop.is_set():
+        name = f'node{rng.randrange(nodes)}'
+        by_attribute = rng.random() < 0.5
+        start = time.perf_counter()
+        try:
+            node = getattr(handle, name) if by_attribute else handle.get(f'.{name}')
+        except (AttributeError, NamespaceLookupError) as err:
+            stats.latencies.append(time.perf_counter() - start)
+            stats.violations.append(f"{prefix} handle {name}: stable node not found: {err!r}")
+            continue
+        except Exception as err:
+            stats.latencies.append(time.perf_counter() - start)
+            stats.errors.append(f"{prefix} handle {name}: {err!r}")
+            continue
+        stats.latencies.append(time.perf_counter() - start)
+
+        real = node._delegate if isinstance(node, HandleNode) else node
+        if str(real.nsid) != f'{prefix}.{name}':
+            how = 'attribute' if by_attribute else 'get'
+            stats.violations.append(f"{prefix} handle {how} {name} returned {real!r}")
+
+
+def run_load(readers=4, writers=1, handle_users=4, duration=1.0, groups=8, nodes=50,
+        churn_items=None, switch_interval=None, seed=0):
+    """
+    Description:
+        run the load mix against a new namespace
+    Input:
+        readers, writers, handle_users: threads of each role
+        duration: seconds to run for
+        groups, nodes: the stable part of the namespace is <groups> x <nodes> leaves
+        churn_items: NSIDs each writer adds and removes (default: <nodes>)
+        switch_interval: if given, sys.setswitchinterval() for the run; small values
+            make the threads interleave more often
+        seed: seeds every thread's random choices
+    Output:
+        report dict with per-role results and totals
+    """
+    churn_items = nodes if churn_items is None else churn_items
+    ns, stable = build_namespace(groups, nodes, writers)
+    churn = [churn_nsid(w, n) for w in range(writers) for n in range(churn_items)]
+
+    stop = threading.Event()
+    threads = list()
+    stats = dict(reader=list(), writer=list(), handle=list())
+
+    def add(role, target, *args):
+        s = RoleStats(role)
+        stats[role].append(s)
+        rng = random.Random(f'{seed}-{role}-{len(stats[role])}')
+        threads.append(threading.Thread(target=target, args=args + (s, stop, rng), daemon=True))
+
+    for _ in range(readers):
+        add('reader', reader, ns, stable, churn)
+    for w in range(writers):
+        add('writer', writer, ns, w, churn_items)
+    for h in range(handle_users):
+        add('handle', handle_user, ns, h % groups, nodes)
+
+    saved_interval = sys.getswitchinterval()
+    if switch_interval is not None:
+        sys.setswitchinterval(switch_interval)
+    try:
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+    finally:
+        sys.setswitchinterval(saved_interval)
+
+    roles = list()
+    for role, per_thread in stats.items():
+        if per_thread:
+            merged = RoleStats(role)
+            for s in per_thread:
+                merged.merge(s)
+            roles.append(merged.report(seconds))
+
+    return dict(
+        seconds=seconds,
+        threads=dict(readers=readers, writers=writers, handle_users=handle_users),
+        roles=roles,
+        ops=sum(r['ops'] for r in roles),
+        violations=sum(r['violations'] for r in roles),
+        errors=sum(r['errors'] for r in roles))
+
+
+def print_report(report):
+    print(f"{'role':<8} {'ops':>9} {'ops/s':>10} {'p50 us':>9} {'p99 us':>9} {'p99.9 us':>9} "
+          f"{'lookup err':>10} {'errors':>7} {'violations':>10}")
+    for r in report['roles']:
+        print(f"{r['role']:<8} {r['ops']:>9} {r['throughput'] or 0:>10.0f} {r['p50_us'] or 0:>9.1f} "
+              f"{r['p99_us'] or 0:>9.1f} {r['p999_us'] or 0:>9.1f} {r['lookup_errors']:>10} "
+              f"{r['errors']:>7} {r['violations']:>10}")
+    for r in report['roles']:
+        for sample in r['violation_samples'] + r['error_samples']:
+            print(f"  {r['role']}: {sample}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=1)
+    parser.add_argument('--handle-users', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=2.0, help='seconds to run for')
+    parser.add_argument('--groups', type=int, default=8, help='stable groups (one handle prefix each)')
+    parser.add_argument('--nodes', type=int, default=50, help='stable nodes per group')
+    parser.add_argument('--churn-items', type=int, help='NSIDs each writer adds and removes')
+    parser.add_argument('--switch-interval', type=float, help='thread switch interval in seconds for the run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write JSON results here')
+    args = parser.parse_args()
+
+    report = run_load(readers=args.readers, writers=args.writers, handle_users=args.handle_users,
+        duration=args.duration, groups=args.groups, nodes=args.nodes, churn_items=args.churn_items,
+        switch_interval=args.switch_interval, seed=args.seed)
+    print_report(report)
+
+    if args.output:
+        report['meta'] = dict(
+            python=platform.python_version(),
+            implementation=platform.python_implementation(),
+            platform=platform.platform(),
+            thewired=thewired.__version__,
+            timestamp=time.strftime('%Y-%m-%dT%H:%M:%S%z'))
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if report['violations'] or report['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
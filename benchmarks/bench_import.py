@@ -0,0 +1,200 @@
+"""
+import-time and cold-start benchmark
+
+runs fresh interpreters and measures, for each:
+    import      `import thewired`
+    parse       NamespaceConfigParser2 parsing a typical config (see below)
+    first get   the first Namespace.get() on the parsed namespace
+    process     the whole interpreter run, as seen from outside, start-up included
+
+the same is then timed for the typical config compiled by thewired.configcompiler, where
+"import" is importing the generated module (and with it thewired, from its bytecode cache)
+and "parse" is its build().
+
+and then one more interpreter under `python -X importtime` to list the modules that take
+the longest to import, by self time, and one that checks `import thewired` leaves the
+standard library modules in HEAVY_MODULES (e.g. typing) unimported; the benchmark exits
+with status 1 if it does not.
+
+the typical config is a benchmarks.bench_parser config of --leaves leaves at depth 3,
+with its nsid-ref/nsid link targets parsed first in the same config.
+
+usage:
+    python -m benchmarks.bench_import [--runs 10] [--leaves 200] [--top 15] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_parser import make_config, TARGETS
+from thewired.configcompiler import NamespaceConfigCompiler
+
+#- run in the child interpreter; prints its timings as JSON
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import thewired
+imported = time.perf_counter()
+with open(sys.argv[1]) as f:
+    config = json.load(f)
+loaded = time.perf_counter()
+ns = thewired.NamespaceConfigParser2().parse(config)
+parsed = time.perf_counter()
+ns.get(sys.argv[2])
+got = time.perf_counter()
+print(json.dumps(dict(import_ms=(imported - start) * 1e3, parse_ms=(parsed - loaded) * 1e3,
+    first_get_ms=(got - parsed) * 1e3)))
+"""
+
+#- run in the child interpreter for the compiled config; argv[1] is the directory of the module
+CHILD_COMPILED = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import compiled_config
+imported = time.perf_counter()
+ns = compiled_config.build()
+parsed = time.perf_counter()
+ns.get(sys.argv[2])
+got = time.perf_counter()
+print(json.dumps(dict(import_ms=(imported - start) * 1e3, parse_ms=(parsed - imported) * 1e3,
+    first_get_ms=(got - parsed) * 1e3)))
+"""
+
+
+def typical_config(leaves):
+    """
+    Output:
+        (config dict, NSID of a leaf to get)
+    """
+    config = dict(targets=dict((f't{n}', dict(kind='target')) for n in range(TARGETS)))
+    body, _ = make_config(leaves, 3)
+    config.update(body)
+
+    nsid, cur = '', body
+    while True:
+        key = sorted(cur)[0]
+        nsid += '.' + key
+        if key.startswith('leaf'):
+            return config, nsid
+        cur = cur[key]
+
+
+def child_env():
+    env = dict(os.environ)
+    #- the child imports thewired from this checkout
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = root + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+
+def cold_start(config_path, nsid, child=CHILD):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', child, config_path, nsid], env=child_env(),
+        capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout)
+    result['process_ms'] = (time.perf_counter() - start) * 1e3
+    return result
+
+
+def import_profile():
+    """
+    Output:
+        list of (module, self us, cumulative us) from `python -X importtime -c "import thewired"`
+    """
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import thewired'], env=child_env(),
+        capture_output=True, text=True, check=True)
+    modules = list()
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+#- standard library modules `import thewired` must not pull in
+HEAVY_MODULES = ('typing', 're', 'logging', 'asyncio')
+
+
+def heavy_imports():
+    """
+    Output:
+        the modules of HEAVY_MODULES loaded after `import thewired` in a fresh interpreter
+    """
+    code = f"import sys, thewired; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, '-c', code], env=child_env(), capture_output=True, text=True, check=True)
+    return out.stdout.split()
+
+
+def summarize(runs):
+    return dict((key, dict(median=statistics.median(r[key] for r in runs), min=min(r[key] for r in runs)))
+        for key in ('import_ms', 'parse_ms', 'first_get_ms', 'process_ms'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='fresh interpreters to time')
+    parser.add_argument('--leaves', type=int, default=200, help='leaves in the typical config')
+    parser.add_argument('--top', type=int, default=15, help='modules listed from -X importtime')
+    parser.add_argument('--output', help='write JSON results here')
+    args = parser.parse_args()
+
+    config, nsid = typical_config(args.leaves)
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'config.json')
+        with open(config_path, 'w') as f:
+            json.dump(config, f)
+        runs = [cold_start(config_path, nsid) for _ in range(args.runs)]
+
+        #- also writes the bytecode cache
+        NamespaceConfigCompiler().write(config, os.path.join(tmp, 'compiled_config.py'))
+        compiled_runs = [cold_start(tmp, nsid, CHILD_COMPILED) for _ in range(args.runs)]
+
+    summary = summarize(runs)
+    compiled_summary = summarize(compiled_runs)
+    print(f"{'phase':<12} {'median ms':>10} {'min ms':>10} {'compiled median ms':>19} {'compiled min ms':>16}")
+    for key, label in (('import_ms', 'import'), ('parse_ms', 'parse'), ('first_get_ms', 'first get'),
+            ('process_ms', 'process')):
+        print(f"{label:<12} {summary[key]['median']:>10.2f} {summary[key]['min']:>10.2f}"
+            f" {compiled_summary[key]['median']:>19.2f} {compiled_summary[key]['min']:>16.2f}")
+
+    modules = import_profile()
+    total = dict((name, cumulative) for name, _, cumulative in modules).get('thewired')
+    print()
+    print(f"import thewired: {total / 1e3 if total else 0:.2f} ms cumulative (-X importtime)")
+    print(f"{'module':<48} {'self ms':>9} {'cumul. ms':>10}")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda m: -m[1])[:args.top]:
+        print(f"{name:<48} {self_us / 1e3:>9.2f} {cumulative_us / 1e3:>10.2f}")
+
+    heavy = heavy_imports()
+    print()
+    print(f"imported by `import thewired`: {', '.join(heavy) if heavy else 'none of ' + ', '.join(HEAVY_MODULES)}")
+
+    if args.output:
+        report = dict(
+            meta=dict(
+                python=platform.python_version(),
+                implementation=platform.python_implementation(),
+                platform=platform.platform(),
+                timestamp=time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                leaves=args.leaves),
+            runs=runs,
+            summary=summary,
+            compiled_runs=compiled_runs,
+            compiled_summary=compiled_summary,
+            importtime=[dict(module=n, self_us=s, cumulative_us=c) for n, s, c in modules],
+            heavy_imports=heavy)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if heavy else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+benchmark of the hot paths most affected by logging overhead: Namespace.get and
+NamespaceConfigParser2.parse
+
+runs every case with DEBUG logging off (the default) and, for reference, with DEBUG on
+for the thewired loggers (records go to a NullHandler, so only the cost of building them
+is measured)
+
+usage:
+    python -m benchmarks.bench_logging [--number N]
+"""
+import argparse
+import logging
+import timeit
+
+from thewired import Namespace, NamespaceConfigParser2
+
+
+def make_config(width=10, depth=3):
+    """
+    width**depth leaf nodes, each with a couple of plain attributes
+    """
+    if depth == 0:
+        return {"attr1": "value1", "attr2": 2}
+    return {f"key{n}": make_config(width, depth-1) for n in range(width)}
+
+
+def make_deep_namespace(depth=10):
+    ns = Namespace()
+    nsid = ''.join(f'.n{n}' for n in range(depth))
+    ns.add(nsid)
+    return ns, nsid
+
+
+def run(number):
+    ns, deep_nsid = make_deep_namespace()
+    config = make_config()
+    results = dict()
+    results['get (depth 10)'] = min(timeit.repeat(lambda: ns.get(deep_nsid), number=number, repeat=5)) / number
+    parse_number = max(1, number // 1000)
+    results['parse (1110 nodes)'] = min(timeit.repeat(lambda: NamespaceConfigParser2().parse(config), number=parse_number, repeat=3)) / parse_number
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=5000, help='get() calls per timing run')
+    args = parser.parse_args()
+
+    package_logger = logging.getLogger('thewired')
+    package_logger.addHandler(logging.NullHandler())
+    package_logger.propagate = False
+
+    rows = list()
+    for label, level in (('DEBUG off', logging.WARNING), ('DEBUG on', logging.DEBUG)):
+        package_logger.setLevel(level)
+        for name, seconds in run(args.number).items():
+            rows.append((label, name, seconds))
+
+    print(f"{'logging':<10} {'operation':<20} {'usec/op':>12}")
+    for label, name, seconds in rows:
+        print(f"{label:<10} {name:<20} {seconds*1e6:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+memory footprint benchmark: bytes per node for each node class
+
+for every node class, adds <size> leaf nodes of that class to a new namespace (spread
+over groups of 1000, so the group nodes' attribute dicts stay a small share) and measures
+the memory the namespace holds with tracemalloc. Handle wrappers are measured as the
+HandleNodes a NamespaceHandle.get() returns, kept alive in a list.
+
+each row also shows Namespace.memory_report()'s estimate for the same namespace, so the
+two can be compared; the estimate does not see allocator overhead.
+
+node classes:
+    base            NamespaceNodeBase
+    secondlife      SecondLifeNode with a 3 attribute secondlife mapping
+    secondlife-ttl  SecondLifeNode with a result cache
+    delegate        DelegateNode around a shared object
+    handle          HandleNode wrappers from NamespaceHandle.get() (the namespace is not traced)
+
+usage:
+    python -m benchmarks.bench_memory [--classes base,secondlife,...] [--sizes 10000,50000]
+        [--output results.json]
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import thewired
+from thewired import Namespace, NamespaceNodeBase, SecondLifeNode, DelegateNode
+
+GROUP_SIZE = 1000
+
+
+def provider():
+    return 'value'
+
+
+SHARED_DELEGATE = object()
+
+#- name -> (node factory, factory keyword arguments)
+CLASSES = {
+    'base': (NamespaceNodeBase, dict()),
+    'secondlife': (SecondLifeNode, dict(secondlife=dict(a=provider, b='static', c=provider))),
+    'secondlife-ttl': (SecondLifeNode, dict(secondlife=dict(a=provider, b='static', c=provider), cache=dict(ttl=60))),
+    'delegate': (DelegateNode, dict(delegate=SHARED_DELEGATE)),
+}
+
+
+def leaf_nsids(size):
+    return [f'.group{n // GROUP_SIZE}.node{n}' for n in range(size)]
+
+
+def build(name, nsids):
+    factory, kwargs = CLASSES[name]
+    ns = Namespace()
+    for nsid in nsids:
+        ns.add(nsid, factory, **kwargs)
+    return ns
+
+
+def traced(func):
+    """
+    Output:
+        (result of func(), bytes traced as still allocated once it returned)
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+
+def bench_class(name, size):
+    nsids = leaf_nsids(size)
+    if name == 'handle':
+        ns = build('base', nsids)
+        handle = ns.get_handle('.group0')
+        relative = [nsid[len('.group0'):] for nsid in nsids[:GROUP_SIZE]]
+        count = size
+        wrappers, traced_bytes = traced(lambda: [handle.get(relative[n % len(relative)]) for n in range(count)])
+        estimated = None
+        nodes = len(wrappers)
+    else:
+        ns, traced_bytes = traced(lambda: build(name, nsids))
+        report = ns.memory_report()
+        estimated = report.total_bytes
+        nodes = report.nodes
+
+    return dict(cls=name, size=size, nodes=nodes, traced_bytes=traced_bytes,
+        bytes_per_node=traced_bytes / nodes,
+        estimated_bytes=estimated,
+        estimated_per_node=estimated / nodes if estimated is not None else None)
+
+
+def print_results(results):
+    print(f"{'class':<16} {'nodes':>9} {'traced MiB':>11} {'B/node':>8} {'estimate B/node':>16}")
+    for r in results:
+        estimate = '-' if r['estimated_per_node'] is None else f"{r['estimated_per_node']:.0f}"
+        print(f"{r['cls']:<16} {r['nodes']:>9} {r['traced_bytes'] / 2**20:>11.2f} {r['bytes_per_node']:>8.0f} {estimate:>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--classes', default=','.join(list(CLASSES) + ['handle']), help='comma separated node classes')
+    parser.add_argument('--sizes', default='10000,50000', help='comma separated node counts')
+    parser.add_argument('--output', help='write JSON results here')
+    args = parser.parse_args()
+
+    results = list()
+    for size in (int(s) for s in args.sizes.split(',')):
+        for name in args.classes.split(','):
+            print(f"{name} x{size} ...", file=sys.stderr)
+            results.append(bench_class(name, size))
+
+    print_results(results)
+    if args.output:
+        report = dict(
+            meta=dict(
+                python=platform.python_version(),
+                implementation=platform.python_implementation(),
+                platform=platform.platform(),
+                thewired=thewired.__version__,
+                timestamp=time.strftime('%Y-%m-%dT%H:%M:%S%z')),
+            results=results)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
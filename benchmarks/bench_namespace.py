@@ -0,0 +1,174 @@
+"""
+core Namespace benchmark suite
+
+times Namespace.add, get, remove, get_subnodes, get_leaf_nodes, walk and
+NamespaceHandle.get on synthetic namespaces (see benchmarks.trees) and writes the
+results as JSON. A second command compares two result files and flags regressions.
+
+usage:
+    python -m benchmarks.bench_namespace run [--shapes wide,deep,inventory]
+        [--sizes 1k,100k] [--samples 1000] [--output results.json]
+    python -m benchmarks.bench_namespace compare baseline.json results.json [--threshold 0.1]
+
+1M-node namespaces take several minutes per shape and a lot of memory; ask for them with
+--sizes 1k,100k,1M
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import thewired
+from benchmarks import trees
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def result(shape, size, nodes, op, seconds, count):
+    return dict(shape=shape, size=size, nodes=nodes, op=op, count=count, seconds=seconds,
+        usec_per_op=seconds / count * 1e6 if count else None)
+
+
+def bench_shape(shape, size, samples, rng):
+    """
+    Output:
+        list of result dicts for every operation on one namespace
+    """
+    leaves = list(trees.SHAPES[shape](trees.parse_size(size)))
+    node_nsids = trees.all_nodes(leaves)
+    nodes = len(node_nsids)
+    results = list()
+
+    ns = thewired.Namespace()
+    seconds, _ = timed(lambda: [ns.add(nsid) for nsid in leaves])
+    results.append(result(shape, size, nodes, 'add', seconds, nodes))
+
+    sample = rng.sample(node_nsids, min(samples, nodes))
+    seconds, _ = timed(lambda: [ns.get(nsid) for nsid in sample])
+    results.append(result(shape, size, nodes, 'get', seconds, len(sample)))
+
+    #- handle rooted at the first level; get the rest of each sampled NSID through it
+    prefix = '.' + sample[0].split('.')[1]
+    handle = ns.get_handle(prefix)
+    relative = [nsid[len(prefix):] for nsid in sample if nsid.startswith(prefix + '.')]
+    seconds, _ = timed(lambda: [handle.get(nsid) for nsid in relative])
+    results.append(result(shape, size, nodes, 'NamespaceHandle.get', seconds, len(relative)))
+
+    #- full traversals are reported per node in the namespace
+    seconds, _ = timed(lambda: sum(1 for _ in ns.get_subnodes('.')))
+    results.append(result(shape, size, nodes, 'get_subnodes', seconds, nodes))
+
+    seconds, _ = timed(lambda: sum(1 for _ in ns.get_leaf_nodes('.')))
+    results.append(result(shape, size, nodes, 'get_leaf_nodes', seconds, nodes))
+
+    seconds, _ = timed(ns.walk)
+    results.append(result(shape, size, nodes, 'walk', seconds, nodes))
+
+    #- leaves only, so no sampled node is gone with an already removed ancestor
+    removed = rng.sample(leaves, min(samples, len(leaves)))
+    seconds, _ = timed(lambda: [ns.remove(nsid) for nsid in removed])
+    results.append(result(shape, size, nodes, 'remove', seconds, len(removed)))
+    return results
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    results = list()
+    for size in args.sizes.split(','):
+        for shape in args.shapes.split(','):
+            print(f"{shape} @ {size} ...", file=sys.stderr)
+            results.extend(bench_shape(shape, size, args.samples, rng))
+
+    report = dict(
+        meta=dict(
+            python=platform.python_version(),
+            implementation=platform.python_implementation(),
+            platform=platform.platform(),
+            thewired=thewired.__version__,
+            timestamp=time.strftime('%Y-%m-%dT%H:%M:%S%z')),
+        results=results)
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+def print_results(results):
+    print(f"{'shape':<10} {'size':>5} {'nodes':>8}  {'operation':<20} {'count':>8} {'seconds':>10} {'usec/op':>10}")
+    for r in results:
+        print(f"{r['shape']:<10} {r['size']:>5} {r['nodes']:>8}  {r['op']:<20} {r['count']:>8} "
+              f"{r['seconds']:>10.4f} {r['usec_per_op'] or 0:>10.2f}")
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Output:
+        list of (key, baseline usec/op, current usec/op, ratio, regressed) for every
+        (shape, size, op) present in both result sets
+    """
+    def index(report):
+        return dict(((r['shape'], r['size'], r['op']), r) for r in report['results'])
+
+    baseline, current = index(baseline), index(current)
+    rows = list()
+    for key in sorted(set(baseline) & set(current)):
+        before, after = baseline[key]['usec_per_op'], current[key]['usec_per_op']
+        if not before or after is None:
+            continue
+        ratio = after / before
+        rows.append((key, before, after, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = compare_results(baseline, current, args.threshold)
+    print(f"{'shape':<10} {'size':>5}  {'operation':<20} {'baseline':>10} {'current':>10} {'change':>8}")
+    for (shape, size, op), before, after, ratio, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{shape:<10} {size:>5}  {op:<20} {before:>10.2f} {after:>10.2f} {(ratio - 1) * 100:>+7.1f}%{flag}")
+
+    regressions = sum(1 for row in rows if row[-1])
+    if regressions:
+        print(f"{regressions} regression(s) over {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--shapes', default=','.join(trees.SHAPES), help='comma separated shapes')
+    run_parser.add_argument('--sizes', default='1k,100k', help='comma separated sizes (1k, 100k, 1M or a number)')
+    run_parser.add_argument('--samples', type=int, default=1000, help='NSIDs sampled for get/remove')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--output', help='write JSON results here')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help='compare results against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+        help='flag operations more than this fraction slower than the baseline')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == '__main__':
+    main()
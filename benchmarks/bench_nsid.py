@@ -0,0 +1,105 @@
+"""
+micro-benchmark for the NSID string helpers that run on every Namespace.add and
+HandleNode.nsid access
+
+compares the current implementations in thewired.namespace.nsid against the original
+quadratic versions, which are kept here verbatim as the reference point
+
+usage:
+    python -m benchmarks.bench_nsid [--number N]
+"""
+import argparse
+import timeit
+
+from thewired.namespace.nsid import get_nsid_ancestry, iter_nsid_ancestry, cached_nsid_ancestry
+from thewired.namespace.nsid import get_nsid_parts, strip_common_prefix
+
+DEPTHS = (5, 20, 100)
+
+
+def legacy_get_nsid_ancestry(nsid, separator='.'):
+    nsid_segments = get_nsid_parts(nsid)
+    ancestry = list()
+    for i in range(len(nsid_segments)):
+        new_ancestor_segments = list()
+        for n in range(i+1):
+            new_ancestor_segments.append(nsid_segments[n])
+        new_ancestor = separator.join(new_ancestor_segments)
+        if new_ancestor == '':
+            new_ancestor = separator
+        ancestry.append(new_ancestor)
+    return ancestry
+
+
+def legacy_find_common_prefix(nsid1, nsid2, separator='.'):
+    nsid1_parts = get_nsid_parts(nsid1, separator=separator)
+    nsid2_parts = get_nsid_parts(nsid2, separator=separator)
+
+    i = 0
+    while (i < len(nsid1_parts) and
+            i < len(nsid2_parts) and
+            nsid1_parts[i] == nsid2_parts[i]):
+        i += 1
+    if i == 0:
+        return None
+    else:
+        return separator.join(nsid1_parts[0:i])
+
+
+def legacy_strip_common_prefix(nsid1, nsid2, separator='.'):
+    nsid1 = str(nsid1)
+    nsid2 = str(nsid2)
+    common_prefix = legacy_find_common_prefix(nsid1, nsid2, separator=separator)
+
+    stripped_nsid1 = list()
+    common_prefix_parts = common_prefix.split(separator)
+    for n, part in enumerate(nsid1.split(separator)):
+        if n > len(common_prefix_parts) - 1:
+            stripped_nsid1.append(part)
+    stripped_nsid1 = separator.join(stripped_nsid1)
+
+    stripped_nsid2 = list()
+    common_prefix_parts = common_prefix.split(separator)
+    for n, part in enumerate(nsid2.split(separator)):
+        if n > len(common_prefix_parts) - 1:
+            stripped_nsid2.append(part)
+    stripped_nsid2 = separator.join(stripped_nsid2)
+
+    return stripped_nsid1, stripped_nsid2
+
+
+def make_nsid(depth):
+    return ''.join(f'.segment{n}' for n in range(depth))
+
+
+def bench(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=2000, help='calls per timing run')
+    args = parser.parse_args()
+
+    rows = list()
+    for depth in DEPTHS:
+        nsid = make_nsid(depth)
+        other = make_nsid(depth // 2) + '.elsewhere'
+
+        assert legacy_get_nsid_ancestry(nsid) == get_nsid_ancestry(nsid)
+        assert legacy_strip_common_prefix(nsid, other) == strip_common_prefix(nsid, other)
+
+        rows.append((depth, 'ancestry (legacy list)', bench(lambda: legacy_get_nsid_ancestry(nsid), args.number)))
+        rows.append((depth, 'ancestry (list)', bench(lambda: get_nsid_ancestry(nsid), args.number)))
+        rows.append((depth, 'ancestry (iterator)', bench(lambda: tuple(iter_nsid_ancestry(nsid)), args.number)))
+        rows.append((depth, 'ancestry (cached tuple)', bench(lambda: cached_nsid_ancestry(nsid), args.number)))
+        rows.append((depth, 'strip_common_prefix (legacy)', bench(lambda: legacy_strip_common_prefix(nsid, other), args.number)))
+        rows.append((depth, 'strip_common_prefix', bench(lambda: strip_common_prefix(nsid, other), args.number)))
+
+    print(f"{'depth':>5}  {'operation':<30} {'usec/call':>10}")
+    for depth, name, usec in rows:
+        print(f"{depth:>5}  {name:<30} {usec:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
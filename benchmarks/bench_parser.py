@@ -0,0 +1,266 @@
+"""
+config-parser scaling benchmark: NamespaceConfigParser vs NamespaceConfigParser2
+
+generates configs of growing size (at a fixed depth) and growing depth (at a fixed
+size) and parses each one with both parsers, measuring parse time, peak memory
+(tracemalloc) and nodes per second. Leaves cycle through the config features
+NamespaceConfigParser2 understands:
+
+    plain        {"attr": "value", "count": 1}
+    class        {"__class__": "thewired.SecondLifeNode", "__init__": {...}}
+    nested       __class__/__init__ with an __init__ parameter that is itself an object
+    type         {"__type__": {"name": ..., "bases": [...], "dict": {...}}}
+    ref          {"target": "nsid-ref://.targets.tN"}  (resolved in a lookup namespace)
+    link         {"target": "nsid://.targets.tN"}      (node becomes a SecondLifeNode)
+
+NamespaceConfigParser does not interpret the meta keys or the nsid URIs; it builds
+plain nodes and values out of them, so it does somewhat different work on the same
+input. Both are reported per config node (the mapping keys that are not meta keys).
+NamespaceConfigParser2 is run twice, once more with fast_build=True.
+
+for each series the time per config is fitted as time ~ nodes^k (size series) or
+time ~ depth^k (depth series) on a log-log scale. A size exponent well over 1 means
+parse time grows super-linearly with the number of nodes; a depth exponent well over 0
+means deeper configs cost more per node.
+
+usage:
+    python -m benchmarks.bench_parser [--sizes 500,1000,2000,4000,8000] [--depth 4]
+        [--depths 2,4,8,16,32] [--depth-size 2000] [--repeat 3] [--output results.json]
+"""
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+
+import thewired
+from thewired import Namespace, NamespaceConfigParser, NamespaceConfigParser2
+
+KINDS = ('plain', 'class', 'nested', 'type', 'ref', 'link')
+
+#- distinct nsid-ref/nsid targets in the lookup namespace
+TARGETS = 16
+
+#- distinct __type__ names; dynamic types share names the way real configs do
+TYPE_NAMES = 8
+
+#- exponents over these are flagged
+SUPERLINEAR = 1.15
+DEPTH_SENSITIVE = 0.15
+
+
+def make_leaf(kind, n):
+    if kind == 'plain':
+        return {'attr': f'value{n}', 'count': n}
+    if kind == 'class':
+        return {'__class__': 'thewired.SecondLifeNode', '__init__': {'secondlife': {'n': n}}}
+    if kind == 'nested':
+        return {
+            '__class__': 'thewired.testobjects.SomeNodeType',
+            '__init__': {
+                'something': {
+                    '__class__': 'thewired.testobjects.Something',
+                    '__init__': {'arg1': f'value{n}'}}}}
+    if kind == 'type':
+        return {
+            '__type__': {
+                'name': f'Dynamic{n % TYPE_NAMES}',
+                'bases': ['thewired.NamespaceNodeBase'],
+                'dict': {'kind': 'dynamic'}}}
+    if kind == 'ref':
+        return {'target': f'nsid-ref://.targets.t{n % TARGETS}'}
+    if kind == 'link':
+        return {'target': f'nsid://.targets.t{n % TARGETS}'}
+    raise ValueError(f"unknown leaf kind: {kind}")
+
+
+def make_config(leaves, depth):
+    """
+    Description:
+        config with <leaves> leaf nodes, each <depth> levels below the top, spread
+        over groups with an even fan-out
+    Output:
+        (config dict, number of config nodes)
+    """
+    depth = max(1, depth)
+    fanout = max(2, math.ceil(leaves ** (1 / depth)))
+    config = dict()
+    nodes = 0
+    for n in range(leaves):
+        cur = config
+        rest = n
+        digits = list()
+        for _ in range(depth - 1):
+            rest, digit = divmod(rest, fanout)
+            digits.append(digit)
+        for level, digit in enumerate(reversed(digits)):
+            key = f'g{level}_{digit}'
+            if key not in cur:
+                cur[key] = dict()
+                nodes += 1
+            cur = cur[key]
+        cur[f'leaf{n}'] = make_leaf(KINDS[n % len(KINDS)], n)
+        nodes += 1
+    return config, nodes
+
+
+def make_lookup_ns():
+    ns = Namespace()
+    for n in range(TARGETS):
+        ns.add(f'.targets.t{n}')
+    return ns
+
+
+def parse_v1(config, lookup_ns):
+    with warnings.catch_warnings():
+        #- every node without an nsroot warns; keep the warnings machinery out of the timings
+        warnings.simplefilter('ignore')
+        return NamespaceConfigParser().parse(config)
+
+
+def parse_v2(config, lookup_ns):
+    return NamespaceConfigParser2(lookup_ns=lookup_ns).parse(config)
+
+
+def parse_v2_fast(config, lookup_ns):
+    return NamespaceConfigParser2(lookup_ns=lookup_ns, fast_build=True).parse(config)
+
+
+PARSERS = {
+    'NamespaceConfigParser': parse_v1,
+    'NamespaceConfigParser2': parse_v2,
+    'NamespaceConfigParser2(fast_build)': parse_v2_fast,
+}
+
+
+def measure(parse, leaves, depth, repeat):
+    """
+    Output:
+        dict with the best parse time of <repeat> runs, peak traced memory of one more
+        run and the config node count
+    """
+    lookup_ns = make_lookup_ns()
+    best = None
+    for _ in range(repeat):
+        config, nodes = make_config(leaves, depth)
+        start = time.perf_counter()
+        parse(config, lookup_ns)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+
+    config, nodes = make_config(leaves, depth)
+    tracemalloc.start()
+    try:
+        parse(config, lookup_ns)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return dict(leaves=leaves, depth=depth, nodes=nodes, seconds=best,
+        nodes_per_sec=nodes / best if best else None, peak_bytes=peak)
+
+
+def exponent(xs, ys):
+    """
+    Output:
+        least-squares slope of log(ys) over log(xs), or None with fewer than two points
+    """
+    points = [(math.log(x), math.log(y)) for x, y in zip(xs, ys) if x > 0 and y > 0]
+    if len(set(x for x, _ in points)) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    num = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    den = sum((x - mean_x) ** 2 for x, _ in points)
+    return num / den
+
+
+def run_series(series, points, depth_of, leaves_of, repeat):
+    results = list()
+    for name, parse in PARSERS.items():
+        for point in points:
+            leaves, depth = leaves_of(point), depth_of(point)
+            print(f"{name} {series} leaves={leaves} depth={depth} ...", file=sys.stderr)
+            r = measure(parse, leaves, depth, repeat)
+            r.update(parser=name, series=series)
+            results.append(r)
+    return results
+
+
+def fit(results):
+    """
+    Output:
+        list of scaling dicts, one per (parser, series)
+    """
+    fits = list()
+    for name in PARSERS:
+        size = [r for r in results if r['parser'] == name and r['series'] == 'size']
+        if size:
+            k = exponent([r['nodes'] for r in size], [r['seconds'] for r in size])
+            fits.append(dict(parser=name, series='size', x='nodes', exponent=k,
+                flagged=k is not None and k > SUPERLINEAR))
+        depth = [r for r in results if r['parser'] == name and r['series'] == 'depth']
+        if depth:
+            #- per node, since the node count drifts a little with the fan-out
+            k = exponent([r['depth'] for r in depth], [r['seconds'] / r['nodes'] for r in depth])
+            fits.append(dict(parser=name, series='depth', x='depth', exponent=k,
+                flagged=k is not None and k > DEPTH_SENSITIVE))
+    return fits
+
+
+def print_results(results, fits):
+    print(f"{'parser':<34} {'series':<6} {'depth':>5} {'nodes':>8} {'seconds':>10} "
+          f"{'nodes/sec':>11} {'peak KiB':>10} {'B/node':>8}")
+    for r in results:
+        print(f"{r['parser']:<34} {r['series']:<6} {r['depth']:>5} {r['nodes']:>8} {r['seconds']:>10.4f} "
+              f"{r['nodes_per_sec'] or 0:>11.0f} {r['peak_bytes'] / 1024:>10.1f} {r['peak_bytes'] / r['nodes']:>8.0f}")
+    print()
+    print(f"{'parser':<34} {'series':<6} {'fit':<16} {'exponent':>8}")
+    for f in fits:
+        k = 'n/a' if f['exponent'] is None else f"{f['exponent']:.2f}"
+        if f['flagged']:
+            note = '  SUPER-LINEAR' if f['series'] == 'size' else '  DEPTH-SENSITIVE'
+        else:
+            note = ''
+        print(f"{f['parser']:<34} {f['series']:<6} {'time ~ ' + f['x'] + '^k':<16} {k:>8}{note}")
+
+
+def ints(text):
+    return [int(x) for x in text.split(',') if x]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='500,1000,2000,4000,8000', help='leaf counts for the size series')
+    parser.add_argument('--depth', type=int, default=4, help='depth of the size series')
+    parser.add_argument('--depths', default='2,4,8,16,32', help='depths for the depth series')
+    parser.add_argument('--depth-size', type=int, default=2000, help='leaf count of the depth series')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per point; the best is kept')
+    parser.add_argument('--output', help='write JSON results here')
+    args = parser.parse_args()
+
+    results = run_series('size', ints(args.sizes), lambda p: args.depth, lambda p: p, args.repeat)
+    results += run_series('depth', ints(args.depths), lambda p: p, lambda p: args.depth_size, args.repeat)
+    fits = fit(results)
+    print_results(results, fits)
+
+    if args.output:
+        report = dict(
+            meta=dict(
+                python=platform.python_version(),
+                implementation=platform.python_implementation(),
+                platform=platform.platform(),
+                thewired=thewired.__version__,
+                timestamp=time.strftime('%Y-%m-%dT%H:%M:%S%z')),
+            results=results,
+            scaling=fits)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+provider fan-out benchmark
+
+runs AddendumFormatter.provide() over simulated implementors (benchmarks.fakeimplementor)
+for a range of implementor counts and addendum shapes, and reports throughput and p50/p99
+provide() latency for each way of calling it.
+
+addendum shapes:
+    bare          '.list_resources()'
+    params        ParametizedCall with a couple of scalar parameters
+    params-large  ParametizedCall with 16 scalar parameters
+    sequence      ParametizedCall with a 32 item list parameter
+    param-set     ParametizedCall with a named parameter set overlaid on the defaults
+
+paths:
+    serial        one caller, one provide() after another
+    threads       --threads callers sharing one provider
+    coalesced     --threads callers sharing one provider with coalesce=True, so identical
+                  concurrent implementor calls are evaluated once
+
+new ways of calling providers (concurrent fan-out, cached results) are benchmarked by
+adding them to PATHS.
+
+usage:
+    python -m benchmarks.bench_provider [--implementors 1,10,50] [--shapes ...] [--paths ...]
+        [--requests 20] [--threads 8] [--latency 0.001] [--jitter 0] [--payload 10]
+        [--item-bytes 64] [--failure-rate 0] [--output results.json]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import thewired
+from thewired import AddendumFormatter
+from benchmarks.fakeimplementor import FakeImplementorError, make_implementors, DEFAULT_PREFIX
+
+
+def params_addendum(method_name, sets=None, **defaults):
+    params = dict(defaults=dict(defaults, method_name=method_name))
+    params.update(sets or dict())
+    #- a single mapping is not taken as an addendum; it has to come in a list
+    return [{'__params__': params}]
+
+
+#- name -> (addendum, provide() kwargs)
+SHAPES = {
+    'bare': ('.list_resources()', dict()),
+    'params': (params_addendum('list_resources', region='us-east-1', limit=100), dict()),
+    'params-large': (params_addendum('list_resources', **{f'filter{n}': f'value{n}' for n in range(16)}), dict()),
+    'sequence': (params_addendum('list_resources', ids=[f'resource-{n}' for n in range(32)]), dict()),
+    'param-set': (
+        params_addendum('list_resources', sets=dict(prod=dict(region='eu-west-1', limit=500)),
+            region='us-east-1', limit=100),
+        dict(_params='prod')),
+}
+
+
+def percentile(values, fraction):
+    """
+    Output:
+        nearest-rank percentile of <values>, or None if empty
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def timed_provide(provider, kwargs):
+    """
+    Output:
+        (seconds, failed)
+    """
+    start = time.perf_counter()
+    try:
+        provider.provide(show_progress=False, **dict(kwargs))
+        failed = False
+    except FakeImplementorError:
+        failed = True
+    return time.perf_counter() - start, failed
+
+
+def serial(make_provider, kwargs, requests, threads):
+    provider = make_provider(coalesce=False)
+    return [timed_provide(provider, kwargs) for _ in range(requests)]
+
+
+def threaded(make_provider, kwargs, requests, threads, coalesce=False):
+    provider = make_provider(coalesce=coalesce)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(lambda _: timed_provide(provider, kwargs), range(requests)))
+
+
+def coalesced(make_provider, kwargs, requests, threads):
+    return threaded(make_provider, kwargs, requests, threads, coalesce=True)
+
+
+#- name -> callable(make_provider, provide kwargs, requests, threads) -> list of (seconds, failed)
+PATHS = dict(serial=serial, threads=threaded, coalesced=coalesced)
+
+
+def bench(path, shape, count, args):
+    ns, implementors = make_implementors(count, seed=args.seed, latency=args.latency, jitter=args.jitter,
+        payload_size=args.payload, item_bytes=args.item_bytes, failure_rate=args.failure_rate)
+    addendum, kwargs = SHAPES[shape]
+
+    def make_provider(coalesce):
+        return AddendumFormatter(ns, DEFAULT_PREFIX, addendum=addendum, formatter=list, coalesce=coalesce)
+
+    start = time.perf_counter()
+    calls = PATHS[path](make_provider, kwargs, args.requests, args.threads)
+    seconds = time.perf_counter() - start
+
+    latencies = [s for s, _ in calls]
+    p50, p99 = percentile(latencies, 0.50), percentile(latencies, 0.99)
+    return dict(path=path, shape=shape, implementors=count, requests=len(calls),
+        errors=sum(1 for _, failed in calls if failed),
+        implementor_calls=sum(i.calls for i in implementors),
+        seconds=seconds, throughput=len(calls) / seconds if seconds else None,
+        p50_ms=p50 * 1e3, p99_ms=p99 * 1e3)
+
+
+def print_results(results):
+    print(f"{'path':<10} {'shape':<13} {'impls':>6} {'reqs':>6} {'errors':>6} {'impl calls':>10} "
+          f"{'provide/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for r in results:
+        print(f"{r['path']:<10} {r['shape']:<13} {r['implementors']:>6} {r['requests']:>6} {r['errors']:>6} "
+              f"{r['implementor_calls']:>10} {r['throughput'] or 0:>10.1f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--implementors', default='1,10,50', help='comma separated implementor counts')
+    parser.add_argument('--shapes', default=','.join(SHAPES), help='comma separated addendum shapes')
+    parser.add_argument('--paths', default=','.join(PATHS), help='comma separated call paths')
+    parser.add_argument('--requests', type=int, default=20, help='provide() calls per benchmark')
+    parser.add_argument('--threads', type=int, default=8, help='callers for the concurrent paths')
+    parser.add_argument('--latency', type=float, default=0.001, help='seconds per implementor call')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random seconds per implementor call')
+    parser.add_argument('--payload', type=int, default=10, help='items returned per implementor call')
+    parser.add_argument('--item-bytes', type=int, default=64, help='bytes of data per returned item')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='probability an implementor call fails')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write JSON results here')
+    args = parser.parse_args()
+
+    results = list()
+    for count in (int(n) for n in args.implementors.split(',')):
+        for shape in args.shapes.split(','):
+            for path in args.paths.split(','):
+                print(f"{path} {shape} x{count} ...", file=sys.stderr)
+                results.append(bench(path, shape, count, args))
+
+    print_results(results)
+    if args.output:
+        report = dict(
+            meta=dict(
+                python=platform.python_version(),
+                implementation=platform.python_implementation(),
+                platform=platform.platform(),
+                thewired=thewired.__version__,
+                timestamp=time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                options=vars(args)),
+            results=results)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
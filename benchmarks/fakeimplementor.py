@@ -0,0 +1,123 @@
+"""
+simulated implementor SDK for benchmarks and tests
+
+stands in for a cloud SDK client behind an AddendumFormatter: every implementor node
+answers list_resources()/describe_resource() after a configurable latency, with a
+configurable payload, and fails at a configurable rate.
+
+    from benchmarks.fakeimplementor import make_implementors
+    ns, implementors = make_implementors(10, latency=0.005, failure_rate=0.01)
+    provider = AddendumFormatter(ns, '.implementors', addendum='.list_resources()', formatter=list)
+    provider.provide(show_progress=False)
+"""
+
+import random
+import threading
+import time
+from logging import getLogger
+from typing import Union
+
+from thewired import Namespace, NamespaceNodeBase, Nsid
+
+logger = getLogger(__name__)
+
+NsidU = Union[str, Nsid]
+
+DEFAULT_PREFIX = '.implementors'
+
+
+class FakeImplementorError(Exception):
+    """
+    Description:
+        the simulated failure raised by FakeImplementor methods, like an SDK's API error
+    """
+    pass
+
+
+
+class FakeImplementor(NamespaceNodeBase):
+    """
+    Description:
+        implementor node with simulated call latency, payload and failures
+
+    Input:
+        latency: seconds every call sleeps for
+        jitter: up to this many extra seconds, drawn uniformly per call
+        payload_size: items list_resources() returns
+        item_bytes: size of the 'data' string in every returned item
+        failure_rate: probability (0..1) that a call raises FakeImplementorError
+        seed: seed for this node's jitter and failures, for repeatable runs
+
+    Notes:
+        .calls and .failures count the calls made to this node
+    """
+    def __init__(self, *, nsid: NsidU, namespace: Namespace, latency: float=0.0, jitter: float=0.0,
+            payload_size: int=10, item_bytes: int=64, failure_rate: float=0.0, seed=None):
+        super().__init__(nsid=nsid, namespace=namespace)
+        if not 0.0 <= failure_rate <= 1.0:
+            raise ValueError(f"failure_rate must be between 0 and 1, not {failure_rate}")
+        self.latency = latency
+        self.jitter = jitter
+        self.payload_size = payload_size
+        self.item_bytes = item_bytes
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.failures = 0
+        self._data = 'x' * item_bytes
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+
+    def _call(self, method: str, count: int, params: dict) -> list:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            failed = self.failure_rate > 0 and self._rng.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise FakeImplementorError(f"{self.nsid}.{method}: simulated failure")
+
+        return [dict(id=f'{self.nsid}:{n}', method=method, params=params, data=self._data)
+            for n in range(count)]
+
+
+    def list_resources(self, **filters) -> list:
+        return self._call('list_resources', self.payload_size, filters)
+
+
+    def describe_resource(self, resource_id=None, **params) -> list:
+        return self._call('describe_resource', 1, dict(params, resource_id=resource_id))
+
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls = 0
+            self.failures = 0
+
+
+
+def make_implementors(count: int, namespace: Union[Namespace, None]=None, prefix: str=DEFAULT_PREFIX,
+        seed=None, **options) -> tuple:
+    """
+    Description:
+        create <count> FakeImplementor nodes under <prefix>
+    Input:
+        count: number of implementor nodes
+        namespace: where to add them; a new Namespace by default
+        prefix: NSID the implementors are added under, as <prefix>.implementor<N>
+        seed: if given, node N is seeded with seed + N
+        **options: FakeImplementor keyword parameters (latency, payload_size, ...)
+    Output:
+        (namespace, list of the FakeImplementor nodes)
+    """
+    namespace = Namespace() if namespace is None else namespace
+    implementors = list()
+    for n in range(count):
+        node_seed = None if seed is None else seed + n
+        created = namespace.add(f'{prefix}.implementor{n}', FakeImplementor, seed=node_seed, **options)
+        implementors.append(created[-1])
+    return namespace, implementors
@@ -0,0 +1,90 @@
+"""
+synthetic namespace shapes for the benchmarks
+
+every generator yields leaf NSIDs. Adding them to an empty Namespace creates (about)
+<size> nodes in total, counting the intermediate nodes, but not the root.
+
+shapes:
+    wide: a handful of groups with thousands of children each
+    deep: long chains (depth 50) hanging off a few branches
+    inventory: shaped like a cloud inventory:
+        .<provider>.<account>.<region>.<service>.<resource>
+"""
+import itertools
+
+from thewired import Namespace
+
+SIZES = dict(zip(('1k', '100k', '1M'), (1000, 100000, 1000000)))
+
+DEEP_CHAIN_DEPTH = 50
+
+PROVIDERS = ('aws', 'gcp', 'azure')
+REGIONS = ('us_east_1', 'us_west_2', 'eu_west_1', 'eu_central_1', 'ap_south_1', 'ap_northeast_1')
+SERVICES = ('ec2', 's3', 'rds', 'iam', 'lambda_', 'elb', 'ecs', 'dynamodb')
+
+
+def parse_size(size):
+    """
+    Input:
+        size: an int, or one of the labels in SIZES ("1k", "100k", "1M")
+    """
+    try:
+        return SIZES[size]
+    except KeyError:
+        return int(size)
+
+
+def wide(size):
+    groups = max(1, int(round(size ** 0.5 / 10)))
+    per_group = max(1, (size - groups) // groups)
+    for g in range(groups):
+        for n in range(per_group):
+            yield f'.group{g}.node{n}'
+
+
+def deep(size):
+    depth = min(DEEP_CHAIN_DEPTH, size)
+    chains = max(1, size // depth)
+    for c in range(chains):
+        yield f'.chain{c}' + ''.join(f'.level{d}' for d in range(1, depth))
+
+
+def inventory(size):
+    #- fixed fan-out for provider/region/service; accounts and resources grow with size
+    accounts = max(1, int(round((size / (len(PROVIDERS) * len(REGIONS) * len(SERVICES))) ** 0.5 / 4)))
+    containers = len(PROVIDERS) * accounts * len(REGIONS) * len(SERVICES)
+    resources = max(1, (size - containers) // containers)
+    for provider, account, region, service in itertools.product(
+            PROVIDERS, range(accounts), REGIONS, SERVICES):
+        for r in range(resources):
+            yield f'.{provider}.account{account}.{region}.{service}.resource{r}'
+
+
+SHAPES = dict(wide=wide, deep=deep, inventory=inventory)
+
+
+def build(shape, size, ns=None):
+    """
+    Description:
+        add every leaf of <shape> at <size> to <ns> (a new Namespace by default)
+    Output:
+        (namespace, list of leaf NSIDs)
+    """
+    ns = Namespace() if ns is None else ns
+    leaves = list(SHAPES[shape](parse_size(size)))
+    for nsid in leaves:
+        ns.add(nsid)
+    return ns, leaves
+
+
+def all_nodes(leaves):
+    """
+    Output:
+        sorted list of every distinct non-root NSID the leaves create
+    """
+    nodes = set()
+    for nsid in leaves:
+        parts = nsid.split('.')
+        for n in range(2, len(parts) + 1):
+            nodes.add('.'.join(parts[:n]))
+    return sorted(nodes)
@@ -12,3 +12,12 @@ def test_base_node_nsid(blank_namespace):
     nsid = Nsid(nsid_s)
     ns = NamespaceNodeBase(nsid=nsid_s, namespace=blank_namespace)
     assert ns.nsid == nsid
+
+def test_base_node_pickles(blank_namespace):
+    import pickle
+    node = NamespaceNodeBase(nsid='.a.b', namespace=None)
+    node.value = [1, 2]
+    copy = pickle.loads(pickle.dumps(node))
+    assert type(copy) is NamespaceNodeBase
+    assert copy.nsid == Nsid('.a.b')
+    assert copy.value == [1, 2]
@@ -0,0 +1,33 @@
+import pytest
+
+from thewired import Namespace
+from benchmarks.bench_concurrency import run_load
+
+
+def test_load_mix_is_consistent():
+    report = run_load(readers=3, writers=2, handle_users=3, duration=0.5, groups=4, nodes=20,
+        switch_interval=0.0001)
+    roles = dict((r["role"], r) for r in report["roles"])
+    assert all(roles[role]["ops"] > 0 for role in ("reader", "writer", "handle"))
+    assert report["violations"] == 0, [r["violation_samples"] for r in report["roles"]]
+    assert report["errors"] == 0, [r["error_samples"] for r in report["roles"]]
+
+
+def test_handle_attribute_access_leaves_namespace_root_alone():
+    ns = Namespace()
+    ns.add(".a.b.c")
+    root = ns.root
+    handle = ns.get_handle(".a")
+    nested = handle.get_handle(".b")
+
+    assert handle.b is ns.get(".a.b")
+    assert nested.c is ns.get(".a.b.c")
+    assert nested.default_node_factory is ns.default_node_factory
+    assert ns.root is root
+
+
+def test_handle_getattr_does_not_recurse_without_state():
+    cls = Namespace().get_handle(".").__class__
+    handle = cls.__new__(cls)
+    with pytest.raises(AttributeError):
+        handle.anything
@@ -0,0 +1,76 @@
+import importlib.util
+
+import pytest
+
+from thewired import Namespace, NamespaceConfigParser2, NamespaceConfigCompiler, SecondLifeNode
+from thewired.configcompiler import config_hash, is_stale
+from thewired.exceptions import NamespaceConfigParsingError
+from tests.test_configparser import _tree
+
+
+CONFIG = {
+    "targets": {"t0": {"x": 1}},
+    "topkey": {
+        "plain": {"count": 3, "values": [1, 2.5, None], "class": True, "dropped": "string"},
+        "obj": {"__class__": "thewired.SecondLifeNode", "__init__": {"secondlife": {"n": 1}}},
+        "nested": {
+            "__class__": "thewired.testobjects.SomeNodeType",
+            "__init__": {"something": {"__class__": "thewired.testobjects.Something", "__init__": {"arg1": "a"}}}},
+        "typed1": {"__type__": {"name": "Dyn", "bases": ["thewired.NamespaceNodeBase"], "dict": {"kind": 1}}},
+        "typed2": {"__type__": {"name": "Dyn", "bases": ["thewired.NamespaceNodeBase"], "dict": {"kind": 1}}},
+        "ref": {"target": "nsid-ref://.targets.t0"},
+        "link": {"target": "nsid://.targets.t0"},
+    },
+}
+
+
+def load(tmp_path, config, name="compiled_ns", **kwargs):
+    path = tmp_path / f"{name}.py"
+    NamespaceConfigCompiler().write(config, str(path), **kwargs)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_compiled_module_builds_the_parsed_namespace(tmp_path):
+    module = load(tmp_path, CONFIG)
+    ns = module.build()
+    assert _tree(ns) == _tree(NamespaceConfigParser2().parse(CONFIG))
+    assert ns.get(".topkey.plain").values == [1, 2.5, None]
+    assert vars(ns.get(".topkey.plain"))["class"] is True
+    assert ns.get(".topkey.nested").somethings_thing == "a"
+    assert type(ns.get(".topkey.typed1")) is type(ns.get(".topkey.typed2"))
+    assert ns.get(".topkey.ref").target is ns.get(".targets.t0")
+    assert isinstance(ns.get(".topkey.link"), SecondLifeNode)
+    assert ns.get(".topkey.link").target is ns.get(".targets.t0")
+    #- every build is a new namespace
+    assert module.build().get(".topkey") is not ns.get(".topkey")
+
+
+def test_compiled_module_with_prefix_and_lookup_ns(tmp_path):
+    lookup_ns = Namespace()
+    lookup_ns.add(".a.b")
+    module = load(tmp_path, {"n": {"r": "nsid-ref://.a.b"}}, prefix=".under")
+    ns = Namespace()
+    ns.add(".under")
+    assert module.build(ns, lookup_ns) is ns
+    assert ns.get(".under.n").r is lookup_ns.get(".a.b")
+    assert module.PREFIX == ".under"
+
+
+def test_staleness(tmp_path):
+    module = load(tmp_path, CONFIG)
+    assert module.CONFIG_HASH == config_hash(CONFIG)
+    assert not is_stale(module, dict(reversed(list(CONFIG.items()))))
+    assert is_stale(module, dict(CONFIG, extra={}))
+
+
+@pytest.mark.parametrize("config", [
+    {"a": {"value": object()}},
+    {"a.b": {}},
+    {"a": {"__type__": {"name": "T", "bases": ["thewired.NamespaceNodeBase"], "dict": {"f": len}}}},
+])
+def test_uncompilable_config(config):
+    with pytest.raises(NamespaceConfigParsingError):
+        NamespaceConfigCompiler().compile(config)
@@ -1,5 +1,7 @@
 import unittest
 
+import pytest
+
 import collections
 import logging, warnings
 
@@ -613,3 +615,168 @@ def test_parse_resolve_nsid_link():
 
     assert str(ns.root.topkey.subkey.nsid) == ".topkey.subkey"
     assert str(ns.root.topkey.subkey.referring_key.nsid) == ".a.b.c.d"
+
+
+def _tree(ns):
+    #- (nsid, node type, attribute names) for every node, following child nodes only
+    out = list()
+    stack = [ns.root]
+    while stack:
+        node = stack.pop()
+        out.append((str(node.nsid), node.__class__.__name__, sorted(vars(node))))
+        prefix = '' if str(node.nsid) == '.' else str(node.nsid)
+        stack.extend(v for k, v in vars(node).items()
+            if isinstance(v, NamespaceNodeBase) and str(v.nsid) == f"{prefix}.{k}")
+    return sorted(out)
+
+def test_fast_build_matches_parse():
+    lookup_ns = Namespace()
+    lookup_ns.add(".a.b.c.d")
+    test_dict = {
+        "topkey": {
+            "plain": {"value": 1, "dropped": "text"},
+            "ref": {"referring_key": "nsid-ref://.a.b.c.d"},
+            "link": {"before": 1, "referring_key": "nsid://.a.b.c.d", "after": 2},
+            "typed": {"__class__": "thewired.testobjects.SomeNodeType",
+                      "__init__": {"something": {"__class__": "thewired.testobjects.Something",
+                                                 "__init__": {"arg1": "x"}}},
+                      "child": {"leaf": 3}},
+        }
+    }
+    slow = NamespaceConfigParser2(lookup_ns=lookup_ns).parse(test_dict)
+    fast = NamespaceConfigParser2(lookup_ns=lookup_ns, fast_build=True).parse(test_dict)
+    assert _tree(fast) == _tree(slow)
+    assert fast.root.topkey.typed.somethings_thing == "x"
+    assert isinstance(fast.root.topkey.link, SecondLifeNode)
+    assert str(fast.root.topkey.link.referring_key.nsid) == ".a.b.c.d"
+    assert fast.root.topkey.ref.referring_key is lookup_ns.get(".a.b.c.d")
+
+def test_fast_build_into_existing_namespace():
+    ns = Namespace()
+    ns.add(".existing.node")
+    parser = NamespaceConfigParser2(namespace=ns, fast_build=True)
+    parser.parse({"new": {"x": 1}}, prefix=".existing")
+    assert ns.get(".existing.new").x == 1
+    with pytest.raises(thewired.namespace.namespace.NamespaceCollisionError):
+        parser.parse({"node": {}}, prefix=".existing")
+
+def test_fast_build_not_used_for_handles():
+    ns = Namespace()
+    ns.add(".h")
+    parser = NamespaceConfigParser2(namespace=ns.get_handle(".h"), fast_build=True)
+    assert not parser._can_fast_build()
+    parser.parse({"a": {"b": {}}})
+    assert str(ns.get(".h.a.b").nsid) == ".h.a.b"
+
+
+def test_identical_dynamic_types_share_a_class():
+    spec = lambda value: {"__type__": {"name": "Dyn", "bases": ["thewired.NamespaceNodeBase"], "dict": {"value": value}}}
+    ns = NamespaceConfigParser2().parse({"a": spec(1), "b": spec(1), "c": spec(2), "d": spec(True)})
+    a, b, c, d = (ns.get(f".{key}") for key in "abcd")
+    assert type(a) is type(b)
+    assert isinstance(b, type(a))
+    assert type(c) is not type(a)
+    assert type(d) is not type(a)
+    assert c.value == 2
+
+
+def test_unhashable_dynamic_type_spec_is_not_cached():
+    spec = lambda: {"__type__": {"name": "Dyn", "bases": ["thewired.NamespaceNodeBase"], "dict": {"value": bytearray(b"x")}}}
+    ns = NamespaceConfigParser2().parse({"a": spec(), "b": spec()})
+    assert type(ns.get(".a")) is not type(ns.get(".b"))
+
+
+def test_static_class_is_resolved_once(monkeypatch):
+    from thewired import namespaceconfigparser2
+    imported = list()
+    real_import = namespaceconfigparser2.import_module
+    monkeypatch.setattr(namespaceconfigparser2, "import_module", lambda name: imported.append(name) or real_import(name))
+
+    config = dict((f"n{n}", {"__class__": "thewired.SecondLifeNode", "__init__": {"secondlife": {}}}) for n in range(5))
+    ns = NamespaceConfigParser2().parse(config)
+    assert imported == ["thewired"]
+    assert all(isinstance(ns.get(f".n{n}"), SecondLifeNode) for n in range(5))
+
+
+def test_parallel_parse_matches_parse():
+    config = {
+        "b": {"y": {"v": 2}},
+        "a": {"x": 1, "ref": "nsid-ref://.b.y", "link": {"l": "nsid://.b.y"}, "deep": {"z": [1, 2]}},
+        "c": {"__type__": {"name": "T", "bases": ["thewired.NamespaceNodeBase"], "dict": {"q": 1}}, "k": {}},
+    }
+    ns = NamespaceConfigParser2(workers=2).parse(config)
+    assert _tree(ns) == _tree(NamespaceConfigParser2().parse(config))
+    #- refs, links and namespaces point into the parent process' namespace
+    assert ns.get(".a").ref is ns.get(".b.y")
+    assert ns.get(".a.deep")._ns is ns
+    assert ns.get(".a.link").l is ns.get(".b.y")
+    #- "__type__" classes can't be pickled; that section is parsed in this process
+    assert ns.get(".c").q == 1
+
+def test_parallel_parse_resolves_refs_to_later_sections():
+    ns = NamespaceConfigParser2(workers=2).parse({"a": {"ref": "nsid-ref://.b.y"}, "b": {"y": {}}})
+    assert ns.get(".a").ref is ns.get(".b.y")
+
+def test_parallel_parse_does_not_fork(monkeypatch):
+    import concurrent.futures
+    start_methods = list()
+    class RecordingExecutor(concurrent.futures.ProcessPoolExecutor):
+        def __init__(self, *args, mp_context=None, **kwargs):
+            start_methods.append(mp_context.get_start_method() if mp_context else None)
+            super().__init__(*args, mp_context=mp_context, **kwargs)
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", RecordingExecutor)
+
+    ns = NamespaceConfigParser2(workers=2).parse({"a": {"x": {}}, "b": {"y": {}}})
+    assert ns.get(".b.y")
+    assert start_methods and start_methods[0] in ("forkserver", "spawn")
+
+def _reparse_configs():
+    old = {
+        "targets": {"t0": {"x": 1}, "t1": {"x": 2}},
+        "keep": {"value": 1, "child": {"n": 1}, "ref": "nsid-ref://.targets.t0"},
+        "change": {"value": 1, "gone": 2, "child": {"n": 1}, "other": {"n": 1}},
+        "retype": {"__class__": "thewired.SecondLifeNode", "__init__": {"secondlife": {"a": 1}}, "sub": {}},
+        "removed": {"x": {}},
+    }
+    new = {
+        "targets": {"t0": {"__class__": "thewired.SecondLifeNode", "__init__": {"secondlife": {}}, "x": 3},
+            "t1": {"x": 2}},
+        "keep": {"value": 1, "child": {"n": 1}, "ref": "nsid-ref://.targets.t0"},
+        "change": {"value": 2, "child": {"n": 2}, "other": {"n": 1}, "new": {"m": [1]}, "ref": "nsid-ref://.targets.t1"},
+        "retype": {"__class__": "thewired.SecondLifeNode", "__init__": {"secondlife": {"a": 2}}, "sub": {}},
+        "added": {"y": 1},
+    }
+    return old, new
+
+def test_reparse_matches_parse_and_keeps_identity():
+    old, new = _reparse_configs()
+    parser = NamespaceConfigParser2()
+    ns = parser.parse(old)
+    keep, change, child, other = (ns.get(n) for n in (".keep", ".change", ".change.child", ".change.other"))
+    retype, t1 = ns.get(".retype"), ns.get(".targets.t1")
+
+    assert parser.reparse(old, new) is ns
+    assert _tree(ns) == _tree(NamespaceConfigParser2().parse(new))
+    #- unchanged and changed-in-place nodes are the same objects
+    assert ns.get(".keep") is keep and ns.get(".keep.child") is keep.child
+    assert ns.get(".change") is change and ns.get(".change.child") is child and ns.get(".change.other") is other
+    assert ns.get(".targets.t1") is t1
+    assert change.value == 2 and child.n == 2 and not hasattr(change, "gone")
+    assert change.new.m == [1] and change.ref is t1
+    #- nodes with a new factory or parameters are replaced
+    assert ns.get(".retype") is not retype and ns.get(".retype").a == 2
+    assert not hasattr(ns.root, "removed")
+    assert ns.get(".added").y == 1
+    #- an unchanged nsid-ref follows its replaced target
+    assert isinstance(ns.get(".targets.t0"), SecondLifeNode)
+    assert keep.ref is ns.get(".targets.t0")
+
+def test_reparse_with_prefix():
+    ns = Namespace()
+    ns.add(".under")
+    parser = NamespaceConfigParser2(namespace=ns, fast_build=True)
+    parser.parse({"a": {"x": 1}, "b": {}}, prefix=".under")
+    a = ns.get(".under.a")
+    parser.reparse({"a": {"x": 1}, "b": {}}, {"a": {"x": 2}}, prefix=".under")
+    assert ns.get(".under.a") is a and a.x == 2
+    assert not hasattr(ns.get(".under"), "b")
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from thewired import AddendumFormatter
+from benchmarks.fakeimplementor import FakeImplementor, FakeImplementorError, make_implementors
+
+
+def test_make_implementors():
+    ns, implementors = make_implementors(3, payload_size=4, item_bytes=8)
+    assert [str(i.nsid) for i in implementors] == [
+        ".implementors.implementor0", ".implementors.implementor1", ".implementors.implementor2"]
+    assert list(ns.get_leaf_nodes(".implementors")) == implementors
+
+    items = implementors[0].list_resources(region="here")
+    assert len(items) == 4
+    assert items[0]["params"] == {"region": "here"}
+    assert items[0]["data"] == "x" * 8
+    assert implementors[0].describe_resource("r-1")[0]["params"] == {"resource_id": "r-1"}
+    assert implementors[0].calls == 2
+
+
+def test_latency():
+    _, (implementor,) = make_implementors(1, latency=0.02)
+    start = time.perf_counter()
+    implementor.list_resources()
+    assert time.perf_counter() - start >= 0.02
+
+
+def test_failure_rate():
+    _, (always,) = make_implementors(1, failure_rate=1.0)
+    with pytest.raises(FakeImplementorError):
+        always.list_resources()
+    assert always.failures == 1
+
+    _, (sometimes,) = make_implementors(1, failure_rate=0.5, seed=7)
+    failures = 0
+    for _ in range(200):
+        try:
+            sometimes.list_resources()
+        except FakeImplementorError:
+            failures += 1
+    assert 50 < failures < 150
+    assert sometimes.failures == failures
+
+    with pytest.raises(ValueError):
+        make_implementors(1, failure_rate=2)
+
+
+def test_provide_fan_out():
+    ns, implementors = make_implementors(5, payload_size=2)
+    addendum = [{"__params__": {
+        "defaults": {"method_name": "list_resources", "ids": ["a", "b"], "limit": 10},
+        "prod": {"limit": 500}}}]
+    provider = AddendumFormatter(ns, ".implementors", addendum=addendum, formatter=list)
+
+    results = provider.provide(show_progress=False, _params="prod")
+    assert len(results) == 10
+    assert results[0]["params"] == {"ids": ["a", "b"], "limit": 500}
+    assert all(i.calls == 1 for i in implementors)
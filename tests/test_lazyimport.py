@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+import pytest
+
+import thewired
+import thewired.namespace
+import thewired.provider
+
+
+def run(code):
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+
+
+def test_import_is_lazy():
+    loaded = run("import sys, thewired; print(' '.join(sorted(sys.modules)))")
+    assert "thewired" in loaded
+    assert "thewired.provider" not in loaded
+    assert "thewired.namespaceconfigparser2" not in loaded
+    assert "asyncio" not in loaded
+    assert "typing" not in loaded
+
+
+def test_get_does_not_import_asyncio():
+    loaded = run("import sys, thewired; ns = thewired.Namespace(); ns.add('.a.b'); ns.get('.a.b'); "
+                 "print(' '.join(sorted(sys.modules)))")
+    assert "asyncio" not in loaded
+    assert "thewired.provider" not in loaded
+
+
+def test_public_names():
+    for package in (thewired, thewired.namespace, thewired.provider):
+        for name in package.__all__:
+            assert getattr(package, name) is not None
+            assert name in dir(package)
+    assert thewired.Namespace is thewired.namespace.Namespace
+    from thewired import SecondLifeNode
+    assert SecondLifeNode is thewired.namespace.SecondLifeNode
+
+
+def test_unknown_name():
+    with pytest.raises(AttributeError, match="no_such_name"):
+        thewired.no_such_name
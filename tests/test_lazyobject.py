@@ -0,0 +1,134 @@
+import copy
+import pickle
+import threading
+import time
+from functools import partial
+
+import pytest
+
+from thewired import NamespaceConfigParser2, NamespaceConfigCompiler, LazyObject
+from thewired.lazyobject import is_constructed, unwrap
+
+
+class Client(object):
+    created = 0
+
+    def __init__(self, region="here"):
+        type(self).created += 1
+        self.region = region
+        self.items = [1, 2]
+
+    def __call__(self, x):
+        return (self.region, x)
+
+
+@pytest.fixture(autouse=True)
+def reset_count():
+    Client.created = 0
+
+
+CONFIG = {
+    "clients": {
+        "__class__": "thewired.SecondLifeNode",
+        "__init__": {
+            "secondlife": {},
+            "client": {"__class__": "tests.test_lazyobject.Client", "__init__": {"region": "eu"}},
+        },
+    },
+}
+
+
+def test_constructed_on_first_use():
+    proxy = LazyObject(partial(Client, region="eu"))
+    assert not is_constructed(proxy)
+    assert "not constructed" in repr(proxy)
+    assert Client.created == 0
+
+    assert proxy.region == "eu"
+    assert proxy("x") == ("eu", "x")
+    assert list(proxy.items) == [1, 2]
+    assert not isinstance(proxy, Client)
+    assert is_constructed(proxy)
+    assert isinstance(unwrap(proxy), Client) and type(unwrap(proxy)) is Client
+    proxy.region = "us"
+    assert unwrap(proxy).region == "us"
+    assert Client.created == 1
+
+
+def test_constructed_once_across_threads():
+    def slow():
+        time.sleep(0.01)
+        return Client()
+
+    proxy = LazyObject(slow)
+    seen = list()
+    threads = [threading.Thread(target=lambda: seen.append(unwrap(proxy))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert Client.created == 1
+    assert all(obj is seen[0] for obj in seen)
+
+
+def test_failed_construction_is_retried():
+    attempts = list()
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("no session")
+        return Client()
+
+    proxy = LazyObject(flaky)
+    with pytest.raises(ConnectionError):
+        proxy.region
+    assert proxy.region == "here"
+    assert len(attempts) == 2
+
+
+def test_parser_lazy_init():
+    ns = NamespaceConfigParser2(lazy_init=True).parse(CONFIG)
+    client = ns.get(".clients").client
+    assert type(client) is LazyObject and Client.created == 0
+    assert client.region == "eu" and Client.created == 1
+
+    NamespaceConfigParser2().parse(CONFIG)
+    assert Client.created == 2
+
+
+def test_compiler_lazy_init():
+    namespace = dict()
+    exec(NamespaceConfigCompiler(lazy_init=True).compile(CONFIG), namespace)
+    client = namespace["build"]().get(".clients").client
+    assert type(client) is LazyObject and Client.created == 0
+    assert client.region == "eu" and Client.created == 1
+
+
+def test_not_pickled_and_copied_without_constructing():
+    proxy = LazyObject(Client)
+    with pytest.raises(TypeError):
+        pickle.dumps(proxy)
+    copied, deep = copy.copy(proxy), copy.deepcopy(proxy)
+    assert Client.created == 0
+    assert type(copied) is LazyObject and copied.region == "here"
+    assert unwrap(copied) is not unwrap(proxy)
+    assert deep.items == [1, 2] and unwrap(deep).items is not unwrap(proxy).items
+
+
+def test_parallel_lazy_parse_constructs_nothing():
+    config = dict(CONFIG, more=CONFIG["clients"], other={"x": 1})
+    ns = NamespaceConfigParser2(workers=2, lazy_init=True).parse(config)
+    assert Client.created == 0
+    assert type(ns.get(".more").client) is LazyObject
+
+
+def test_traversal_leaves_proxies_unbuilt():
+    ns = NamespaceConfigParser2(lazy_init=True).parse(CONFIG)
+    client = ns.get(".clients").client
+    assert not isinstance(client, Client)
+    list(ns.get_subnodes("."))
+    list(ns.get_leaf_nodes("."))
+    ns.walk()
+    ns.prefetch(".", "anything")
+    assert Client.created == 0 and not is_constructed(client)
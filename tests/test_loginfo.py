@@ -0,0 +1,51 @@
+import logging
+
+import pytest
+
+from thewired.loginfo import make_log_adapter, enabled_for, LazyFormat
+from thewired.namespace import Namespace
+
+
+@pytest.fixture
+def thewired_logger():
+    logger = logging.getLogger('thewired')
+    saved = logger.level
+    yield logger
+    logger.setLevel(saved)
+
+
+def test_make_log_adapter_is_cached():
+    logger = logging.getLogger('thewired.test')
+    a1 = make_log_adapter(logger, Namespace, 'get')
+    a2 = make_log_adapter(logger, Namespace, 'get')
+    assert a1 is a2
+    assert a1.extra == dict(name_ext='Namespace.get')
+    assert make_log_adapter(logger, None, 'f').extra == dict(name_ext='.f')
+
+
+def test_enabled_for_follows_level_changes(thewired_logger):
+    child = logging.getLogger('thewired.namespace.namespace')
+    thewired_logger.setLevel(logging.WARNING)
+    assert not enabled_for(logging.DEBUG)
+    assert not enabled_for(logging.DEBUG, child)
+    thewired_logger.setLevel(logging.DEBUG)
+    assert enabled_for(logging.DEBUG)
+    assert enabled_for(logging.DEBUG, child)
+
+
+def test_lazy_format_only_evaluated_when_emitted(thewired_logger, caplog):
+    calls = list()
+    def expensive():
+        calls.append(1)
+        return "expensive"
+
+    log = make_log_adapter(logging.getLogger('thewired.test'), None, 'lazy')
+    thewired_logger.setLevel(logging.WARNING)
+    log.debug("value: %s", LazyFormat(expensive))
+    assert calls == []
+
+    thewired_logger.setLevel(logging.DEBUG)
+    with caplog.at_level(logging.DEBUG, logger='thewired'):
+        log.debug("value: %s", LazyFormat(expensive))
+    assert calls
+    assert "value: expensive" in caplog.text
@@ -0,0 +1,48 @@
+from thewired import Namespace, NamespaceConfigParser2, SecondLifeNode
+
+
+def test_memory_report_counts_every_node():
+    ns = Namespace()
+    for n in range(10):
+        ns.add(f".a.n{n}")
+    for n in range(5):
+        ns.add(f".b.n{n}", SecondLifeNode, secondlife=dict(x=1))
+
+    report = ns.memory_report()
+    assert report.nodes == 1 + 2 + 10 + 5
+    assert report.by_type["SecondLifeNode"]["count"] == 5
+    assert report.by_type["NamespaceNodeBase"]["count"] == 13
+    assert set(report.subtrees) == {".a", ".b"}
+    assert report.subtrees[".a"]["nodes"] == 11
+    assert sum(e["bytes"] for e in report.by_type.values()) == report.total_bytes
+    assert report.total_bytes > sum(e["bytes"] for e in report.subtrees.values()) > 0
+
+
+def test_memory_report_of_subtree_and_handle():
+    ns = Namespace()
+    ns.add(".a.b.c")
+    ns.add(".a.d")
+    assert ns.memory_report(".a").nodes == 4
+    handle = ns.get_handle(".a")
+    report = handle.memory_report(".", depth=1)
+    assert report.nodes == 4
+    assert set(report.subtrees) == {".a.b", ".a.d"}
+
+
+def test_memory_report_skips_references():
+    lookup = Namespace()
+    lookup.add(".target")
+    ns = NamespaceConfigParser2(lookup_ns=lookup).parse(dict(a=dict(ref="nsid-ref://.target")))
+    report = ns.memory_report()
+    assert report.nodes == 2
+
+
+def test_memory_report_does_not_construct_lazy_values():
+    from thewired.lazyobject import LazyObject, is_constructed
+    built = list()
+    ns = Namespace()
+    node = ns.add(".a")[-1]
+    node.client = LazyObject(lambda: built.append(1) or object())
+    node.clients = [LazyObject(lambda: built.append(1) or object())]
+    assert ns.memory_report().total_bytes > 0
+    assert not built and not is_constructed(node.client)
@@ -0,0 +1,100 @@
+import pytest
+
+from thewired import metrics
+from thewired.metrics import Histogram, MetricsRegistry, OVERFLOW
+from thewired.namespace import Namespace, SecondLifeNode
+from thewired.provider import AddendumFormatter
+
+
+@pytest.fixture
+def registry():
+    yield metrics.enable(prefix_depth=2)
+    metrics.disable()
+
+
+def test_disabled_by_default():
+    assert not metrics.is_enabled()
+    assert metrics.snapshot() is None
+    assert metrics.prometheus_text() == ''
+    Namespace().add(".a.b")
+
+
+def test_prefix():
+    reg = MetricsRegistry(prefix_depth=2)
+    assert reg.prefix(".") == "."
+    assert reg.prefix(".a") == ".a"
+    assert reg.prefix(".a.b") == ".a.b"
+    assert reg.prefix(".a.b.c.d") == ".a.b"
+
+
+def test_histogram_buckets():
+    hist = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5):
+        hist.observe(value)
+    assert hist.counts == [2, 1, 1]
+    assert hist.cumulative() == [(0.1, 2), (1.0, 3), (float('inf'), 4)]
+    assert hist.count == 4
+
+
+def test_namespace_ops_by_prefix(registry):
+    ns = Namespace()
+    ns.add(".a.b.c")
+    ns.add(".x.y")
+    registry.reset()
+
+    ns.get(".a.b.c")
+    ns.get(".a.b")
+    ns.get(".x.y")
+    ns.remove(".x.y")
+
+    ops = metrics.snapshot()["namespace_ops"]
+    assert ops["get"][".a.b"] == 2
+    assert ops["get"][".x.y"] >= 1
+    assert ops["remove"] == {".x.y": 1}
+
+
+def test_series_are_bounded():
+    reg = MetricsRegistry(prefix_depth=1, max_series=2)
+    for name in "abcde":
+        reg.count_op("get", f".{name}")
+        reg.observe_implementor(name, 0.001)
+    ops = reg.snapshot()["namespace_ops"]["get"]
+    assert ops == {".a": 1, ".b": 1, OVERFLOW: 3}
+    assert len(reg.snapshot()["implementor_latency"]) == 3
+
+
+def test_provider_latency_and_cache_ratio(registry):
+    node = SecondLifeNode(nsid=".a.b.c", namespace=Namespace(), secondlife={"attr": lambda: 1}, cache=True)
+    for _ in range(4):
+        node.attr
+
+    snap = metrics.snapshot()
+    assert snap["provider_latency"][".a.b"]["attr"]["count"] == 1
+    assert snap["cache"][".a.b"] == dict(hit=3, stale=0, miss=1, hit_ratio=0.75)
+
+
+def test_implementor_latency(registry):
+    class Implementor:
+        def things(self):
+            return ["thing"]
+
+    provider = AddendumFormatter(None, Implementor(), addendum=".things()", formatter=list)
+    provider.provide(show_progress=False)
+    provider.provide(show_progress=False)
+    assert metrics.snapshot()["implementor_latency"]["_user_override_"]["count"] == 2
+
+
+def test_write_prometheus(registry, tmp_path):
+    node = SecondLifeNode(nsid=".a", namespace=Namespace(), secondlife={"attr": lambda: 1}, cache=True)
+    node.attr
+    node.attr
+    Namespace().add(".a.b")
+
+    path = tmp_path / "thewired.prom"
+    metrics.write_prometheus(str(path))
+    text = path.read_text()
+    assert '# TYPE thewired_provider_latency_seconds histogram' in text
+    assert 'thewired_provider_latency_seconds_bucket{prefix=".a",attr="attr",le="+Inf"} 1' in text
+    assert 'thewired_cache_hit_ratio{prefix=".a"} 0.5' in text
+    assert 'thewired_namespace_ops_total{op="add",prefix=".a.b"} 1' in text
+    assert list(tmp_path.iterdir()) == [path]
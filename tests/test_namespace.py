@@ -288,3 +288,18 @@ def test_get_leaf_nodes_from_handle():
     leaf_nsids = [str(x.nsid) for x in leaves]
 
     assert leaf_nsids == ['.e.f', '.x.y']
+
+def test_add_walks_ancestry_once():
+    class CountingNamespace(Namespace):
+        gets = 0
+        def get(self, nsid):
+            self.gets += 1
+            return super().get(nsid)
+
+    ns = CountingNamespace()
+    ns.add('.a.b.c.d')
+    created = ns.add('.a.b.c.d.e.f')
+    assert [str(node.nsid) for node in created] == ['.a.b.c.d.e', '.a.b.c.d.e.f']
+    assert ns.get('.a.b.c.d').e is created[0]
+    #- the existing ancestors are found by attribute lookups, not a get() each
+    assert ns.gets == 1
@@ -5,6 +5,7 @@ from thewired.namespace.nsid import Nsid, validate_nsid, is_valid_nsid_str
 from thewired.namespace.nsid import sanitize_nsid, make_child_nsid, get_parent_nsid
 from thewired.namespace.nsid import get_nsid_parts, find_common_prefix, strip_common_prefix
 from thewired.namespace.nsid import list_nsid_segments, get_nsid_ancestry, nsid_basename, get_nsid_from_link
+from thewired.namespace.nsid import iter_nsid_ancestry, cached_nsid_ancestry, split_common_prefix
 from thewired.exceptions import InvalidNsidError
 
 class test_nsid(unittest.TestCase):
@@ -121,6 +122,22 @@ class test_nsid(unittest.TestCase):
         new_ancestry = get_nsid_ancestry(starting_point)
         self.assertEqual(new_ancestry, ['b', 'b.c', 'b.c.d'])
 
+    def test_iter_nsid_ancestry(self):
+        self.assertEqual(list(iter_nsid_ancestry('.a.b.c')), ['.', '.a', '.a.b', '.a.b.c'])
+        self.assertEqual(list(iter_nsid_ancestry('b.c.d')), ['b', 'b.c', 'b.c.d'])
+        self.assertEqual(list(iter_nsid_ancestry('.')), ['.'])
+        self.assertEqual(list(iter_nsid_ancestry(Nsid('.a'))), ['.', '.a'])
+
+    def test_cached_nsid_ancestry(self):
+        ancestry = cached_nsid_ancestry('.a.b.c')
+        self.assertEqual(ancestry, ('.', '.a', '.a.b', '.a.b.c'))
+        self.assertIs(ancestry, cached_nsid_ancestry(Nsid('.a.b.c')))
+
+    def test_split_common_prefix(self):
+        self.assertEqual(('.a.b', 'c.d', 'x'), split_common_prefix('.a.b.c.d', '.a.b.x'))
+        self.assertEqual(('.a.b', '', ''), split_common_prefix('.a.b', '.a.b'))
+        self.assertEqual((None, 'a.b', 'x.y'), split_common_prefix('a.b', 'x.y'))
+
     def test_make_root_nsid(self):
         nsid = Nsid('.')
         self.assertEqual(str(nsid), '.')
@@ -0,0 +1,91 @@
+import math
+import pytest
+
+from thewired.namespace import NsidTrie, Nsid
+from thewired.provider import ProviderMap, Provider
+from thewired.exceptions import ProviderMapLookupError
+
+
+@pytest.fixture
+def trie():
+    return NsidTrie({
+        '.' : 'root',
+        '.a' : 'a',
+        '.a.b.c' : 'c',
+        '.x.y' : 'y',
+    })
+
+
+def test_getitem(trie):
+    assert trie['.a.b.c'] == 'c'
+    assert trie[Nsid('.a')] == 'a'
+    assert trie['.'] == 'root'
+    with pytest.raises(KeyError):
+        trie['.a.b']
+
+def test_contains(trie):
+    assert '.a.b.c' in trie
+    #- intermediate trie levels are not keys
+    assert '.a.b' not in trie
+    assert '.nope' not in trie
+
+def test_len_and_iter(trie):
+    assert len(trie) == 4
+    assert list(trie) == ['.', '.a', '.a.b.c', '.x.y']
+
+def test_delitem_prunes(trie):
+    del trie['.a.b.c']
+    assert '.a.b.c' not in trie
+    assert len(trie) == 3
+    assert trie._root.children[''].children['a'].children == {}
+    with pytest.raises(KeyError):
+        del trie['.a.b.c']
+
+def test_longest_prefix(trie):
+    assert trie.longest_prefix('.a.b.c.d.e') == ('.a.b.c', 'c')
+    assert trie.longest_prefix('.a.b') == ('.a', 'a')
+    assert trie.longest_prefix('.x') == ('.', 'root')
+    assert trie.longest_prefix('.x.y') == ('.x.y', 'y')
+
+def test_longest_prefix_miss():
+    trie = NsidTrie({'a.b': 1})
+    with pytest.raises(KeyError):
+        trie.longest_prefix('x.y')
+
+def test_items_prefix(trie):
+    assert list(trie.items('.a')) == [('.a', 'a'), ('.a.b.c', 'c')]
+    assert list(trie.items('.a.b')) == [('.a.b.c', 'c')]
+    assert list(trie.items('.nope')) == []
+    assert dict(trie.items()) == {'.' : 'root', '.a' : 'a', '.a.b.c' : 'c', '.x.y' : 'y'}
+
+
+class DummyProvider(Provider):
+    def pre_exec_hook(self, *args, **kwargs):
+        pass
+    def post_exec_hook(self, *args, **kwargs):
+        pass
+    def provide(self, request_id=None, **kwargs):
+        return self
+
+
+def test_providermap_exact():
+    p = DummyProvider()
+    pm = ProviderMap({'a.b' : p})
+    assert pm['a.b'] is p
+    with pytest.raises(ProviderMapLookupError):
+        pm['a.b.c']
+
+def test_providermap_fail_to_parent():
+    p = DummyProvider()
+    pm = ProviderMap({'a.b' : p}, fail_to_parent=True, fail_up_height=2)
+    assert pm['a.b.c'] is p
+    assert pm['a.b.c.d'] is p
+    with pytest.raises(ProviderMapLookupError):
+        pm['a.b.c.d.e']
+    with pytest.raises(ProviderMapLookupError):
+        pm['x.y']
+
+def test_providermap_fail_up_infinite():
+    p = DummyProvider()
+    pm = ProviderMap({'a' : p}, fail_to_parent=True, fail_up_height=math.inf)
+    assert pm.get_provider('a.b.c.d.e.f.g') is p
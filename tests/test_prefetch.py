@@ -0,0 +1,102 @@
+import threading
+import time
+from functools import partial
+
+import pytest
+
+from thewired.namespace import Namespace, SecondLifeNode
+from thewired.exceptions import PrefetchError
+
+
+class SlowProvider:
+    def __init__(self, value, delay=0.05):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+        self.threads = set()
+        self.barrier = None
+
+    def __call__(self):
+        self.calls += 1
+        self.threads.add(threading.get_ident())
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        time.sleep(self.delay)
+        return self.value
+
+
+def boom():
+    raise RuntimeError("provider failed")
+
+
+@pytest.fixture
+def report_ns():
+    ns = Namespace()
+    providers = dict()
+    for n in range(8):
+        providers[n] = SlowProvider(n)
+        ns.add(f".report.leaf{n}", partial(SecondLifeNode, secondlife={"size": providers[n], "name": f"leaf{n}"}))
+    ns.add(".report.broken", partial(SecondLifeNode, secondlife={"size": boom}))
+    ns.add(".elsewhere.leaf", partial(SecondLifeNode, secondlife={"size": SlowProvider(-1)}))
+    return ns, providers
+
+
+def test_prefetch_fills_caches(report_ns):
+    ns, providers = report_ns
+    #- only passed once all 8 providers are running at the same time
+    barrier = threading.Barrier(len(providers))
+    for provider in providers.values():
+        provider.barrier = barrier
+    report = ns.prefetch(".report", ["size", "name"], max_workers=8, cache={"ttl": 60})
+
+    assert not barrier.broken
+    assert report.fetched == 8
+    assert list(report.errors) == [(".report.broken", "size")]
+
+    for n, provider in providers.items():
+        assert ns.get(f".report.leaf{n}").size == n
+        assert provider.calls == 1
+
+    assert ns.get(".elsewhere.leaf").cache_info() is None
+
+def test_prefetch_raise_for_errors(report_ns):
+    ns, _ = report_ns
+    report = ns.prefetch(".report", "size", cache=True)
+    assert not report.ok
+    with pytest.raises(PrefetchError) as excinfo:
+        report.raise_for_errors()
+    assert isinstance(excinfo.value.errors[(".report.broken", "size")], RuntimeError)
+
+def test_prefetch_from_handle(report_ns):
+    ns, providers = report_ns
+    handle = ns.get_handle(".report")
+    report = handle.prefetch(".leaf1", "size", cache=True)
+    assert report.fetched == 1
+    assert ns.get(".report.leaf1").size == 1
+    assert providers[1].calls == 1
+
+def test_prefetch_warms_existing_caches_only(report_ns):
+    ns, providers = report_ns
+    cached = SlowProvider("cached")
+    ns.add(".report.cached", partial(SecondLifeNode, secondlife={"size": cached}, cache={"ttl": 60}))
+
+    report = ns.prefetch(".report", "size")
+    assert report.ok
+    assert report.fetched == 1
+    assert cached.calls == 1
+    assert ns.get(".report.cached").size == "cached"
+    assert cached.calls == 1
+
+    for n, provider in providers.items():
+        assert provider.calls == 0
+        assert ns.get(f".report.leaf{n}").cache_info() is None
+
+def test_prefetch_skips_uncached_attributes():
+    ns = Namespace()
+    size, name = SlowProvider(1), SlowProvider("name")
+    sl = {"size": size, "name": name, "__cache__": {"ttl": 60, "attributes": ["size"]}}
+    ns.add(".report.leaf", partial(SecondLifeNode, secondlife=sl))
+
+    report = ns.prefetch(".report", ["size", "name"], cache=True)
+    assert report.fetched == 1
+    assert (size.calls, name.calls) == (1, 0)
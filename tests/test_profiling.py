@@ -0,0 +1,72 @@
+import time
+
+import thewired
+from thewired import spans
+from thewired.namespace import Namespace, SecondLifeNode
+from thewired.provider import AddendumFormatter
+
+
+class Implementor:
+    def things(self):
+        time.sleep(0.002)
+        return ["thing"]
+
+
+def names(prof):
+    return [path for path, _ in prof.walk()]
+
+
+def test_span_is_noop_without_collectors():
+    assert spans.span('namespace', 'get') is spans.span('provider', 'x')
+
+
+def test_profile_provider_call_tree(tmp_path):
+    provider = AddendumFormatter(None, Implementor(), addendum=".things()", formatter=list)
+    path = tmp_path / "out.collapsed"
+    with thewired.profile(str(path)) as prof:
+        provider.provide(show_progress=False)
+        provider.provide(show_progress=False)
+
+    top = prof.root.children["provider:AddendumFormatter"]
+    assert top.count == 2
+    assert set(top.children) == {"addendum:_user_override_", "implementor:_user_override_", "formatter:list"}
+    implementor = top.children["implementor:_user_override_"]
+    assert implementor.count == 2
+    assert implementor.wall >= 0.004
+    assert top.wall >= implementor.wall
+
+    lines = path.read_text().splitlines()
+    assert any(line.startswith("provider:AddendumFormatter;implementor:_user_override_ ") for line in lines)
+    assert all(int(line.rsplit(' ', 1)[1]) > 0 for line in lines)
+
+
+def test_profile_namespace_and_secondlife():
+    ns = Namespace()
+    ns.add(".a.b")
+    node = SecondLifeNode(nsid=".a.b.c", namespace=ns, secondlife={"attr": lambda: ns.get(".a")})
+    with thewired.profile() as prof:
+        node.attr
+    assert ["provider:.a.b.c.attr", "provider:.a.b.c.attr;namespace:get"] == \
+        [';'.join(path) for path in names(prof)]
+    assert "provider:.a.b.c.attr" in prof.report()
+
+
+def test_profile_only_sees_its_block():
+    ns = Namespace()
+    with thewired.profile() as prof:
+        ns.get(".")
+    ns.get(".")
+    assert prof.root.children["namespace:get"].count == 1
+    assert spans._context_collectors.get() == ()
+
+
+def test_nested_profiles():
+    from thewired import profiling
+    ns = Namespace()
+    with thewired.profile() as outer:
+        with spans.span('provider', 'x'):
+            with thewired.profile() as inner:
+                ns.get(".")
+    assert [';'.join(path) for path in names(outer)] == ["provider:x", "provider:x;namespace:get"]
+    assert [';'.join(path) for path in names(inner)] == ["namespace:get"]
+    assert profiling._current_nodes.get() is None
@@ -0,0 +1,125 @@
+import threading
+
+from thewired.namespace import Namespace, SecondLifeNode
+from thewired.refresher import BackgroundRefresher, get_default_refresher, set_default_refresher
+from thewired.ttlcache import TTLCache, MISSING
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+
+def test_ttlcache_get_entry_stale():
+    clock = Clock()
+    cache = TTLCache(ttl=10, stale_ttl=5, timer=clock)
+    cache.set("a", 1)
+    assert cache.get_entry("a") == (1, None)
+
+    clock.now = 12
+    assert cache.get("a", None) is None
+    assert cache.get_entry("a") == (1, 2)
+    assert cache.stale_hits == 1
+
+    clock.now = 15
+    assert cache.get_entry("a") == (MISSING, None)
+    assert len(cache) == 0
+
+def test_ttlcache_jitter():
+    clock = Clock()
+    cache = TTLCache(ttl=100, jitter=0.2, maxsize=None, timer=clock)
+    for n in range(50):
+        cache.set(n, n)
+    expiries = set(expires_at for _, expires_at in cache._data.values())
+    assert len(expiries) > 1
+    assert all(80 <= e <= 120 for e in expiries)
+
+def test_refresher_bounded_queue():
+    running = threading.Event()
+    release = threading.Event()
+
+    def job():
+        running.set()
+        release.wait()
+
+    with BackgroundRefresher(max_queue=2, workers=1) as refresher:
+        assert refresher.submit("running", job)
+        #- the single worker has taken the job off the queue
+        assert running.wait(5)
+        assert refresher.submit("k1", lambda: None)
+        assert not refresher.submit("k1", lambda: None)
+        assert refresher.submit("k2", lambda: None)
+        assert not refresher.submit("k3", lambda: None)
+        release.set()
+        refresher.join()
+        stats = refresher.stats()
+        assert stats["dropped"] == 1
+        assert stats["completed"] == 3
+        assert stats["refresh_latency"]["count"] == 3
+
+def test_refresher_stop():
+    refresher = BackgroundRefresher(workers=2)
+    done = list()
+    assert refresher.submit("a", done.append, 1)
+    threads = list(refresher._threads)
+    refresher.stop(timeout=5)
+    assert done == [1]
+    assert not any(thread.is_alive() for thread in threads)
+    assert refresher._threads == []
+
+    #- usable again
+    assert refresher.submit("b", done.append, 2)
+    refresher.join()
+    assert done == [1, 2]
+    refresher.stop(timeout=5)
+
+def test_set_default_refresher_stops_old():
+    old_refresher = get_default_refresher()
+    replaced = BackgroundRefresher(workers=1)
+    set_default_refresher(replaced)
+    try:
+        assert replaced.submit("a", lambda: None)
+        threads = list(replaced._threads)
+        set_default_refresher(BackgroundRefresher(workers=1))
+        assert not any(thread.is_alive() for thread in threads)
+    finally:
+        set_default_refresher(old_refresher)
+
+def test_stale_while_revalidate():
+    clock = Clock()
+    values = iter(range(100))
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_provider():
+        value = next(values)
+        if value > 0:
+            started.set()
+            release.wait()
+        return value
+
+    refresher = BackgroundRefresher()
+    old_refresher = get_default_refresher()
+    set_default_refresher(refresher)
+    try:
+        cache = TTLCache(ttl=10, stale_ttl=60, timer=clock)
+        node = SecondLifeNode(nsid=".a", namespace=Namespace(), secondlife={"attr": slow_provider}, cache=cache)
+        assert node.attr == 0
+
+        clock.now = 15
+        #- stale value comes back immediately while the provider is still running
+        assert node.attr == 0
+        assert started.wait(1)
+        assert node.attr == 0
+        release.set()
+        refresher.join()
+        assert node.attr == 1
+
+        stats = refresher.stats()
+        assert stats["submitted"] == 1
+        assert stats["staleness_age"]["max"] == 5
+    finally:
+        #- stops refresher
+        set_default_refresher(old_refresher)
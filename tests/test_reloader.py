@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from thewired import metrics, NamespaceRef, ConfigReloader
+
+
+def write(path, n, bump=0):
+    path.write_text(json.dumps({"a": {"v": n}, "b": {"v": n}}))
+    #- make sure the mtime moves even on coarse-grained filesystems
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump * 10**9))
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def registry():
+    yield metrics.enable()
+    metrics.disable()
+
+
+def test_reload_publishes_new_namespace(tmp_path):
+    path = tmp_path / "config.json"
+    write(path, 1)
+    reloader = ConfigReloader(str(path), interval=0.01, debounce=0.05)
+    with reloader:
+        first = reloader.ref.current
+        assert first.get(".a").v == 1
+        write(path, 2, bump=1)
+        assert wait_for(lambda: reloader.ref.get(".a").v == 2)
+    assert reloader.ref.current is not first
+    assert reloader.ref.version == 2
+    assert reloader.reloads == 2
+
+
+def test_failed_reload_keeps_namespace(tmp_path, registry):
+    path = tmp_path / "config.json"
+    write(path, 1)
+    reloader = ConfigReloader(str(path)).start()
+    reloader.stop()
+    current = reloader.ref.current
+
+    path.write_text("{not json")
+    assert reloader.reload() is False
+    assert reloader.ref.current is current
+    assert isinstance(reloader.last_error, ValueError)
+    assert metrics.snapshot()["reloads"][str(path)] == {"ok": 1, "error": 1}
+    assert 'thewired_config_reloads_total{source="%s",result="error"} 1' % path in metrics.prometheus_text()
+    #- the broken files are not retried until they change again
+    assert reloader.check() is False
+
+
+def test_first_load_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ConfigReloader(str(tmp_path / "missing.json")).start()
+
+
+def test_readers_never_see_a_mix(tmp_path):
+    path = tmp_path / "config.json"
+    write(path, 0)
+    reloader = ConfigReloader(str(path))
+    reloader.start()
+    reloader.stop()
+    ref = reloader.ref
+    mixed = list()
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            ns = ref.current
+            a, b = ns.get(".a").v, ns.get(".b").v
+            if a != b:
+                mixed.append((a, b))
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for thread in readers:
+        thread.start()
+    for n in range(1, 10):
+        write(path, n)
+        assert reloader.reload()
+    done.set()
+    for thread in readers:
+        thread.join()
+    assert not mixed
+    assert ref.get(".a").v == 9
+
+
+def test_namespace_ref_swap():
+    ref = NamespaceRef()
+    assert ref.current is None and ref.version == 0
+    assert ref.swap("ns") is None
+    assert ref.swap("ns2") == "ns"
+    assert ref.version == 2
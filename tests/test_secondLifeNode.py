@@ -1,7 +1,11 @@
+import asyncio
 import pytest
 
-from thewired.namespace import SecondLifeNode, Namespace, CallableDelegateNode
+from thewired.namespace import SecondLifeNode, CallableSecondLifeNode, Namespace, CallableDelegateNode
 from functools import partial
+from thewired.ttlcache import TTLCache
+from thewired.exceptions import SecondLifeError, SecondLifeNsLookupError, NamespaceLookupError
+from thewired.namespace.nsid import get_nsid_from_link, is_valid_nsid_link
 
 @pytest.fixture
 def mock_attribute_map():
@@ -63,3 +67,264 @@ def test_lookup_ns_callable():
     lookup_ns.add('.x.y', y_factory)
     assert str(ns.root.a.b.c.d.e.foo.nsid) == ".x.y"
     assert ns.root.a.b.c.d.e.foo() == "Tusks' Dissolve is a great album"
+
+
+class CountingProvider:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls
+
+
+def test_no_cache_by_default():
+    provider = CountingProvider()
+    node = SecondLifeNode(nsid=".a", namespace=NS, secondlife={"attr": provider})
+    assert node.attr == 1
+    assert node.attr == 2
+    assert node.cache_info() is None
+
+def test_cache_constructor_arg():
+    provider = CountingProvider()
+    node = SecondLifeNode(nsid=".a", namespace=NS, secondlife={"attr": provider}, cache={"ttl": 60})
+    assert node.attr == 1
+    assert node.attr == 1
+    info = node.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+    node.invalidate("attr")
+    assert node.attr == 2
+    node.invalidate_all()
+    assert node.attr == 3
+
+def test_cache_metadata():
+    provider = CountingProvider()
+    uncached = CountingProvider()
+    sl = {
+        "attr" : provider,
+        "other" : uncached,
+        "__cache__" : {"ttl": 60, "maxsize": 4, "attributes": ["attr"]},
+    }
+    node = SecondLifeNode(nsid=".a", namespace=NS, secondlife=sl)
+    assert "__cache__" not in node._secondlife
+    assert node.attr == 1
+    assert node.attr == 1
+    assert node.other == 1
+    assert node.other == 2
+
+def test_cache_ttl_expiry():
+    now = [0.0]
+    provider = CountingProvider()
+    cache = TTLCache(ttl=5, timer=lambda: now[0])
+    node = SecondLifeNode(nsid=".a", namespace=NS, secondlife={"attr": provider}, cache=cache)
+    assert node.attr == 1
+    now[0] = 4.9
+    assert node.attr == 1
+    now[0] = 5.0
+    assert node.attr == 2
+
+def test_cache_maxsize():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+
+
+class CountingNamespace(Namespace):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gets = 0
+
+    def get(self, nsid):
+        self.gets += 1
+        return super().get(nsid)
+
+
+def test_link_resolved_once():
+    ns = Namespace()
+    lookup_ns = CountingNamespace()
+    lookup_ns.add('.x.y.z')
+    lookup_ns.gets = 0
+    node = SecondLifeNode(nsid=".a", namespace=ns, secondlife_ns=lookup_ns, secondlife={"foo": "nsid://.x.y.z"})
+
+    target = node.foo
+    assert str(target.nsid) == ".x.y.z"
+    assert node.foo is target
+    assert node.foo is target
+    assert lookup_ns.gets == 1
+
+def test_link_invalidated_on_target_replace():
+    ns = Namespace()
+    lookup_ns = CountingNamespace()
+    lookup_ns.add('.x.y.z')
+    node = SecondLifeNode(nsid=".a", namespace=ns, secondlife_ns=lookup_ns, secondlife={"foo": "nsid://.x.y.z"})
+    old_target = node.foo
+
+    lookup_ns.remove('.x.y.z')
+    new_target = lookup_ns.add('.x.y.z')[-1]
+    assert node.foo is new_target
+    assert node.foo is not old_target
+
+def test_link_invalidated_on_ancestor_remove():
+    ns = Namespace()
+    lookup_ns = Namespace()
+    lookup_ns.add('.x.y.z')
+    node = SecondLifeNode(nsid=".a", namespace=ns, secondlife_ns=lookup_ns, secondlife={"foo": "nsid://.x.y.z"})
+    node.foo
+
+    lookup_ns.remove('.x')
+    with pytest.raises(SecondLifeNsLookupError):
+        node.foo
+
+def test_link_kept_on_unrelated_remove():
+    ns = Namespace()
+    lookup_ns = CountingNamespace()
+    lookup_ns.add('.x.y.z')
+    lookup_ns.add('.x.other')
+    lookup_ns.gets = 0
+    node = SecondLifeNode(nsid=".a", namespace=ns, secondlife_ns=lookup_ns, secondlife={"foo": "nsid://.x.y.z"})
+    target = node.foo
+
+    lookup_ns.remove('.x.other')
+    lookup_ns.gets = 0
+    assert node.foo is target
+    assert lookup_ns.gets == 0
+
+def test_link_through_handle():
+    ns = Namespace()
+    lookup_ns = Namespace()
+    lookup_ns.add('.x.y.z')
+    handle = lookup_ns.get_handle('.x')
+    node = SecondLifeNode(nsid=".a", namespace=ns, secondlife_ns=handle, secondlife={"foo": "nsid://.y.z"})
+    target = node.foo
+    assert str(target.nsid) == ".y.z"
+    assert node.foo is target
+
+    lookup_ns.remove('.x.y')
+    with pytest.raises(SecondLifeNsLookupError):
+        node.foo
+
+class RefFollowingNamespace(Namespace):
+    #- follows node valued attributes, e.g. set from nsid-ref:// values, along the path
+    def get(self, nsid):
+        node = self.root
+        nsid = str(get_nsid_from_link(nsid) if is_valid_nsid_link(nsid) else nsid)
+        for segment in filter(None, nsid.split('.')):
+            try:
+                node = getattr(node, segment)
+            except AttributeError as err:
+                raise NamespaceLookupError(nsid) from err
+        return node
+
+def test_link_through_nsid_ref_invalidated():
+    ns = Namespace()
+    lookup_ns = RefFollowingNamespace()
+    lookup_ns.add('.x.y.z')
+    #- as an nsid-ref:// value would: the target's own nsid is .x.y.z
+    lookup_ns.root.alias = lookup_ns.get('.x')
+    node = SecondLifeNode(nsid=".a", namespace=ns, secondlife_ns=lookup_ns, secondlife={"foo": "nsid://.alias.y.z"})
+    old_target = node.foo
+    assert str(old_target.nsid) == ".x.y.z"
+
+    lookup_ns.remove('.alias')
+    with pytest.raises(SecondLifeNsLookupError):
+        node.foo
+
+def test_dead_removal_listeners_pruned():
+    import gc
+    ns = Namespace()
+    lookup_ns = Namespace()
+    lookup_ns.add('.x.y.z')
+    node = SecondLifeNode(nsid=".a", namespace=ns, secondlife_ns=lookup_ns, secondlife={"foo": "nsid://.x.y.z"})
+    node.foo
+    assert '.x.y.z' in lookup_ns._removal_listeners
+
+    del node
+    gc.collect()
+    lookup_ns.add('.x.other')
+    lookup_ns.add_removal_listener('.x.other', lambda nsid: None)
+    assert '.x.y.z' not in lookup_ns._removal_listeners
+
+
+def test_async_provider_aget():
+    async def provider():
+        await asyncio.sleep(0)
+        return "async value"
+
+    node = SecondLifeNode(nsid=".a", namespace=NS, secondlife={"attr": provider, "sync": lambda: "sync value", "raw": 5})
+
+    async def main():
+        return await node.aget("attr"), await node.aget("sync"), await node.aget("raw"), await node.aget("nsid")
+
+    value, sync_value, raw, nsid = asyncio.run(main())
+    assert (value, sync_value, raw) == ("async value", "sync value", 5)
+    assert str(nsid) == ".a"
+
+def test_async_provider_sync_access():
+    async def provider():
+        return "async value"
+
+    node = SecondLifeNode(nsid=".a", namespace=NS, secondlife={"attr": provider})
+    assert node.attr == "async value"
+
+    async def main():
+        return node.attr
+
+    with pytest.raises(SecondLifeError):
+        asyncio.run(main())
+
+def test_async_provider_cached():
+    calls = list()
+    async def provider():
+        calls.append(1)
+        return len(calls)
+
+    node = SecondLifeNode(nsid=".a", namespace=NS, secondlife={"attr": provider}, cache=True)
+
+    async def main():
+        return [await node.aget("attr") for _ in range(3)]
+
+    assert asyncio.run(main()) == [1, 1, 1]
+
+def test_async_acall():
+    async def provider(x, y=1):
+        return x + y
+
+    node = CallableSecondLifeNode(nsid=".a", namespace=NS, secondlife={"__call__": provider})
+    assert asyncio.run(node.acall(1, y=2)) == 3
+    assert node(4) == 5
+
+def test_agather():
+    ns = Namespace()
+    in_flight = [0, 0]
+
+    def make_provider(n):
+        async def provider():
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+            await asyncio.sleep(0.01)
+            in_flight[0] -= 1
+            return n
+        return provider
+
+    nsids = [f".nodes.n{n}" for n in range(10)]
+    for n, nsid in enumerate(nsids):
+        ns.add(nsid, partial(SecondLifeNode, secondlife={"value": make_provider(n)}))
+    ns.add(".plain").pop().value = "plain"
+
+    values = asyncio.run(ns.agather(nsids + [".plain"], "value", max_concurrency=3))
+    assert values == list(range(10)) + ["plain"]
+    assert in_flight[1] == 3
+
+
+def test_secondlife_node_pickles():
+    import pickle
+    node = SecondLifeNode(nsid=".a", namespace=None, secondlife={"static": 1, "link": "nsid://.b"})
+    copy = pickle.loads(pickle.dumps(node))
+    assert copy.static == 1
+    assert copy._secondlife == node._secondlife
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from thewired.namespace import Namespace, SecondLifeNode
+from thewired.provider import AddendumFormatter
+from thewired.singleflight import SingleFlight
+
+
+class SlowCounter:
+    def __init__(self, delay=0.05, fail=False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("failed")
+        return "value"
+
+
+def run_in_threads(func, n=20):
+    barrier = threading.Barrier(n)
+    def worker():
+        barrier.wait()
+        return func()
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        futures = [pool.submit(worker) for _ in range(n)]
+    return futures
+
+
+def test_do_coalesces():
+    flights = SingleFlight()
+    counter = SlowCounter()
+    futures = run_in_threads(lambda: flights.do("key", counter))
+    assert [f.result() for f in futures] == ["value"] * 20
+    assert counter.calls == 1
+    assert flights.in_flight() == 0
+
+def test_do_shares_exception():
+    flights = SingleFlight()
+    counter = SlowCounter(fail=True)
+    futures = run_in_threads(lambda: flights.do("key", counter))
+    assert all(isinstance(f.exception(), RuntimeError) for f in futures)
+    assert counter.calls == 1
+
+def test_do_new_flight_after_completion():
+    flights = SingleFlight()
+    counter = SlowCounter(delay=0)
+    flights.do("key", counter)
+    flights.do("key", counter)
+    assert counter.calls == 2
+
+def test_ado_coalesces():
+    flights = SingleFlight()
+    calls = list()
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def main():
+        return await asyncio.gather(*[flights.ado("key", fetch) for _ in range(10)])
+
+    assert asyncio.run(main()) == ["value"] * 10
+    assert len(calls) == 1
+
+def test_secondlife_coalesce_threads():
+    counter = SlowCounter()
+    node = SecondLifeNode(nsid=".a", namespace=Namespace(), secondlife={"attr": counter, "__coalesce__": True})
+    futures = run_in_threads(lambda: node.attr)
+    assert [f.result() for f in futures] == ["value"] * 20
+    assert counter.calls == 1
+
+def test_secondlife_coalesce_with_cache():
+    counter = SlowCounter()
+    node = SecondLifeNode(nsid=".a", namespace=Namespace(), secondlife={"attr": counter}, cache=True, coalesce=True)
+    run_in_threads(lambda: node.attr)
+    assert node.attr == "value"
+    assert counter.calls == 1
+
+def test_secondlife_coalesce_async():
+    calls = list()
+    async def provider():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    node = SecondLifeNode(nsid=".a", namespace=Namespace(), secondlife={"attr": provider}, coalesce=True)
+
+    async def main():
+        return await asyncio.gather(*[node.aget("attr") for _ in range(10)])
+
+    assert asyncio.run(main()) == ["value"] * 10
+    assert len(calls) == 1
+
+def test_secondlife_no_coalesce_by_default():
+    counter = SlowCounter(delay=0.01)
+    node = SecondLifeNode(nsid=".a", namespace=Namespace(), secondlife={"attr": counter})
+    run_in_threads(lambda: node.attr, n=5)
+    assert counter.calls == 5
+
+
+class Implementor:
+    def __init__(self):
+        self.counter = SlowCounter()
+
+    def list_things(self):
+        self.counter()
+        return ["thing"]
+
+
+def test_addendumformatter_coalesce():
+    implementor = Implementor()
+    provider = AddendumFormatter(None, implementor, addendum=".list_things()", formatter=list, coalesce=True)
+    futures = run_in_threads(lambda: provider.provide(show_progress=False), n=10)
+    assert [f.result() for f in futures] == [["thing"]] * 10
+    assert implementor.counter.calls == 1
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import logging
+import threading
+
+from thewired import NamespaceConfigParser2
+from thewired.loginfo import RequestIdFilter
+from thewired.namespace import Namespace, SecondLifeNode
+from thewired.provider import AddendumFormatter
+from thewired.spans import current_request_id, request_context
+from thewired.tracing import ChromeTracer, trace
+
+
+class Implementor:
+    def __init__(self):
+        self.seen = list()
+
+    def things(self):
+        self.seen.append(current_request_id())
+        return ["thing"]
+
+
+def test_request_context_nesting():
+    assert current_request_id() is None
+    with request_context("outer"):
+        with request_context(None):
+            assert current_request_id() == "outer"
+        with request_context("inner"):
+            assert current_request_id() == "inner"
+        assert current_request_id() == "outer"
+    assert current_request_id() is None
+
+
+def test_provide_sets_request_id():
+    implementor = Implementor()
+    provider = AddendumFormatter(None, implementor, addendum=".things()", formatter=list)
+    provider.provide(request_id="req-1", show_progress=False)
+    provider(show_progress=False)
+    assert implementor.seen == ["req-1", None]
+
+
+def test_request_id_reaches_executor_providers():
+    seen = list()
+    node = SecondLifeNode(nsid=".a", namespace=Namespace(), secondlife={"attr": lambda: seen.append(current_request_id())})
+
+    async def main():
+        with request_context("req-async"):
+            await node.aget("attr")
+
+    asyncio.run(main())
+    assert seen == ["req-async"]
+
+
+def test_trace_provide(tmp_path):
+    provider = AddendumFormatter(None, Implementor(), addendum=".things()", formatter=list)
+    path = tmp_path / "trace.json"
+    with trace(str(path), request_id="req-2"):
+        provider.provide(request_id="req-1", show_progress=False)
+        provider.provide(request_id="req-2", show_progress=False)
+
+    events = json.loads(path.read_text())["traceEvents"]
+    assert {e["cat"] for e in events} == {"provider", "addendum", "implementor", "formatter"}
+    assert all(e["ph"] == "X" and e["args"]["request_id"] == "req-2" for e in events)
+    provide = [e for e in events if e["cat"] == "provider"][0]
+    implementor = [e for e in events if e["cat"] == "implementor"][0]
+    assert provide["ts"] <= implementor["ts"]
+    assert implementor["ts"] + implementor["dur"] <= provide["ts"] + provide["dur"]
+
+
+def test_trace_parse():
+    with trace() as tracer:
+        NamespaceConfigParser2().parse(dict(a=dict(b=dict(c=1))))
+    parses = [e["name"] for e in tracer.events() if e["cat"] == "parse"]
+    assert parses == [".a.b", ".a", "."]
+
+
+def test_global_tracer_sees_other_threads():
+    tracer = ChromeTracer()
+    ns = Namespace()
+    tracer.start()
+    try:
+        thread = threading.Thread(target=ns.get, args=(".",))
+        thread.start()
+        thread.join()
+    finally:
+        tracer.stop()
+    ns.get(".")
+    assert [e["tid"] for e in tracer.events()] == [thread.ident]
+
+
+def test_trace_is_bounded():
+    ns = Namespace()
+    with trace(max_events=2) as tracer:
+        for _ in range(5):
+            ns.get(".")
+    assert len(tracer.events()) == 2
+    assert tracer.dropped == 3
+
+
+def test_request_id_filter():
+    record = logging.LogRecord("thewired", logging.INFO, __file__, 1, "msg", None, None)
+    with request_context("req-3"):
+        RequestIdFilter().filter(record)
+    assert record.request_id == "req-3"
@@ -1,14 +1,53 @@
 __version__ = "0.0.2"
 
+#- public names are imported on first use (see thewired.util.lazy_attributes), so that
+#- `import thewired` stays cheap for short-lived processes
+from thewired.util import lazy_attributes
 
-from .filteredcollection import FilteredCollection
-from thewired.provider import Provider, get_provider_classes
-from thewired.provider import AddendumFormatter, ParametizedCall, ProviderMap
-from .namespace import Namespace
-from .namespace import NamespaceNode
-from .namespace import NamespaceNodeBase, SecondLifeNode, DelegateNode, CallableDelegateNode, HandleNode
-from .namespace import CallableSecondLifeNode, Nsid
-from .namespaceconfigparser import NamespaceConfigParser
-from .namespaceconfigparser2 import NamespaceConfigParser2
-from .nsidchainmap import NsidChainMap
-from .exceptions import NamespaceLookupError, NamespaceConfigParsingError
+_lazy_names = {
+    'FilteredCollection': '.filteredcollection',
+    'Provider': '.provider',
+    'get_provider_classes': '.provider',
+    'AddendumFormatter': '.provider',
+    'ParametizedCall': '.provider',
+    'ProviderMap': '.provider',
+    'Namespace': '.namespace',
+    'NamespaceNode': '.namespace',
+    'NamespaceNodeBase': '.namespace',
+    'SecondLifeNode': '.namespace',
+    'DelegateNode': '.namespace',
+    'CallableDelegateNode': '.namespace',
+    'HandleNode': '.namespace',
+    'CallableSecondLifeNode': '.namespace',
+    'Nsid': '.namespace',
+    'NamespaceConfigParser': '.namespaceconfigparser',
+    'NamespaceConfigParser2': '.namespaceconfigparser2',
+    'NamespaceConfigCompiler': '.configcompiler',
+    'NamespaceRef': '.reloader',
+    'ConfigReloader': '.reloader',
+    'LazyObject': '.lazyobject',
+    'NsidChainMap': '.nsidchainmap',
+    'NamespaceLookupError': '.exceptions',
+    'NamespaceConfigParsingError': '.exceptions',
+    'profile': '.profiling',
+}
+
+__all__ = list(_lazy_names)
+__getattr__, __dir__ = lazy_attributes(__name__, _lazy_names)
+
+if False:  # typing.TYPE_CHECKING
+    from .filteredcollection import FilteredCollection
+    from thewired.provider import Provider, get_provider_classes
+    from thewired.provider import AddendumFormatter, ParametizedCall, ProviderMap
+    from .namespace import Namespace
+    from .namespace import NamespaceNode
+    from .namespace import NamespaceNodeBase, SecondLifeNode, DelegateNode, CallableDelegateNode, HandleNode
+    from .namespace import CallableSecondLifeNode, Nsid
+    from .namespaceconfigparser import NamespaceConfigParser
+    from .namespaceconfigparser2 import NamespaceConfigParser2
+    from .configcompiler import NamespaceConfigCompiler
+    from .reloader import NamespaceRef, ConfigReloader
+    from .lazyobject import LazyObject
+    from .nsidchainmap import NsidChainMap
+    from .exceptions import NamespaceLookupError, NamespaceConfigParsingError
+    from .profiling import profile
@@ -0,0 +1,341 @@
+"""
+Purpose:
+    compile a namespace config, as consumed by NamespaceConfigParser2, into a Python module
+    that builds the same Namespace when imported, without parsing anything:
+
+        from thewired.configcompiler import NamespaceConfigCompiler
+        NamespaceConfigCompiler().write(config, 'mynamespace.py')
+
+        import mynamespace
+        ns = mynamespace.build()
+
+    the meta keys are interpreted at compile time: "__class__" factories are resolved to
+    imports, "__type__" classes are created once at module level and every NSID is computed
+    up front. nsid-ref:// values are still looked up when build() runs, in its lookup
+    namespace. Python's bytecode cache makes loading the module a plain import.
+
+    the module records config_hash() of the config it was compiled from (CONFIG_HASH) and
+    the compiler version (COMPILER_VERSION); is_stale() tells whether it must be compiled
+    again.
+
+Notes:
+    values have to survive repr() -> Python source: mappings, lists, tuples, sets, strings,
+    numbers, booleans and None. Keys have to be plain NSID segments. Anything else raises
+    NamespaceConfigParsingError
+"""
+
+import keyword
+from collections.abc import Mapping
+from functools import partial
+from importlib import import_module
+from logging import getLogger, DEBUG
+from typing import Dict, List, Union
+
+from thewired.exceptions import NamespaceConfigParsingError, NamespaceCollisionError
+from thewired import metrics as _metrics
+from thewired.loginfo import make_log_adapter, enabled_for
+from thewired.namespace import nsid
+from thewired.namespace import NamespaceNodeBase, SecondLifeNode
+
+logger = getLogger(__name__)
+
+#- bump when the generated code changes, so that modules from older compilers are stale
+COMPILER_VERSION = 1
+
+
+
+def config_hash(dictConfig: Mapping) -> str:
+    """
+    Output:
+        sha256 hex digest of <dictConfig>; independent of mapping order
+    """
+    import hashlib
+    import json
+    text = json.dumps(dictConfig, sort_keys=True, separators=(',', ':'), default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+
+def is_stale(module, dictConfig: Mapping) -> bool:
+    """
+    Description:
+        tell whether a generated module was compiled from something other than <dictConfig>,
+        or by another version of the compiler
+    Input:
+        module: the imported generated module
+        dictConfig: the current config
+    """
+    return getattr(module, 'COMPILER_VERSION', None) != COMPILER_VERSION or \
+        getattr(module, 'CONFIG_HASH', None) != config_hash(dictConfig)
+
+
+
+def _add_child(ns, parent, key, child_nsid, factory, params):
+    """
+    Description:
+        runtime helper of generated modules: create one node and set it on its parent, the
+        way NamespaceConfigParser2 does
+    """
+    if isinstance(vars(parent).get(key), NamespaceNodeBase):
+        raise NamespaceCollisionError(f'A node with the nsid "{child_nsid}" already exists in the namespace.')
+    registry = _metrics.registry
+    if registry is not None:
+        registry.count_op('add', child_nsid)
+    child = factory(nsid=nsid.Nsid.trusted(child_nsid), namespace=ns, **params)
+    setattr(parent, key, child)
+    return child
+
+
+
+def _relink(ns, lookup_ns, node, secondlife):
+    """
+    Description:
+        runtime helper of generated modules: replace <node> with a SecondLifeNode resolving
+        the nsid:// link in <secondlife>, the way NamespaceConfigParser2 does
+    """
+    factory = partial(SecondLifeNode,
+            nsid=node.nsid,
+            namespace=ns,
+            secondlife_ns=lookup_ns,
+            secondlife=secondlife)
+    ns.remove(str(node.nsid))
+    return ns.add(node.nsid, factory)[-1]
+
+
+
+class NamespaceConfigCompiler(object):
+    """
+    Description:
+        turns a config into the source of a module that builds its Namespace (see module docstring)
+    """
+    def __init__(self, node_factory: type=NamespaceNodeBase, lazy_init: bool=False):
+        """
+        Input:
+            node_factory: factory of nodes without a "__class__" or "__type__", as in
+                NamespaceConfigParser2; must be importable by name
+            lazy_init: as in NamespaceConfigParser2: build() passes LazyObjects for the
+                objects declared in "__init__" blocks instead of constructing them
+        """
+        #- resolves factories exactly like the parser does
+        from thewired.namespaceconfigparser2 import NamespaceConfigParser2
+        self._parser = NamespaceConfigParser2(node_factory=node_factory)
+        self.default_node_factory = node_factory
+        self.lazy_init = lazy_init
+        self.meta_keys = self._parser.meta_keys
+
+
+
+    def compile(self, dictConfig: Mapping, prefix: str='') -> str:
+        """
+        Description:
+            generate the module source for <dictConfig>
+        Input:
+            dictConfig: the config
+            prefix: NSID build() adds the config under, like NamespaceConfigParser2.parse(prefix=)
+        Output:
+            Python source of the module
+        """
+        log = make_log_adapter(logger, self.__class__, 'compile')
+        debug = enabled_for(DEBUG, logger)
+
+        #- per compile: symbol name for each imported class and module level dynamic type
+        self._imports: Dict[type, str] = dict()
+        self._types: Dict[type, str] = dict()
+        self._type_defs: List[str] = list()
+
+        root = prefix in ('', '.')
+        body = ['    n0 = ns.root' if root else f'    n0 = ns.get({str(prefix)!r})']
+        self._compile_node(dictConfig, '' if root else str(prefix), 0, body)
+        if debug:
+            log.debug(f"{len(body)} statements, {len(self._imports)} imports, {len(self._type_defs)} types")
+
+        lines = [
+            '"""',
+            'generated by thewired.configcompiler from a namespace config; do not edit',
+            '',
+            'build() returns the Namespace; is_stale() from thewired.configcompiler tells whether',
+            'the config has changed since',
+            '"""',
+            'from thewired.namespace import Namespace',
+            'from thewired.configcompiler import _add_child, _relink',
+        ]
+        if self.lazy_init:
+            lines.extend(['from functools import partial', 'from thewired.lazyobject import LazyObject'])
+        for cls, name in self._imports.items():
+            lines.append(f'from {cls.__module__} import {cls.__qualname__} as {name}')
+        lines.extend([
+            '',
+            f'CONFIG_HASH = {config_hash(dictConfig)!r}',
+            f'COMPILER_VERSION = {COMPILER_VERSION!r}',
+            f'PREFIX = {str(prefix)!r}',
+            '',
+        ])
+        lines.extend(self._type_defs)
+        lines.extend([
+            '',
+            '',
+            'def build(namespace=None, lookup_ns=None):',
+            '    """',
+            '    Input:',
+            '        namespace: Namespace to add the nodes to; a new one if not given',
+            '        lookup_ns: where nsid-ref:// and nsid:// values are looked up; <namespace> if not given',
+            '    Output:',
+            '        the namespace',
+            '    """',
+            '    ns = namespace if namespace is not None else Namespace()',
+            '    lookup_ns = lookup_ns if lookup_ns is not None else ns',
+        ])
+        lines.extend(body)
+        lines.extend(['    return ns', ''])
+        return '\n'.join(lines)
+
+
+
+    def write(self, dictConfig: Mapping, path: str, prefix: str='') -> str:
+        """
+        Description:
+            compile <dictConfig>, write the module to <path> and byte-compile it, so that even
+            the first import (or one with PYTHONDONTWRITEBYTECODE set) loads bytecode
+        Output:
+            the module source
+        """
+        import py_compile
+        source = self.compile(dictConfig, prefix)
+        with open(path, 'w') as f:
+            f.write(source)
+        py_compile.compile(path, doraise=True)
+        return source
+
+
+
+    def _compile_node(self, dictConfig: Mapping, node_nsid: str, depth: int, body: List[str]) -> None:
+        """
+        Description:
+            append the statements that add what <dictConfig> describes to the node held in
+            local n<depth>, mirroring NamespaceConfigParser2._build()
+        """
+        node = f'n{depth}'
+        indent = '    '
+        for key in list(dictConfig.keys()):
+            if key in self.meta_keys:
+                continue
+            value = dictConfig[key]
+            if not (isinstance(key, str) and key.isidentifier()):
+                raise NamespaceConfigParsingError(f"can't compile {key!r} under {node_nsid or '.'}: not a plain NSID segment")
+
+            if isinstance(value, Mapping):
+                child_nsid = f'{node_nsid}.{key}'
+                params = self._params(value)
+                child = f'n{depth + 1}'
+                body.append(f'{indent}{child} = _add_child(ns, {node}, {key!r}, {child_nsid!r}, '
+                    f'{self._factory(value, self.default_node_factory)}, {params})')
+                self._compile_node(value, child_nsid, depth + 1, body)
+
+            elif isinstance(value, str) and nsid.is_valid_nsid_ref(value):
+                body.append(f'{indent}{self._target(node, key)} = lookup_ns.get({nsid.get_nsid_from_ref(value)!r})')
+
+            elif isinstance(value, str) and nsid.is_valid_nsid_link(value):
+                body.append(f'{indent}{node} = _relink(ns, lookup_ns, {node}, {{{key!r}: {value!r}}})')
+
+            elif not isinstance(value, str):
+                #- like the parser, other strings are not set
+                body.append(f'{indent}{self._target(node, key)} = {self._literal(value, key)}')
+
+
+
+    def _target(self, node: str, key: str) -> str:
+        if keyword.iskeyword(key):
+            #- e.g. "class": can't be written as an attribute
+            return f'vars({node})[{key!r}]'
+        return f'{node}.{key}'
+
+
+
+    def _params(self, dictConfig: Mapping) -> str:
+        """
+        Output:
+            source of the factory keyword argument dict, as _parse_meta_factory_function_params()
+            would build it; nested objects are constructed where the dict is evaluated
+        """
+        try:
+            params = dictConfig['__init__']
+        except KeyError:
+            try:
+                params = dictConfig['__type__']['dict']
+            except KeyError:
+                return '{}'
+        if not isinstance(params, Mapping):
+            return '{}'
+
+        items = list()
+        for name, value in params.items():
+            if isinstance(value, Mapping) and set(value.keys()).intersection(self.meta_keys):
+                factory, nested_params = self._factory(value, object), self._params(value)
+                if self.lazy_init:
+                    items.append(f'{name!r}: LazyObject(partial({factory}, **{nested_params}))')
+                else:
+                    items.append(f'{name!r}: {factory}(**{nested_params})')
+            else:
+                items.append(f'{name!r}: {self._literal(value, name)}')
+        return '{' + ', '.join(items) + '}'
+
+
+
+    def _factory(self, dictConfig: Mapping, default_factory: type) -> str:
+        """
+        Output:
+            module level name, in the generated module, of the factory the parser would use
+            for <dictConfig>
+        """
+        factory = self._parser._parse_meta_factory_function_dynamic(dictConfig)
+        if not factory:
+            return self._import(self._parser._parse_meta_factory_function_static(dictConfig, default_factory))
+
+        #- the parser's type cache hands out one class per distinct spec
+        try:
+            return self._types[factory]
+        except KeyError:
+            pass
+        spec = dictConfig['__type__']
+        bases = ''.join(f'{self._import(base)}, ' for base in factory.__bases__)
+        name = f'_t{len(self._types)}'
+        self._type_defs.append(f"{name} = type({spec['name']!r}, ({bases}), {self._literal(spec['dict'], 'dict')})")
+        self._types[factory] = name
+        return name
+
+
+
+    def _import(self, cls: type) -> str:
+        try:
+            return self._imports[cls]
+        except KeyError:
+            pass
+        module_name, qualname = getattr(cls, '__module__', None), getattr(cls, '__qualname__', '')
+        try:
+            found = import_module(module_name)
+            for part in qualname.split('.'):
+                found = getattr(found, part)
+        except (ImportError, AttributeError, TypeError, ValueError):
+            found = None
+        if found is not cls or '.' in qualname:
+            raise NamespaceConfigParsingError(f"can't compile a reference to {cls!r}: not importable by name")
+        name = f'_c{len(self._imports)}'
+        self._imports[cls] = name
+        return name
+
+
+
+    def _literal(self, value, key: Union[str, None]=None) -> str:
+        """
+        Output:
+            Python source for <value>, checked to evaluate back to an equal value
+        """
+        import ast
+        source = repr(value)
+        try:
+            same = ast.literal_eval(source) == value
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            same = False
+        if not same:
+            raise NamespaceConfigParsingError(f"can't compile the value of {key!r}: {source} is not a Python literal")
+        return source
@@ -43,3 +43,13 @@ class SecondLifeError(Exception):
 
 class SecondLifeNsLookupError(SecondLifeError, NamespaceLookupError):
     pass
+
+class PrefetchError(SecondLifeError):
+    """
+    Description:
+        one or more provider calls failed during a Namespace.prefetch
+        .errors maps (nsid, attribute) to the exception raised for it
+    """
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} attribute prefetch(es) failed: {list(errors.keys())}")
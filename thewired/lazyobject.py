@@ -0,0 +1,163 @@
+"""
+deferred construction of objects
+
+a LazyObject stands in for an object that is expensive to make (e.g. an SDK client that
+opens a session) and makes it on first use: the first attribute access, call, item access,
+comparison, etc. constructs it exactly once, even with several threads racing for it, and
+every later use goes straight to the real object.
+
+NamespaceConfigParser2(lazy_init=True) puts LazyObjects in place of the objects declared
+with nested "__class__"/"__init__" keys in an "__init__" block, so parsing a config no
+longer constructs clients the process never uses.
+
+    client = LazyObject(partial(SomeClient, region='eu-west-1'))
+    client.list_things()        #- SomeClient(region='eu-west-1') is constructed here
+
+Notes:
+    a proxy is not an instance of its object's class: isinstance(proxy, SomeClient) is
+    False, so that code walking a namespace (get_subnodes(), walk(), memory_report(), ...)
+    can type check every value without constructing anything. Use
+    isinstance(unwrap(proxy), SomeClient) for the real type. Attribute names starting
+    with "_lazy_" belong to the proxy itself. A factory that raises is called again on the
+    next use. Proxies can't be pickled; copy.copy()/copy.deepcopy() of a proxy is a proxy
+    for a copy of its object.
+"""
+
+import copy
+import threading
+from typing import Callable
+
+from thewired.spans import span
+
+__all__ = ['LazyObject', 'is_constructed', 'unwrap']
+
+#- _lazy_obj before construction
+_UNSET = object()
+
+
+class LazyObject(object):
+    """
+    Description:
+        proxy that constructs its object with <factory>() on first use (see module docstring)
+    """
+    __slots__ = ('_lazy_factory', '_lazy_obj', '_lazy_lock', '__weakref__')
+
+    def __init__(self, factory: Callable[[], object]):
+        object.__setattr__(self, '_lazy_factory', factory)
+        object.__setattr__(self, '_lazy_obj', _UNSET)
+        object.__setattr__(self, '_lazy_lock', threading.Lock())
+
+
+    def _lazy_get(self):
+        obj = self._lazy_obj
+        if obj is _UNSET:
+            with self._lazy_lock:
+                obj = self._lazy_obj
+                if obj is _UNSET:
+                    factory = self._lazy_factory
+                    with span('construct', _factory_name(factory)):
+                        obj = factory()
+                    object.__setattr__(self, '_lazy_obj', obj)
+                    #- not needed any more; don't keep its arguments alive
+                    object.__setattr__(self, '_lazy_factory', None)
+        return obj
+
+
+    def __getattr__(self, name):
+        if name.startswith('_lazy_'):
+            #- e.g. a proxy made without __init__; don't recurse looking for its slots
+            raise AttributeError(name)
+        return getattr(self._lazy_get(), name)
+
+    def __reduce_ex__(self, protocol):
+        #- pickling would have to construct the object in the pickling process
+        raise TypeError(f"can't pickle {self!r}")
+
+    def __copy__(self):
+        return LazyObject(lambda: copy.copy(self._lazy_get()))
+
+    def __deepcopy__(self, memo):
+        proxy = memo[id(self)] = LazyObject(lambda: copy.deepcopy(self._lazy_get()))
+        return proxy
+
+    def __setattr__(self, name, value):
+        setattr(self._lazy_get(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._lazy_get(), name)
+
+    def __dir__(self):
+        return dir(self._lazy_get())
+
+    def __call__(self, *args, **kwargs):
+        return self._lazy_get()(*args, **kwargs)
+
+    def __str__(self):
+        return str(self._lazy_get())
+
+    def __repr__(self):
+        #- without constructing: reprs end up in debug logs
+        obj = self._lazy_obj
+        if obj is _UNSET:
+            return f"<LazyObject of {_factory_name(self._lazy_factory)} (not constructed)>"
+        return repr(obj)
+
+    def __bool__(self):
+        return bool(self._lazy_get())
+
+    def __eq__(self, other):
+        return self._lazy_get() == other
+
+    def __ne__(self, other):
+        return self._lazy_get() != other
+
+    def __hash__(self):
+        return hash(self._lazy_get())
+
+    def __len__(self):
+        return len(self._lazy_get())
+
+    def __iter__(self):
+        return iter(self._lazy_get())
+
+    def __contains__(self, item):
+        return item in self._lazy_get()
+
+    def __getitem__(self, key):
+        return self._lazy_get()[key]
+
+    def __setitem__(self, key, value):
+        self._lazy_get()[key] = value
+
+    def __delitem__(self, key):
+        del self._lazy_get()[key]
+
+    def __enter__(self):
+        return self._lazy_get().__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._lazy_get().__exit__(*exc_info)
+
+
+
+def _factory_name(factory) -> str:
+    func = getattr(factory, 'func', factory)    #- functools.partial
+    return getattr(func, '__qualname__', None) or repr(func)
+
+
+
+def is_constructed(obj) -> bool:
+    """
+    Output:
+        False for a LazyObject whose object has not been constructed yet, True otherwise
+    """
+    return type(obj) is not LazyObject or obj._lazy_obj is not _UNSET
+
+
+
+def unwrap(obj):
+    """
+    Output:
+        the real object behind a LazyObject (constructing it if needed); anything else as is
+    """
+    return obj._lazy_get() if type(obj) is LazyObject else obj
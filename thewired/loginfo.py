@@ -1,15 +1,96 @@
 """
 stuff that deals with this project's logging specifics
+
+hot paths should not pay for logging that nobody will see. The pattern used throughout the
+package is:
+
+    log = make_log_adapter(logger, self.__class__, "method_name")   #- cached; no allocation
+    if enabled_for(DEBUG, logger):
+        log.debug(f"... {expensive} ...")
+
+or, for a single message, %-style arguments (formatted only if the record is emitted) and
+LazyFormat for parts that are expensive to produce even as arguments:
+
+    log.debug("config: %s", LazyFormat(pprint.pformat, dictConfig))
 """
 
-from logging import LoggerAdapter
+import logging
+from functools import lru_cache
+from logging import LoggerAdapter, DEBUG
+
+from thewired.spans import current_request_id
+
+__all__ = ['make_log_adapter', 'enabled_for', 'LazyFormat', 'RequestIdFilter', 'DEBUG']
+
+#- parent of every logger in the package
+package_logger = logging.getLogger('thewired')
+
+
+@lru_cache(maxsize=2048)
+def _log_adapter(logger, name_ext):
+    return LoggerAdapter(logger, dict(name_ext=name_ext))
+
 
 def make_log_adapter(logger, cls, function_name):
     """
     Description:
         simple method to wrap the parts needed to make a logging adaptor dictionary needed
         for the way that logging is configured for this project
+
+        adapters are cached per (logger, class, function), so calling this at the top of a
+        hot function costs a dictionary lookup, not an allocation
     """
     class_name = cls.__name__ if cls is not None else ''
-    addendum = dict(name_ext='.'.join([class_name, function_name]))
-    return LoggerAdapter(logger, addendum)
+    return _log_adapter(logger, '.'.join([class_name, function_name]))
+
+
+def enabled_for(level, logger=None):
+    """
+    Description:
+        short-circuit check for whether anything would be logged at <level>
+        Use it to skip building log messages (f-strings, reprs, pformat, ...) entirely.
+        Relies on the standard library's per-logger level cache, so it stays correct when
+        levels are changed at run time.
+    Input:
+        level: logging level, e.g. logging.DEBUG
+        logger: the logger (or LoggerAdapter) that would be used; defaults to the package's
+            top-level "thewired" logger
+    """
+    return (logger if logger is not None else package_logger).isEnabledFor(level)
+
+
+class LazyFormat(object):
+    """
+    Description:
+        defers building a log message argument until the record is actually formatted
+
+    Example:
+        log.debug("parsed: %s", LazyFormat(pprint.pformat, config, width=10))
+    """
+    __slots__ = ('func', 'args', 'kwargs')
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return str(self.func(*self.args, **self.kwargs))
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Description:
+        logging filter that sets record.request_id to the current request id (see
+        thewired.spans.request_context), so formatters can use %(request_id)s
+
+    Example:
+        handler.addFilter(RequestIdFilter())
+        handler.setFormatter(logging.Formatter("%(request_id)s %(name_ext)s: %(message)s"))
+    """
+    def filter(self, record):
+        record.request_id = current_request_id()
+        return True
@@ -0,0 +1,393 @@
+"""
+optional operation metrics
+
+off by default. While off, the instrumented code paths only check that the module-level
+`registry` is None. Turn it on with enable():
+
+    from thewired import metrics
+    metrics.enable(prefix_depth=2)
+    ...
+    metrics.snapshot()                      #- plain dict
+    metrics.write_prometheus('/var/lib/node_exporter/thewired.prom')
+
+what is recorded:
+    * Namespace get/add/remove calls, counted per NSID prefix (the first <prefix_depth>
+      segments of the NSID). get counts include the lookups that add() and remove()
+      do internally
+    * latency histograms of SecondLifeNode provider calls, per (NSID prefix, attribute)
+    * latency histograms of AddendumFormatter.provide, per implementor
+    * SecondLifeNode result cache hits/stale hits/misses, per NSID prefix
+    * config reloads by thewired.reloader, per config source and outcome ("ok"/"error")
+
+every structure is fixed-size: histograms have a fixed set of buckets, and each metric
+keeps at most <max_series> label sets. Anything past that is counted under the
+"__overflow__" label instead of growing the registry.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+
+__all__ = ['enable', 'disable', 'is_enabled', 'snapshot', 'write_prometheus', 'prometheus_text',
+           'MetricsRegistry', 'Histogram', 'OVERFLOW', 'DEFAULT_BUCKETS']
+
+#- label used for series that don't fit in the registry any more
+OVERFLOW = '__overflow__'
+
+#- upper bounds in seconds; roughly 1-2.5-5 per decade from 10us to 10s
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005,
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0,
+    10.0)
+
+#- the active MetricsRegistry, or None when metrics are off
+registry = None
+_registry_lock = threading.Lock()
+
+
+class Histogram(object):
+    """
+    Description:
+        fixed-bucket histogram. counts[i] is the number of observations <= buckets[i]
+        (and > buckets[i-1]); the last count is for observations above every bucket
+    """
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Output:
+            list of (upper bound, cumulative count) pairs, ending with (inf, count)
+        """
+        total = 0
+        pairs = list()
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            total += n
+            pairs.append((bound, total))
+        return pairs
+
+    def as_dict(self):
+        return dict(
+            count=self.count,
+            sum=self.sum,
+            buckets=dict((_format_bound(bound), n) for bound, n in self.cumulative()))
+
+
+class MetricsRegistry(object):
+    """
+    Description:
+        thread-safe, bounded store for every metric this module records
+    """
+    def __init__(self, prefix_depth=2, max_series=512, buckets=DEFAULT_BUCKETS):
+        """
+        Input:
+            prefix_depth: how many NSID segments to keep when grouping by NSID prefix
+            max_series: most label sets kept per metric; further ones go to OVERFLOW
+            buckets: histogram bucket upper bounds, in seconds
+        """
+        if prefix_depth < 1:
+            raise ValueError(f"prefix_depth must be >= 1, not {prefix_depth}")
+        if max_series < 1:
+            raise ValueError(f"max_series must be >= 1, not {max_series}")
+        self.prefix_depth = prefix_depth
+        self.max_series = max_series
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._ops = dict()                  #- (op, prefix) -> count
+        self._cache = dict()                #- (prefix, result) -> count
+        self._provider_latency = dict()     #- (prefix, attr) -> Histogram
+        self._implementor_latency = dict()  #- implementor -> Histogram
+        self._reloads = dict()              #- (source, result) -> count
+
+
+    def prefix(self, nsid):
+        """
+        Output:
+            the first <prefix_depth> segments of <nsid>, e.g. ".a.b" for ".a.b.c.d" at depth 2
+        """
+        nsid = str(nsid)
+        if nsid == '.':
+            return nsid
+        return '.'.join(nsid.split('.', self.prefix_depth + 1)[:self.prefix_depth + 1])
+
+
+    def _key(self, table, key, overflow_key):
+        #- caller holds self._lock
+        if key in table or len(table) < self.max_series:
+            return key
+        return overflow_key
+
+
+    def _histogram(self, table, key, overflow_key):
+        #- caller holds self._lock
+        key = self._key(table, key, overflow_key)
+        try:
+            return table[key]
+        except KeyError:
+            hist = table[key] = Histogram(self.buckets)
+            return hist
+
+
+    def count_op(self, op, nsid):
+        prefix = self.prefix(nsid)
+        with self._lock:
+            key = self._key(self._ops, (op, prefix), (op, OVERFLOW))
+            self._ops[key] = self._ops.get(key, 0) + 1
+
+
+    def count_cache(self, nsid, result):
+        """
+        Input:
+            result: "hit", "stale" or "miss"
+        """
+        prefix = self.prefix(nsid)
+        with self._lock:
+            key = self._key(self._cache, (prefix, result), (OVERFLOW, result))
+            self._cache[key] = self._cache.get(key, 0) + 1
+
+
+    def count_reload(self, source, result):
+        """
+        Input:
+            source: what was reloaded, e.g. the config file path
+            result: "ok" or "error"
+        """
+        with self._lock:
+            key = self._key(self._reloads, (str(source), result), (OVERFLOW, result))
+            self._reloads[key] = self._reloads.get(key, 0) + 1
+
+
+    def observe_provider(self, nsid, attr, seconds):
+        prefix = self.prefix(nsid)
+        with self._lock:
+            self._histogram(self._provider_latency, (prefix, attr), (OVERFLOW, OVERFLOW)).observe(seconds)
+
+
+    def observe_implementor(self, implementor, seconds):
+        with self._lock:
+            self._histogram(self._implementor_latency, str(implementor), OVERFLOW).observe(seconds)
+
+
+    def cache_ratios(self):
+        """
+        Output:
+            dict of NSID prefix -> dict(hit, stale, miss, hit_ratio). Stale hits count as
+            hits for the ratio, since no caller waited for the provider
+        """
+        with self._lock:
+            counts = dict(self._cache)
+        ratios = dict()
+        for (prefix, result), n in counts.items():
+            ratios.setdefault(prefix, dict(hit=0, stale=0, miss=0))[result] += n
+        for entry in ratios.values():
+            total = entry['hit'] + entry['stale'] + entry['miss']
+            entry['hit_ratio'] = (entry['hit'] + entry['stale']) / total if total else None
+        return ratios
+
+
+    def snapshot(self):
+        """
+        Output:
+            plain dict (JSON serializable) of everything recorded so far
+        """
+        with self._lock:
+            ops = dict()
+            for (op, prefix), n in self._ops.items():
+                ops.setdefault(op, dict())[prefix] = n
+            provider_latency = dict()
+            for (prefix, attr), hist in self._provider_latency.items():
+                provider_latency.setdefault(prefix, dict())[attr] = hist.as_dict()
+            implementor_latency = dict(
+                (implementor, hist.as_dict()) for implementor, hist in self._implementor_latency.items())
+            reloads = dict()
+            for (source, result), n in self._reloads.items():
+                reloads.setdefault(source, dict())[result] = n
+
+        return dict(
+            namespace_ops=ops,
+            provider_latency=provider_latency,
+            implementor_latency=implementor_latency,
+            cache=self.cache_ratios(),
+            reloads=reloads,
+            refresher=_refresher_stats())
+
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+            self._cache.clear()
+            self._provider_latency.clear()
+            self._implementor_latency.clear()
+            self._reloads.clear()
+
+
+    def prometheus_text(self):
+        """
+        Output:
+            everything recorded so far in the Prometheus text exposition format
+        """
+        lines = list()
+        with self._lock:
+            ops = sorted(self._ops.items())
+            cache = sorted(self._cache.items())
+            provider_latency = sorted(
+                (key, hist.cumulative(), hist.sum, hist.count) for key, hist in self._provider_latency.items())
+            implementor_latency = sorted(
+                (key, hist.cumulative(), hist.sum, hist.count) for key, hist in self._implementor_latency.items())
+            reloads = sorted(self._reloads.items())
+
+        lines.append('# HELP thewired_namespace_ops_total Namespace operations by NSID prefix.')
+        lines.append('# TYPE thewired_namespace_ops_total counter')
+        for (op, prefix), n in ops:
+            lines.append(f'thewired_namespace_ops_total{_labels(op=op, prefix=prefix)} {n}')
+
+        lines.append('# HELP thewired_cache_requests_total SecondLifeNode result cache lookups by NSID prefix.')
+        lines.append('# TYPE thewired_cache_requests_total counter')
+        for (prefix, result), n in cache:
+            lines.append(f'thewired_cache_requests_total{_labels(prefix=prefix, result=result)} {n}')
+
+        lines.append('# HELP thewired_cache_hit_ratio Fraction of cache lookups served from the cache.')
+        lines.append('# TYPE thewired_cache_hit_ratio gauge')
+        for prefix, entry in sorted(self.cache_ratios().items()):
+            if entry['hit_ratio'] is not None:
+                lines.append(f'thewired_cache_hit_ratio{_labels(prefix=prefix)} {entry["hit_ratio"]}')
+
+        lines.append('# HELP thewired_provider_latency_seconds SecondLifeNode provider call latency.')
+        lines.append('# TYPE thewired_provider_latency_seconds histogram')
+        for (prefix, attr), cumulative, total, count in provider_latency:
+            _histogram_lines(lines, 'thewired_provider_latency_seconds', dict(prefix=prefix, attr=attr),
+                cumulative, total, count)
+
+        lines.append('# HELP thewired_implementor_latency_seconds AddendumFormatter.provide latency per implementor.')
+        lines.append('# TYPE thewired_implementor_latency_seconds histogram')
+        for implementor, cumulative, total, count in implementor_latency:
+            _histogram_lines(lines, 'thewired_implementor_latency_seconds', dict(implementor=implementor),
+                cumulative, total, count)
+
+        lines.append('# HELP thewired_config_reloads_total Config reloads by source and outcome.')
+        lines.append('# TYPE thewired_config_reloads_total counter')
+        for (source, result), n in reloads:
+            lines.append(f'thewired_config_reloads_total{_labels(source=source, result=result)} {n}')
+
+        refresher = _refresher_stats()
+        if refresher is not None:
+            lines.append('# HELP thewired_refresher_jobs_total Background refresh jobs by outcome.')
+            lines.append('# TYPE thewired_refresher_jobs_total counter')
+            for outcome in ('submitted', 'dropped', 'completed', 'failed'):
+                lines.append(f'thewired_refresher_jobs_total{_labels(outcome=outcome)} {refresher[outcome]}')
+            lines.append('# HELP thewired_refresher_queued Background refresh jobs waiting to run.')
+            lines.append('# TYPE thewired_refresher_queued gauge')
+            lines.append(f'thewired_refresher_queued {refresher["queued"]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(prefix_depth={self.prefix_depth}, max_series={self.max_series})"
+
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _histogram_lines(lines, name, labels, cumulative, total, count):
+    for bound, n in cumulative:
+        lines.append(f'{name}_bucket{_labels(**labels, le=_format_bound(bound))} {n}')
+    lines.append(f'{name}_sum{_labels(**labels)} {total}')
+    lines.append(f'{name}_count{_labels(**labels)} {count}')
+
+
+def _refresher_stats():
+    #- only report on a refresher that has actually been created
+    from thewired import refresher
+    if refresher._default_refresher is None:
+        return None
+    return refresher._default_refresher.stats()
+
+
+
+def enable(prefix_depth=2, max_series=512, buckets=DEFAULT_BUCKETS):
+    """
+    Description:
+        start recording metrics into a new, empty registry (replacing any current one)
+    Output:
+        the new MetricsRegistry
+    """
+    global registry
+    with _registry_lock:
+        registry = MetricsRegistry(prefix_depth=prefix_depth, max_series=max_series, buckets=buckets)
+        return registry
+
+
+def disable():
+    """
+    Description:
+        stop recording and drop everything recorded so far
+    """
+    global registry
+    with _registry_lock:
+        registry = None
+
+
+def is_enabled():
+    return registry is not None
+
+
+def snapshot():
+    """
+    Output:
+        the current registry's snapshot() dict, or None if metrics are off
+    """
+    current = registry
+    return None if current is None else current.snapshot()
+
+
+def prometheus_text():
+    current = registry
+    return '' if current is None else current.prometheus_text()
+
+
+def write_prometheus(path):
+    """
+    Description:
+        write the current metrics to <path> in the Prometheus text format, e.g. for the
+        node_exporter textfile collector. The file is replaced atomically so a scraper
+        never reads a half-written file.
+    """
+    import tempfile
+    text = prometheus_text()
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.thewired-metrics-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -1,6 +1,28 @@
-from .namespace import Namespace
-from .namespacenode import NamespaceNode
-from .namespacenode import NamespaceNodeBase, DelegateNode, CallableDelegateNode
-from .namespacenode import HandleNode, CallableHandleNode
-from .namespacenode import SecondLifeNode, CallableSecondLifeNode
-from .nsid import Nsid
+#- public names are imported on first use (see thewired.util.lazy_attributes)
+from thewired.util import lazy_attributes
+
+_lazy_names = {
+    'Namespace': '.namespace',
+    'NamespaceNode': '.namespacenode',
+    'NamespaceNodeBase': '.namespacenode',
+    'DelegateNode': '.namespacenode',
+    'CallableDelegateNode': '.namespacenode',
+    'HandleNode': '.namespacenode',
+    'CallableHandleNode': '.namespacenode',
+    'SecondLifeNode': '.namespacenode',
+    'CallableSecondLifeNode': '.namespacenode',
+    'Nsid': '.nsid',
+    'NsidTrie': '.nsidtrie',
+}
+
+__all__ = list(_lazy_names)
+__getattr__, __dir__ = lazy_attributes(__name__, _lazy_names)
+
+if False:  # typing.TYPE_CHECKING
+    from .namespace import Namespace
+    from .namespacenode import NamespaceNode
+    from .namespacenode import NamespaceNodeBase, DelegateNode, CallableDelegateNode
+    from .namespacenode import HandleNode, CallableHandleNode
+    from .namespacenode import SecondLifeNode, CallableSecondLifeNode
+    from .nsid import Nsid
+    from .nsidtrie import NsidTrie
@@ -0,0 +1,198 @@
+"""
+Purpose:
+    estimate how much memory the nodes of a namespace retain, per subtree and per node type
+
+    a node's retained size is sys.getsizeof() of the node, of its attribute dict and of
+    everything only reachable through it: its Nsid, strings and numbers, containers, and
+    thewired helper objects such as a SecondLifeNode's result cache. Child nodes are
+    counted as nodes of their own. The namespace itself, classes, functions and modules
+    are never counted, and other objects (e.g. implementors, or LazyObject proxies, which
+    are never constructed for the report) only shallowly. Every object is
+    counted once, for the first node found holding it, so shared values (interned strings,
+    a provider used by many nodes) are not counted again and again.
+
+    this is an estimate: allocator overhead, free lists and memory held by C extensions are
+    not seen. tracemalloc (see benchmarks/bench_memory.py) measures the real thing.
+"""
+
+import sys
+import types
+from logging import getLogger
+from typing import Dict
+
+from .namespacenode import NamespaceNodeBase, HandleNode
+from .nsid import Nsid
+from thewired.lazyobject import LazyObject
+
+logger = getLogger(__name__)
+
+#- never counted: shared code and type objects
+_UNCOUNTED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+    types.MethodType, types.CodeType)
+
+#- counted with their contents
+_CONTAINER_TYPES = (dict, list, tuple, set, frozenset)
+
+
+class MemoryReport(object):
+    """
+    Description:
+        outcome of Namespace.memory_report()
+        prefix: NSID the report starts at
+        nodes: number of nodes counted (including the one at <prefix>)
+        total_bytes: estimated bytes retained by them
+        by_type: node class name -> dict(count=, bytes=)
+        subtrees: NSID of each subtree root <depth> levels below <prefix> -> dict(nodes=, bytes=)
+            nodes above that depth are only in the totals
+    """
+    def __init__(self, prefix, depth):
+        self.prefix = prefix
+        self.depth = depth
+        self.nodes = 0
+        self.total_bytes = 0
+        self.by_type: Dict[str, Dict[str, int]] = dict()
+        self.subtrees: Dict[str, Dict[str, int]] = dict()
+
+
+    def _add(self, node, size, subtree):
+        self.nodes += 1
+        self.total_bytes += size
+        entry = self.by_type.setdefault(node.__class__.__name__, dict(count=0, bytes=0))
+        entry['count'] += 1
+        entry['bytes'] += size
+        if subtree is not None:
+            entry = self.subtrees.setdefault(subtree, dict(nodes=0, bytes=0))
+            entry['nodes'] += 1
+            entry['bytes'] += size
+
+
+    @property
+    def bytes_per_node(self):
+        return self.total_bytes / self.nodes if self.nodes else 0.0
+
+
+    def as_dict(self):
+        return dict(prefix=self.prefix, depth=self.depth, nodes=self.nodes, total_bytes=self.total_bytes,
+            by_type=self.by_type, subtrees=self.subtrees)
+
+
+    def format(self, top=20):
+        """
+        Output:
+            text table of the node types and the <top> largest subtrees
+        """
+        lines = [f"{self.prefix}: {self.nodes} nodes, {self.total_bytes} bytes ({self.bytes_per_node:.0f} per node)",
+            '', f"{'type':<32} {'count':>10} {'bytes':>12} {'per node':>9}"]
+        for name, entry in sorted(self.by_type.items(), key=lambda i: -i[1]['bytes']):
+            lines.append(f"{name:<32} {entry['count']:>10} {entry['bytes']:>12} {entry['bytes'] / entry['count']:>9.0f}")
+        if self.subtrees:
+            lines.extend(['', f"{'subtree':<48} {'nodes':>10} {'bytes':>12}"])
+            biggest = sorted(self.subtrees.items(), key=lambda i: -i[1]['bytes'])[:top]
+            for nsid, entry in biggest:
+                lines.append(f"{nsid:<48} {entry['nodes']:>10} {entry['bytes']:>12}")
+        return '\n'.join(lines)
+
+
+    def __str__(self):
+        return self.format()
+
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(prefix={self.prefix!r}, nodes={self.nodes}, total_bytes={self.total_bytes})"
+
+
+
+def _child_nodes(node):
+    """
+    Description:
+        the nodes <node> holds as its own children. Attributes pointing at nodes elsewhere
+        in the namespace (resolved nsid-ref:// values, links) are not children
+    """
+    prefix = str(node.nsid)
+    prefix = prefix if prefix.endswith('.') else prefix + '.'
+    for name, value in vars(node).items():
+        if isinstance(value, NamespaceNodeBase) and not isinstance(value, HandleNode) \
+                and str(value.nsid) == prefix + name:
+            yield value
+
+
+def _skipped_types():
+    #- circular import: namespace.py uses this module
+    from .namespace import Namespace
+    return _UNCOUNTED_TYPES + (NamespaceNodeBase, Namespace)
+
+
+def retained_size(obj, seen, skip=None, _depth=0):
+    """
+    Description:
+        estimated bytes retained by <obj>, not counting nodes, namespaces, objects already
+        in <seen> (a set of ids, updated here) or the types in _UNCOUNTED_TYPES
+    """
+    if type(obj) is LazyObject:
+        #- only the proxy: looking into it (even isinstance()/__dict__) could construct
+        #- the object it defers, and change what is being measured
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        return sys.getsizeof(obj)
+
+    skip = _skipped_types() if skip is None else skip
+    if id(obj) in seen or isinstance(obj, skip):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if _depth > 32:
+        #- pathologically nested value; don't blow the stack
+        return size
+
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += retained_size(key, seen, skip, _depth + 1) + retained_size(value, seen, skip, _depth + 1)
+    elif isinstance(obj, _CONTAINER_TYPES):
+        for item in obj:
+            size += retained_size(item, seen, skip, _depth + 1)
+    elif isinstance(obj, Nsid) or type(obj).__module__.startswith('thewired.'):
+        #- helper objects of the node, e.g. its Nsid or result cache
+        attrs = getattr(obj, '__dict__', None)
+        if attrs is not None:
+            size += retained_size(attrs, seen, skip, _depth + 1)
+    return size
+
+
+def node_size(node, seen, skip=None):
+    """
+    Description:
+        estimated bytes retained by one node, excluding its child nodes
+    """
+    if id(node) in seen:
+        return 0
+    seen.add(id(node))
+    return sys.getsizeof(node) + retained_size(vars(node), seen, skip)
+
+
+def memory_report(start_node, prefix, depth=1) -> MemoryReport:
+    """
+    Description:
+        estimate the memory retained by <start_node> and every node below it
+    Input:
+        start_node: node to start at
+        prefix: its NSID, as the caller sees it
+        depth: how many levels below <start_node> the subtree totals are taken
+    Output:
+        MemoryReport
+    """
+    while isinstance(start_node, HandleNode):
+        start_node = start_node._delegate
+
+    report = MemoryReport(str(prefix), depth)
+    seen = set()
+    skip = _skipped_types()
+    stack = [(start_node, 0, None)]
+    while stack:
+        node, level, subtree = stack.pop()
+        if level == depth:
+            subtree = str(node.nsid)
+        report._add(node, node_size(node, seen, skip), subtree)
+        for child in _child_nodes(node):
+            stack.append((child, level + 1, subtree))
+    return report
@@ -8,15 +8,23 @@ Notes:
 
 """
 
-from logging import getLogger, LoggerAdapter
+import threading
+import weakref
+from collections import deque
+from logging import getLogger, LoggerAdapter, DEBUG
 from types import SimpleNamespace
-from typing import Union, List, Dict
+from typing import Any, Callable, Iterable, Union, List, Dict
 from warnings import warn
 
-from thewired.loginfo import make_log_adapter
+from thewired.loginfo import make_log_adapter, enabled_for
+from thewired import metrics as _metrics
+from thewired.spans import span as _span
 from .namespacenode import NamespaceNodeBase, HandleNode, CallableHandleNode
-from thewired.namespace.nsid import Nsid, list_nsid_segments, get_parent_nsid, validate_nsid, get_nsid_ancestry, \
-                                    strip_common_prefix, find_common_prefix, make_child_nsid, \
+from .nsidtrie import NsidTrie
+from . import memory as _memory
+from thewired.namespace.nsid import Nsid, list_nsid_segments, get_parent_nsid, validate_nsid, iter_nsid_ancestry, \
+                                    cached_nsid_ancestry, \
+                                    strip_common_prefix, find_common_prefix, split_common_prefix, make_child_nsid, \
                                     nsid_basename, get_nsid_from_ref, is_valid_nsid_ref, get_nsid_from_link, \
                                     is_valid_nsid_link
 from thewired.exceptions import NamespaceLookupError, NamespaceCollisionError, InvalidNsidError
@@ -43,6 +51,11 @@ class Namespace(SimpleNamespace):
         log = make_log_adapter(logger, self.__class__, "__init__")
         log.debug("entering")
         self.root = None
+        self._removal_listeners = NsidTrie()
+        self._removal_listeners_lock = threading.Lock()
+        #- watched NSIDs whose weakly held listeners died; appended from weakref callbacks
+        #- (which can run anywhere, so they don't take the lock) and pruned under the lock
+        self._dead_removal_listeners = deque()
         self._validate_default_node_factory(default_node_factory)
         self.default_node_factory = default_node_factory
         self.root = self.default_node_factory(nsid=self._root_nsid, namespace=self)
@@ -56,8 +69,9 @@ class Namespace(SimpleNamespace):
             to make it look like everything that's actually under the namespacenode .root is
             actually directly part of the namespace object
         """
-        log = make_log_adapter(logger, self.__class__, "__getattr_")
-        log.debug(f"entering: {attr=}")
+        if enabled_for(DEBUG, logger):
+            log = make_log_adapter(logger, self.__class__, "__getattr_")
+            log.debug(f"entering: {attr=}")
         return getattr(self.root, attr)
 
 
@@ -90,38 +104,46 @@ class Namespace(SimpleNamespace):
         Description:
             return a node object specified by NSID
         """
-        log = LoggerAdapter(logger, dict(name_ext=f"{self.__class__.__name__}.get"))
-        if is_valid_nsid_ref(nsid):
-            log.debug(f'dreferencing NSID ref: {nsid=}')
-            nsid = get_nsid_from_ref(str(nsid))
-        elif is_valid_nsid_link(nsid):
-            log.debug(f'getting node from NSID symlink')
-            nsid = get_nsid_from_link(nsid)
-        else:
-            #log.debug(f'no nsid-ref nor nsid symlink found')
-            pass
-        self._validate_namespace_nsid_head(nsid)
-        _nsid_ = Nsid(nsid)
-        current_node = self.root
-        nsid_segments = list_nsid_segments(nsid)[1:] #- attribute names to get; skip initial empty string ""
-
-        n = 0
-        while current_node.nsid != _nsid_:
-            #log.debug(f"target {_nsid_=} != {current_node.nsid=}")
-            try:
-                nsid_segment = nsid_segments[n]
-            except IndexError as err:
-                raise NamespaceInternalError(f"while looking for nsid \"{_nsid_}\", ran out of nsid_segments: {nsid_segments} at index {n} ({current_node=}") from err
-            try:
-                current_node = getattr(current_node, nsid_segment)
-                if not isinstance(current_node, NamespaceNodeBase):
-                    warn("Rogue node type detected in the namespace. Will most likely cause errors.")
-            except AttributeError as e:
-                raise NamespaceLookupError(f"{current_node} has no attribute named '{nsid_segment}'") from e
-            n += 1
+        with _span('namespace', 'get'):
+            log = make_log_adapter(logger, self.__class__, "get")
+            debug = enabled_for(DEBUG, logger)
+            if is_valid_nsid_ref(nsid):
+                if debug:
+                    log.debug(f'dreferencing NSID ref: {nsid=}')
+                nsid = get_nsid_from_ref(str(nsid))
+            elif is_valid_nsid_link(nsid):
+                if debug:
+                    log.debug(f'getting node from NSID symlink')
+                nsid = get_nsid_from_link(nsid)
+            else:
+                #log.debug(f'no nsid-ref nor nsid symlink found')
+                pass
+            registry = _metrics.registry
+            if registry is not None:
+                registry.count_op('get', nsid)
+            self._validate_namespace_nsid_head(nsid)
+            _nsid_ = Nsid(nsid)
+            current_node = self.root
+            nsid_segments = list_nsid_segments(nsid)[1:] #- attribute names to get; skip initial empty string ""
+
+            n = 0
+            while current_node.nsid != _nsid_:
+                #log.debug(f"target {_nsid_=} != {current_node.nsid=}")
+                try:
+                    nsid_segment = nsid_segments[n]
+                except IndexError as err:
+                    raise NamespaceInternalError(f"while looking for nsid \"{_nsid_}\", ran out of nsid_segments: {nsid_segments} at index {n} ({current_node=}") from err
+                try:
+                    current_node = getattr(current_node, nsid_segment)
+                    if not isinstance(current_node, NamespaceNodeBase):
+                        warn("Rogue node type detected in the namespace. Will most likely cause errors.")
+                except AttributeError as e:
+                    raise NamespaceLookupError(f"{current_node} has no attribute named '{nsid_segment}'") from e
+                n += 1
 
-        log.debug(f"Exiting: {nsid=} | Returning this node: {current_node=}")
-        return current_node
+            if debug:
+                log.debug(f"Exiting: {nsid=} | Returning this node: {current_node=}")
+            return current_node
 
 
 
@@ -136,8 +158,13 @@ class Namespace(SimpleNamespace):
                 *args: passed into the node_factory as args
                 **kwargs: passed into the node_factory as kwargs
         """
-        log = LoggerAdapter(logger, dict(name_ext=f"{self.__class__.__name__}.add"))
-        log.debug(f"Entering: {nsid=} | {node_factory=}")
+        log = make_log_adapter(logger, self.__class__, "add")
+        debug = enabled_for(DEBUG, logger)
+        if debug:
+            log.debug(f"Entering: {nsid=} | {node_factory=}")
+        registry = _metrics.registry
+        if registry is not None:
+            registry.count_op('add', nsid)
         if find_common_prefix(str(self.root.nsid), nsid) is None:
             err_msg = f'child nsid ({nsid}) must share a common prefix with Namespace root node nsid'
             err_msg += f'({str(self.root.nsid)})'
@@ -147,44 +174,52 @@ class Namespace(SimpleNamespace):
         if node_factory is None:
             node_factory = self.default_node_factory
 
-        #- find the deepest existing ancestor of the node we wish to add
+        #- find the deepest existing ancestor of the node we wish to add, one attribute lookup
+        #- per level down from the root, instead of a get() from the root for every ancestor
         deepest_ancestor = self.root
-        for current_nsid in get_nsid_ancestry(nsid):
+        for current_nsid in cached_nsid_ancestry(_nsid)[1:]:
             try:
-                deepest_ancestor = self.get(current_nsid)
-            except NamespaceLookupError:
+                deepest_ancestor = getattr(deepest_ancestor, nsid_basename(current_nsid))
+            except AttributeError:
                 break
+            if not isinstance(deepest_ancestor, NamespaceNodeBase):
+                warn("Rogue node type detected in the namespace. Will most likely cause errors.")
         else:
             #- we never hit break, so every single nsid in the entire ancestry exists, including the one we want to add
             raise NamespaceCollisionError(f'A node with the nsid "{nsid}" already exists in the namespace.')
 
         #- if here, we have a valid deepest ancestor to start from
-        child_nsid_tail = strip_common_prefix(str(deepest_ancestor.nsid), str(_nsid))[1]
-        common_prefix = find_common_prefix(str(deepest_ancestor.nsid), str(_nsid))
+        common_prefix, _, child_nsid_tail = split_common_prefix(str(deepest_ancestor.nsid), str(_nsid))
         created_nodes = list()      #- keep track of all the nodes we create to return them
         nsid_segments = list_nsid_segments(child_nsid_tail)
         for i,child_attribute_name in enumerate(nsid_segments):
             new_node_nsid = make_child_nsid(str(deepest_ancestor.nsid), child_attribute_name)
             #- use the node factory on the last node only
-            log.debug(f"creating node: {self=} | {new_node_nsid=}")
+            if debug:
+                log.debug(f"creating node: {self=} | {new_node_nsid=}")
             if i == len(nsid_segments) - 1:
                 try:
-                    log.debug(f"creating leaf node w/ non-default factory: {node_factory=}")
+                    if debug:
+                        log.debug(f"creating leaf node w/ non-default factory: {node_factory=}")
                     new_node = node_factory(*args, nsid=new_node_nsid, namespace=self, **kwargs)
                 except TypeError as e:
                     raise TypeError(f"node_factory failed to create node: {str(e)}") from e
 
             else:
-                log.debug(f"creating node with default factory")
+                if debug:
+                    log.debug(f"creating node with default factory")
                 new_node = self.default_node_factory(nsid=new_node_nsid, namespace=self)
 
             created_nodes.append(new_node)
-            log.debug(f"adding new node to the namespace: {deepest_ancestor=} | {child_attribute_name=} | {new_node=}")
+            if debug:
+                log.debug(f"adding new node to the namespace: {deepest_ancestor=} | {child_attribute_name=} | {new_node=}")
             setattr(deepest_ancestor, child_attribute_name, new_node)
             deepest_ancestor = getattr(deepest_ancestor, child_attribute_name)
-            log.debug(f"got next ancestor: {deepest_ancestor=}")
+            if debug:
+                log.debug(f"got next ancestor: {deepest_ancestor=}")
 
-        log.debug(f"Exiting. {created_nodes=}")
+        if debug:
+            log.debug(f"Exiting. {created_nodes=}")
         return created_nodes
 
 
@@ -208,15 +243,19 @@ class Namespace(SimpleNamespace):
                     or
                     - if it didn't look like it but somehow it did: NamespaceInternalError
         """
-        log = LoggerAdapter(logger, dict(name_ext="namespace.add_exactly_one"))
-        log.debug(f"Entering: {nsid=} {node_factory=}")
+        log = make_log_adapter(logger, self.__class__, "add_exactly_one")
+        debug = enabled_for(DEBUG, logger)
+        if debug:
+            log.debug(f"Entering: {nsid=} {node_factory=}")
         nsid_segments = list_nsid_segments(nsid, skip_root=True)
         if len(nsid_segments) > 1:
             try:
                 #- if the parent exists, this will add only one
-                log.debug(f"checking if parent exists: {get_parent_nsid(nsid)}")
+                if debug:
+                    log.debug(f"checking if parent exists: {get_parent_nsid(nsid)}")
                 self.get(get_parent_nsid(nsid))
-                log.debug(f"parent exists for {nsid=}")
+                if debug:
+                    log.debug(f"parent exists for {nsid=}")
             except NamespaceLookupError as e:
                 err_msg = f"add_exactly_one: error: input \"{nsid}\" would create more" +\
                           f" than one new node. ({len(nsid_segments)} > 1) {self.root=}"
@@ -227,7 +266,8 @@ class Namespace(SimpleNamespace):
         if len(new_nodes) > 1:
             raise NamespaceInternalError(f"created more than one new node! ({new_nodes})")
 
-        log.debug(f"Exiting. {new_nodes=}")
+        if debug:
+            log.debug(f"Exiting. {new_nodes=}")
         return new_nodes[0]
 
 
@@ -240,15 +280,72 @@ class Namespace(SimpleNamespace):
 
         Note: it is an error to remove a node that doesn't exist
         """
+        registry = _metrics.registry
+        if registry is not None:
+            registry.count_op('remove', nsid)
         parent_nsid = get_parent_nsid(nsid)
         parent = self.get(parent_nsid)
 
         child_short_nsid = strip_common_prefix(str(parent.nsid), nsid)[1]
         node = getattr(parent, child_short_nsid)
         delattr(parent, child_short_nsid)
+        self._notify_removal_listeners(nsid)
         return node
 
 
+    def add_removal_listener(self, nsid: Union[str, Nsid], callback: Callable[[str], None]) -> str:
+        """
+        Description:
+            have <callback> called once the node at <nsid>, or any of its ancestors, is removed
+            (removing and re-adding a node is how nodes are replaced, so this covers both)
+        Input:
+            nsid: the NSID to watch
+            callback: called with the watched NSID as its only argument. Bound methods are
+                held via weak reference, so registering does not keep their object alive
+        Output:
+            the watched NSID, as <callback> will be called with it
+        Notes:
+            listeners fire at most once; register again after re-resolving to keep watching
+        """
+        watched_nsid = str(nsid)
+        if hasattr(callback, '__self__') and hasattr(callback, '__func__'):
+            dead = self._dead_removal_listeners.append
+            ref = weakref.WeakMethod(callback, lambda _ref: dead(watched_nsid))
+        else:
+            ref = lambda: callback
+        with self._removal_listeners_lock:
+            self._prune_dead_removal_listeners()
+            self._removal_listeners.setdefault(watched_nsid, list()).append(ref)
+        return watched_nsid
+
+
+    def _prune_dead_removal_listeners(self) -> None:
+        #- caller holds self._removal_listeners_lock
+        dead = self._dead_removal_listeners
+        while dead:
+            watched_nsid = dead.popleft()
+            refs = self._removal_listeners.get(watched_nsid)
+            if refs is None:
+                continue
+            refs[:] = [ref for ref in refs if ref() is not None]
+            if not refs:
+                del self._removal_listeners[watched_nsid]
+
+
+    def _notify_removal_listeners(self, nsid: Union[str, Nsid]) -> None:
+        with self._removal_listeners_lock:
+            self._prune_dead_removal_listeners()
+            fired = list(self._removal_listeners.items(nsid))
+            for watched_nsid, _ in fired:
+                del self._removal_listeners[watched_nsid]
+
+        for watched_nsid, refs in fired:
+            for ref in refs:
+                callback = ref()
+                if callback is not None:
+                    callback(watched_nsid)
+
+
     def walk(self, start:Union[NamespaceNodeBase,None]=None, walk_dict:Union[Dict,None]=None) -> Union[Dict, object]:
         """
         Description:
@@ -256,7 +353,6 @@ class Namespace(SimpleNamespace):
         Output:
             Dictionary representing the namespace's structure
         """
-        log = LoggerAdapter(logger, dict(name_ext=f"{self.__class__.__name__}.walk"))
 
         if start is None:
             start = self.root
@@ -318,12 +414,14 @@ class Namespace(SimpleNamespace):
         Output:
         all the nodes that are descendants of the node with NSID given as start_node_nsid
         """
-        log = LoggerAdapter(logger, dict(name_ext=f"{self.__class__.__name__}.get_subnodes"))
+        log = make_log_adapter(logger, self.__class__, "get_subnodes")
+        debug = enabled_for(DEBUG, logger)
         start_node = self.get(start_node_nsid)
         for attr_name in dir(start_node):
             attr = getattr(start_node, attr_name)
             if isinstance(attr, NamespaceNodeBase):
-                log.debug(f"yielding {attr=}")
+                if debug:
+                    log.debug(f"yielding {attr=}")
                 yield attr
                 yield from self.get_subnodes(str(attr.nsid))
 
@@ -343,6 +441,74 @@ class Namespace(SimpleNamespace):
         if is_leaf:
             yield start_node
 
+    def prefetch(self, prefix: Union[str, Nsid], attrs: Union[str, Iterable[str]], max_workers: int=8,
+            cache=None) -> 'thewired.namespace.prefetch.PrefetchReport':
+        """
+        Description:
+            run the providers for <attrs> on the node at <prefix> and every node below it, on a
+            thread pool, and keep the results in the nodes' result caches so the following
+            synchronous reads don't call the providers again
+        Input:
+            prefix: NSID of the subtree to prefetch
+            attrs: attribute name(s) to prefetch
+            max_workers: number of provider calls to run at once
+            cache: None (the default) to only fill the result caches nodes already have;
+                otherwise cache options (as for SecondLifeNode) that turn on a cache, for good,
+                on nodes without one. True means a cache without expiry
+        Output:
+            a PrefetchReport. Provider failures are collected there per (nsid, attribute) rather
+            than raised; call .raise_for_errors() to turn them into a PrefetchError
+        """
+        nodes = [self.get(prefix)]
+        nodes.extend(self.get_subnodes(prefix))
+        #- thread pool machinery is only imported by processes that prefetch
+        from . import prefetch as _prefetch
+        return _prefetch.prefetch(nodes, attrs, max_workers=max_workers, cache=cache)
+
+
+    def memory_report(self, prefix: Union[str, Nsid]='.', depth: int=1) -> '_memory.MemoryReport':
+        """
+        Description:
+            estimate the memory retained by the node at <prefix> and every node below it
+        Input:
+            prefix: NSID of the subtree to report on
+            depth: the report has a total for every subtree rooted this many levels below
+                <prefix>
+        Output:
+            a MemoryReport with the totals per node type and per subtree
+            (see thewired.namespace.memory for what is counted)
+        """
+        return _memory.memory_report(self.get(prefix), prefix, depth=depth)
+
+
+    async def agather(self, nsids: Iterable[Union[str, Nsid]], attr: str, max_concurrency: int=16,
+            return_exceptions: bool=False) -> List[Any]:
+        """
+        Description:
+            concurrently get the same attribute from many nodes on the running event loop
+        Input:
+            nsids: NSIDs of the nodes to read <attr> from
+            attr: attribute name; resolved with node.aget() where the node supports it
+                (e.g. SecondLifeNode), else with plain getattr()
+            max_concurrency: how many attribute resolutions may be in flight at once
+            return_exceptions: passed to asyncio.gather; if True, failures are returned in
+                place of their values instead of raising the first one
+        Output:
+            list of attribute values in the same order as <nsids>
+        """
+        import asyncio
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def resolve(nsid):
+            async with semaphore:
+                node = self.get(nsid)
+                aget = getattr(node, 'aget', None)
+                if aget is None:
+                    return getattr(node, attr)
+                return await aget(attr)
+
+        return await asyncio.gather(*[resolve(nsid) for nsid in nsids], return_exceptions=return_exceptions)
+
     def __repr__(self):
         return f"Namespace(root={self.root})"
 
@@ -362,16 +528,33 @@ class NamespaceHandle(Namespace):
 
 
     def __getattr__(self, attr):
-        saved_root = self.ns.root
-        self.ns.root = self.root
+        """
+        Description:
+            attributes of the wrapped namespace (or of the namespaces under stacked handles),
+            else attributes of the handle's root node
 
-        retval = getattr(self.ns, attr)
-        self.ns.root = saved_root
-        return retval
+        Notes:
+            this used to swap the wrapped namespace's root for the handle's root around a
+            getattr(), which sent lookups from every other thread using that namespace to
+            the wrong root, and could leave it there when two handles interleaved
+        """
+        if attr in ('ns', 'root', 'prefix'):
+            #- not set yet (e.g. while unpickling); don't recurse looking for them
+            raise AttributeError(attr)
+
+        ns = self.ns
+        while True:
+            try:
+                return object.__getattribute__(ns, attr)
+            except AttributeError:
+                pass
+            if not isinstance(ns, NamespaceHandle):
+                break
+            ns = ns.ns
+        return getattr(self.root, attr)
 
 
     def get(self, nsid:Union[str,Nsid]) -> NamespaceNodeBase:
-        log = LoggerAdapter(logger, dict(name_ext=f"{self.__class__.__name__}.get: {self.prefix=}"))
         if nsid == self.delineator:
             real_nsid = self.prefix
         elif is_valid_nsid_ref(nsid):
@@ -381,7 +564,9 @@ class NamespaceHandle(Namespace):
         else:
             real_nsid = self.prefix + nsid
 
-        log.debug(f"getting {real_nsid=}")
+        if enabled_for(DEBUG, logger):
+            log = make_log_adapter(logger, self.__class__, "get")
+            log.debug(f"{self.prefix=}: getting {real_nsid=}")
         real_node = self.ns.get(real_nsid)
         if callable(real_node):
             return CallableHandleNode(real_node, ns_handle=self)
@@ -390,34 +575,45 @@ class NamespaceHandle(Namespace):
 
 
     def add(self, nsid:Union[str,Nsid], *args, **kwargs) -> List[NamespaceNodeBase]:
-        log = LoggerAdapter(logger, dict(name_ext=f"{self.__class__.__name__}.add: {self.prefix=}"))
+        log = make_log_adapter(logger, self.__class__, "add")
         real_nsid = self.prefix + nsid
 
-        log.debug(f"adding {real_nsid=}")
+        if enabled_for(DEBUG, logger):
+            log.debug(f"{self.prefix=}: adding {real_nsid=}")
         return self.ns.add(real_nsid, *args, **kwargs)
 
 
     def remove(self, nsid:Union[str,Nsid]) -> NamespaceNodeBase:
-        log = LoggerAdapter(logger, dict(name_ext=f"{self.__class__.__name__}.remove: {self.prefix=}"))
+        log = make_log_adapter(logger, self.__class__, "remove")
         real_nsid = self.prefix + nsid
 
-        log.debug(f"removing: {real_nsid=}")
+        if enabled_for(DEBUG, logger):
+            log.debug(f"{self.prefix=}: removing: {real_nsid=}")
         return self.ns.remove(real_nsid)
 
 
+    def add_removal_listener(self, nsid:Union[str,Nsid], callback) -> str:
+        real_nsid = self.prefix if nsid == self.delineator else self.prefix + nsid
+        return self.ns.add_removal_listener(real_nsid, callback)
+
+
     def get_subnodes(self, start_node_nsid):
-        log = LoggerAdapter(logger, dict(name_ext=f"{self.__class__.__name__}.get_subnodes: {self.prefix=}"))
-        log.debug(f"{start_node_nsid=}")
+        log = make_log_adapter(logger, self.__class__, "get_subnodes")
+        debug = enabled_for(DEBUG, logger)
+        if debug:
+            log.debug(f"{self.prefix=}: {start_node_nsid=}")
         start_node = self.get(start_node_nsid)
         for attr_name in dir(start_node):
             attr = getattr(start_node, attr_name)
             if isinstance(attr, NamespaceNodeBase):
                 handle_node = HandleNode(attr, self)
-                log.debug(f"yielding {handle_node=}")
+                if debug:
+                    log.debug(f"yielding {handle_node=}")
                 yield handle_node
                 next_nsid = '.' + self.strip_prefix(str(attr.nsid))
 
-                log.debug(f"{next_nsid=}")
+                if debug:
+                    log.debug(f"{next_nsid=}")
                 yield from self.get_subnodes(next_nsid)
 
     def get_leaf_nodes(self, start_node_nsid):
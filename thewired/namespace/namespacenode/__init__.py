@@ -5,9 +5,28 @@ Purpose:
 
     All the NamespaceNode subclasses in this package are limited in definition and
     semantics to specific use cases.
+
+    the node types are imported on first use (see thewired.util.lazy_attributes)
 """
-from .namespacenode import NamespaceNode
-from .base import NamespaceNodeBase
-from .secondlife import SecondLifeNode, CallableSecondLifeNode
-from .delegate import DelegateNode, CallableDelegateNode
-from .handle import HandleNode, CallableHandleNode
+from thewired.util import lazy_attributes
+
+_lazy_names = {
+    'NamespaceNode': '.namespacenode',
+    'NamespaceNodeBase': '.base',
+    'SecondLifeNode': '.secondlife',
+    'CallableSecondLifeNode': '.secondlife',
+    'DelegateNode': '.delegate',
+    'CallableDelegateNode': '.delegate',
+    'HandleNode': '.handle',
+    'CallableHandleNode': '.handle',
+}
+
+__all__ = list(_lazy_names)
+__getattr__, __dir__ = lazy_attributes(__name__, _lazy_names)
+
+if False:  # typing.TYPE_CHECKING
+    from .namespacenode import NamespaceNode
+    from .base import NamespaceNodeBase
+    from .secondlife import SecondLifeNode, CallableSecondLifeNode
+    from .delegate import DelegateNode, CallableDelegateNode
+    from .handle import HandleNode, CallableHandleNode
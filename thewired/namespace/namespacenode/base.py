@@ -6,14 +6,13 @@ Notes:
     *in progress being factored out from namespacenode module*
 """
 
-from logging import getLogger
+from logging import getLogger, DEBUG
 from types import SimpleNamespace
 from typing import Union
 
 from thewired.namespace.nsid import Nsid
 
-#from thewired.loginfo import make_log_adapter
-from logging import LoggerAdapter
+from thewired.loginfo import make_log_adapter, enabled_for
 
 ###
 # type aliases
@@ -44,13 +43,31 @@ class NamespaceNodeBase(SimpleNamespace):
         Input:
             nsid: namespace id of this node
         """
-        log = LoggerAdapter(logger, dict(name_ext=f"NamespaceNodeBase.__init__"))
-        log.debug(f"calling super().__init__: {nsid=} | {namespace=} | {args=} | {kwargs=}")
+        debug = enabled_for(DEBUG, logger)
+        if debug:
+            log = make_log_adapter(logger, NamespaceNodeBase, "__init__")
+            log.debug(f"calling super().__init__: {nsid=} | {namespace=} | {args=} | {kwargs=}")
         super().__init__(*args, **kwargs)
         self.nsid = Nsid(nsid)
         self._ns = namespace
         self._cache = None
-        log.debug("exiting")
+        if debug:
+            log.debug("exiting")
 
     def __repr__(self):
         return f"{self.__class__.__name__}(nsid=\"{self.nsid}\")"
+
+    def __reduce__(self):
+        #- SimpleNamespace's __reduce__ calls the class without arguments, but nodes need an
+        #- nsid and a namespace; rebuild the instance without __init__ and restore its state
+        return (_new_node, (self.__class__,), self.__dict__)
+
+    def __setstate__(self, state):
+        #- defined here so that unpickling does not probe node __getattr__ methods (e.g.
+        #- SecondLifeNode's) on an instance whose attributes are not restored yet
+        self.__dict__.update(state)
+
+
+
+def _new_node(cls):
+    return cls.__new__(cls)
@@ -14,7 +14,6 @@ class DelegateNode(NamespaceNodeBase):
         self._delegate = delegate
 
     def __getattr__(self, attr):
-        log = LoggerAdapter(logger, dict(name_ext=f"{self.__class__.__name__}.__getattr__"))
         #log.debug(f"__getattr__: {attr=}")
         return getattr(self._delegate, attr)
 
@@ -9,18 +9,80 @@ Purpose:
 
 """
 
+import contextvars
+import inspect
+import time
+from collections.abc import Mapping
+from functools import partial
+
 from .base import NamespaceNodeBase
-from thewired.namespace.nsid import is_valid_nsid_link
-from thewired.exceptions import NamespaceLookupError,SecondLifeNsLookupError
+from thewired.namespace.nsid import is_valid_nsid_link, get_nsid_from_link
+from thewired.exceptions import NamespaceLookupError, SecondLifeError, SecondLifeNsLookupError
+from thewired.ttlcache import TTLCache, MISSING
+from thewired.singleflight import SingleFlight
+from thewired.refresher import get_default_refresher
+from thewired import metrics as _metrics
+from thewired.spans import span as _span
 
-from logging import getLogger, LoggerAdapter
+from logging import getLogger, LoggerAdapter, DEBUG
+from thewired.loginfo import make_log_adapter, enabled_for
 
 logger = getLogger(__name__)
 
+#- coalesces concurrent provider calls for the same (node, attribute)
+_provider_flights = SingleFlight()
+
+
+def is_async_provider(provider):
+    """
+    Description:
+        True if calling <provider> returns a coroutine (coroutine functions, partials of
+        them, and objects with an `async def __call__`)
+    """
+    return inspect.iscoroutinefunction(provider) or \
+        inspect.iscoroutinefunction(getattr(provider, '__call__', None))
+
+
+def call_provider(provider, *args, **kwargs):
+    """
+    Description:
+        call a provider from synchronous code. Async providers are run to completion on a
+        new event loop, which is only possible when no event loop is already running in
+        this thread; inside a running loop, use the awaitable accessors instead.
+    """
+    if not is_async_provider(provider):
+        return provider(*args, **kwargs)
+
+    #- asyncio is imported when first needed; it is a large share of the package's import time
+    import asyncio
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(provider(*args, **kwargs))
+    raise SecondLifeError(f"can not synchronously call async provider {provider} from inside a running event loop. Use aget()/acall()")
+
+
+async def acall_provider(provider, *args, **kwargs):
+    """
+    Description:
+        call a provider from async code. Async providers are awaited; synchronous providers
+        are run in the event loop's default executor so they do not block the loop
+    """
+    import asyncio
+    if is_async_provider(provider):
+        return await provider(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    #- executor threads don't inherit the caller's context (request id, span collectors)
+    return await loop.run_in_executor(None, contextvars.copy_context().run, partial(provider, *args, **kwargs))
+
 
 
 class SecondLifeNode(NamespaceNodeBase):
-    def __init__(self, *args, nsid, namespace, secondlife_ns=None, secondlife=None, **kwargs):
+    #- secondlife keys that configure the node instead of providing an attribute
+    cache_meta_key = '__cache__'
+    coalesce_meta_key = '__coalesce__'
+
+    def __init__(self, *args, nsid, namespace, secondlife_ns=None, secondlife=None, cache=None, coalesce=None, **kwargs):
         """
         Input:
             nsid: NSID string
@@ -31,32 +93,68 @@ class SecondLifeNode(NamespaceNodeBase):
                     * NSID - value of the attribute is return value from invoking the Node given by the NSID
                         - thus the node referred to must be callable
                     * anything else - if it doesn't match the others, return this value exactly as it is
+                the special "__cache__" and "__coalesce__" keys are not attributes; they hold the
+                options of the same names (see below)
+            cache: opt-in cache for the return values of callable providers. Overrides "__cache__". One of:
+                * None/False - call the provider on every access (default)
+                * True - cache with the TTLCache defaults
+                * mapping of TTLCache keyword arguments ("ttl", "maxsize", "stale_ttl", "jitter")
+                  plus an optional "attributes" list to only cache some of the attributes.
+                  With a "stale_ttl", an expired value is still returned for that many seconds
+                  while the default BackgroundRefresher calls the provider again
+                * a TTLCache instance
+            coalesce: if True, concurrent reads of the same attribute on this node share one
+                in-flight provider call and its result or exception. Overrides "__coalesce__"
         """
-        log = LoggerAdapter(logger, dict(name_ext=f'SecondLifeNode.__init__'))
-        log.debug("entering")
-        log.debug(f"Calling super().__init__: {args=} | {nsid=} | {namespace=} | {kwargs=}")
+        debug = enabled_for(DEBUG, logger)
+        if debug:
+            log = make_log_adapter(logger, SecondLifeNode, "__init__")
+            log.debug(f"Calling super().__init__: {args=} | {nsid=} | {namespace=} | {kwargs=}")
         super().__init__(*args, nsid=nsid, namespace=namespace, **kwargs)
+        if secondlife and (self.cache_meta_key in secondlife or self.coalesce_meta_key in secondlife):
+            secondlife = dict(secondlife)
+            cache_options = secondlife.pop(self.cache_meta_key, None)
+            cache = cache if cache is not None else cache_options
+            coalesce_option = secondlife.pop(self.coalesce_meta_key, None)
+            coalesce = coalesce if coalesce is not None else coalesce_option
         self._secondlife = secondlife
+        self._secondlife_coalesce = bool(coalesce)
         self._attribute_lookup_fail_canary = "__ATTRIBUTE_LOOKUP_FAIL_CANARY__"
         self._secondlife_ns = secondlife_ns if secondlife_ns else self._ns
-        log.debug("exiting")
+        self._secondlife_cached_attrs = None
+        if isinstance(cache, Mapping) and 'attributes' in cache:
+            cache = dict(cache)
+            self._secondlife_cached_attrs = frozenset(cache.pop('attributes'))
+        self._secondlife_cache = TTLCache.from_options(cache)
+        #- attr -> (watched nsid, target node) for resolved nsid:// links
+        self._secondlife_links = dict()
+        if debug:
+            log.debug("exiting")
 
     def __getattr__(self, attr):
-        log = LoggerAdapter(logger, dict(name_ext=f'{self.__class__.__name__}.__getattr__'))
-        log.debug(f"entering: {attr=}")
+        #- fast path: nsid:// link that was already resolved
+        try:
+            node = self._secondlife_links[attr][1]
+        except KeyError:
+            pass
+        else:
+            return node() if attr == "__call__" else node
+
+        debug = enabled_for(DEBUG, logger)
+        if debug:
+            log = make_log_adapter(logger, self.__class__, "__getattr__")
+            log.debug(f"entering: {attr=}")
         secondlife_value = None
         raw_attr_value = self._secondlife.get(attr, self._attribute_lookup_fail_canary)
 
         if raw_attr_value == self._attribute_lookup_fail_canary:
             raise AttributeError(f"No such attribute: {attr}")
         if callable(raw_attr_value):
-            secondlife_value = raw_attr_value()
+            secondlife_value = self._provide(attr, raw_attr_value)
         elif is_valid_nsid_link(raw_attr_value):
-            log.debug(f"is_valid_nsid_link: {raw_attr_value=}")
-            try:
-                node = self._secondlife_ns.get(raw_attr_value)
-            except NamespaceLookupError as err:
-                raise SecondLifeNsLookupError(f"dynamic lookup of {raw_attr_value} failed") from err
+            if debug:
+                log.debug(f"is_valid_nsid_link: {raw_attr_value=}")
+            node = self._resolve_link(attr, raw_attr_value)
             if attr == "__call__":
                 secondlife_value = node()
             else:
@@ -66,30 +164,281 @@ class SecondLifeNode(NamespaceNodeBase):
             #- whatever it is, just return it raw
             secondlife_value = raw_attr_value
 
-        log.debug(f"exiting: {secondlife_value=}")
+        if debug:
+            log.debug(f"exiting: {secondlife_value=}")
         return secondlife_value
 
+    def _resolve_link(self, attr, link):
+        """
+        Description:
+            look up the node an nsid:// link points to and remember it for <attr> until the
+            target node, or one of its ancestors, is removed from the secondlife namespace
+        """
+        try:
+            node = self._secondlife_ns.get(link)
+        except NamespaceLookupError as err:
+            raise SecondLifeNsLookupError(f"dynamic lookup of {link} failed") from err
+
+        try:
+            add_removal_listener = self._secondlife_ns.add_removal_listener
+        except AttributeError:
+            #- can't be told when the target goes away, so don't remember it
+            return node
+
+        #- remember the NSID the listener watches, as it will be reported back: the target
+        #- node's own nsid differs when the link path goes through an nsid-ref'd node
+        link_nsid = get_nsid_from_link(link)
+        watched_nsid = add_removal_listener(link_nsid, self._secondlife_link_removed)
+        if watched_nsid is None:
+            watched_nsid = str(link_nsid)
+        self._secondlife_links[attr] = (watched_nsid, node)
+        return node
+
+    def _secondlife_link_removed(self, removed_nsid):
+        for attr, (watched_nsid, _) in list(self._secondlife_links.items()):
+            if watched_nsid == removed_nsid:
+                self._secondlife_links.pop(attr, None)
+
+    def _is_cached_attr(self, attr):
+        return self._secondlife_cache is not None and \
+            (self._secondlife_cached_attrs is None or attr in self._secondlife_cached_attrs)
+
+    def _provide(self, attr, provider):
+        """
+        Description:
+            call the provider for <attr>, going through the result cache if it is enabled for <attr>
+        """
+        if not self._is_cached_attr(attr):
+            return self._call_provider(attr, provider)
+
+        value = self._get_cached(attr)
+        if value is MISSING:
+            value = self._call_provider(attr, provider, store=True)
+        return value
+
+    def _get_cached(self, attr):
+        """
+        Description:
+            read <attr> from the result cache. A stale value (see "stale_ttl") is returned as
+            well, after a background refresh has been requested for it
+        """
+        if not self._secondlife_cache.stale_ttl:
+            value, expired_for = self._secondlife_cache.get(attr), None
+        else:
+            value, expired_for = self._secondlife_cache.get_entry(attr)
+            if expired_for is not None:
+                get_default_refresher().submit((id(self), attr), self.refresh, attr, staleness=expired_for)
+
+        registry = _metrics.registry
+        if registry is not None:
+            result = 'miss' if value is MISSING else 'hit' if expired_for is None else 'stale'
+            registry.count_cache(self.nsid, result)
+        return value
+
+    def _call_provider(self, attr, provider, store=False):
+        """
+        Description:
+            the one place a provider is actually called from synchronous code. With coalescing
+            on, concurrent callers for the same attribute share a single call
+        Input:
+            store: put the result in the result cache before waking any waiting callers
+        """
+        if self._secondlife_coalesce:
+            return _provider_flights.do((id(self), str(self.nsid), attr), self._call_and_store, attr, provider, store)
+        return self._call_and_store(attr, provider, store)
+
+    def _call_and_store(self, attr, provider, store):
+        registry = _metrics.registry
+        with _span('provider', f'{self.nsid}.{attr}'):
+            if registry is None:
+                value = call_provider(provider)
+            else:
+                start = time.perf_counter()
+                try:
+                    value = call_provider(provider)
+                finally:
+                    registry.observe_provider(self.nsid, attr, time.perf_counter() - start)
+        if store:
+            self._secondlife_cache.set(attr, value)
+        return value
+
+    async def _acall_provider(self, attr, provider, store=False):
+        if self._secondlife_coalesce:
+            return await _provider_flights.ado((id(self), str(self.nsid), attr), self._acall_and_store, attr, provider, store)
+        return await self._acall_and_store(attr, provider, store)
+
+    async def _acall_and_store(self, attr, provider, store):
+        registry = _metrics.registry
+        with _span('provider', f'{self.nsid}.{attr}'):
+            if registry is None:
+                value = await acall_provider(provider)
+            else:
+                start = time.perf_counter()
+                try:
+                    value = await acall_provider(provider)
+                finally:
+                    registry.observe_provider(self.nsid, attr, time.perf_counter() - start)
+        if store:
+            self._secondlife_cache.set(attr, value)
+        return value
+
+    async def _aprovide(self, attr, provider):
+        """
+        Description:
+            awaitable version of _provide
+        """
+        if not self._is_cached_attr(attr):
+            return await self._acall_provider(attr, provider)
+
+        value = self._get_cached(attr)
+        if value is MISSING:
+            value = await self._acall_provider(attr, provider, store=True)
+        return value
+
+    async def aget(self, attr):
+        """
+        Description:
+            awaitable attribute access. Same lookup rules as plain attribute access, but
+            async providers are awaited on the running loop and synchronous providers are
+            run in the loop's default executor
+        Input:
+            attr: name of the attribute to get
+        """
+        try:
+            return object.__getattribute__(self, attr)
+        except AttributeError:
+            pass
+
+        try:
+            node = self._secondlife_links[attr][1]
+        except KeyError:
+            raw_attr_value = self._secondlife.get(attr, self._attribute_lookup_fail_canary)
+            if raw_attr_value == self._attribute_lookup_fail_canary:
+                raise AttributeError(f"No such attribute: {attr}")
+            if callable(raw_attr_value):
+                return await self._aprovide(attr, raw_attr_value)
+            elif not is_valid_nsid_link(raw_attr_value):
+                return raw_attr_value
+            node = self._resolve_link(attr, raw_attr_value)
+
+        if attr == "__call__":
+            return await acall_provider(node)
+        return node
+
+    def provider_attributes(self):
+        """
+        Output:
+            set of attribute names that are backed by a callable provider
+        """
+        return set(attr for attr, value in self._secondlife.items() if callable(value))
+
+    def is_cached(self, attr):
+        """
+        Output:
+            True if provider results for <attr> are kept in the result cache
+        """
+        return self._is_cached_attr(attr)
+
+    def enable_cache(self, cache=True):
+        """
+        Description:
+            turn on the provider result cache if this node doesn't already have one
+        Input:
+            cache: same forms as the `cache` constructor argument
+        """
+        if self._secondlife_cache is None:
+            self._secondlife_cache = TTLCache.from_options(cache)
+        return self._secondlife_cache
+
+    def refresh(self, attr):
+        """
+        Description:
+            call the provider for <attr> now, bypassing any cached value, and store the result
+            in the cache (if caching is on for <attr>)
+        Output:
+            the fresh value
+        """
+        provider = self._secondlife.get(attr, self._attribute_lookup_fail_canary)
+        if provider == self._attribute_lookup_fail_canary:
+            raise AttributeError(f"No such attribute: {attr}")
+        if not callable(provider):
+            return getattr(self, attr)
+
+        return self._call_provider(attr, provider, store=self._is_cached_attr(attr))
+
+    def invalidate(self, attr):
+        """
+        Description:
+            forget the cached provider result for <attr> so the next access calls the provider again
+        """
+        if self._secondlife_cache is not None:
+            self._secondlife_cache.invalidate(attr)
+
+    def invalidate_all(self):
+        """
+        Description:
+            forget every cached provider result on this node
+        """
+        if self._secondlife_cache is not None:
+            self._secondlife_cache.clear()
+
+    def cache_info(self):
+        """
+        Output:
+            CacheInfo(hits, misses, maxsize, currsize) namedtuple, or None if caching is off
+        """
+        if self._secondlife_cache is None:
+            return None
+        return self._secondlife_cache.cache_info()
+
     def __repr__(self):
         return f"{self.__class__.__name__}(nsid={self.nsid}, namespace={self._ns}, secondlifens={self._secondlife_ns},secondlife={self._secondlife})"
 
 
 class CallableSecondLifeNode(SecondLifeNode):
-    def __init__(self, *args, nsid, namespace, secondlife_ns=None, secondlife=None, **kwargs):
-        log = LoggerAdapter(logger, dict(name_ext=f'CallableSecondLifeNode.__init__'))
-        log.debug("entering")
-        log.debug(f"Calling super().__init__: {args=} | {nsid=} | {namespace=} | {secondlife_ns=} | {secondlife=} | {kwargs=}")
-        super().__init__(*args, nsid=nsid, namespace=namespace, secondlife_ns=secondlife_ns, secondlife=secondlife, **kwargs)
-        log.debug("exiting")
+    def __init__(self, *args, nsid, namespace, secondlife_ns=None, secondlife=None, cache=None, coalesce=None, **kwargs):
+        if enabled_for(DEBUG, logger):
+            log = make_log_adapter(logger, CallableSecondLifeNode, "__init__")
+            log.debug(f"Calling super().__init__: {args=} | {nsid=} | {namespace=} | {secondlife_ns=} | {secondlife=} | {kwargs=}")
+        super().__init__(*args, nsid=nsid, namespace=namespace, secondlife_ns=secondlife_ns, secondlife=secondlife, cache=cache,
+                coalesce=coalesce, **kwargs)
 
     def __call__(self, *args, **kwargs):
-        log = LoggerAdapter(logger, dict(name_ext=f'{self.__class__.__name__}.__call__'))
-        log.debug(f"Entering: {args=} | {kwargs=}")
+        debug = enabled_for(DEBUG, logger)
+        if debug:
+            log = make_log_adapter(logger, self.__class__, "__call__")
+            log.debug(f"Entering: {args=} | {kwargs=}")
+        callable_node = self._secondlife.get('__call__', self._attribute_lookup_fail_canary)
+        if callable_node == self._attribute_lookup_fail_canary:
+            if debug:
+                log.debug("No __call__ key in secondlifedict")
+            return None
+
+        with _span('provider', f'{self.nsid}()'):
+            x = call_provider(callable_node, *args, **kwargs)
+        if debug:
+            log.debug(f"secondlife['__call__']() returned {x}")
+        self._cache = x
+        return x
+
+    async def acall(self, *args, **kwargs):
+        """
+        Description:
+            awaitable version of calling this node
+        """
+        debug = enabled_for(DEBUG, logger)
+        if debug:
+            log = make_log_adapter(logger, self.__class__, "acall")
+            log.debug(f"Entering: {args=} | {kwargs=}")
         callable_node = self._secondlife.get('__call__', self._attribute_lookup_fail_canary)
         if callable_node == self._attribute_lookup_fail_canary:
-            log.debug("No __call__ key in secondlifedict")
+            if debug:
+                log.debug("No __call__ key in secondlifedict")
             return None
 
-        x = callable_node(*args, **kwargs)
-        log.debug(f"secondlife['__call__']() returned {x}")
+        with _span('provider', f'{self.nsid}()'):
+            x = await acall_provider(callable_node, *args, **kwargs)
+        if debug:
+            log.debug(f"secondlife['__call__']() returned {x}")
         self._cache = x
         return x
@@ -12,7 +12,8 @@ imported
 
 import logging
 import re
-from typing import List
+from functools import lru_cache
+from typing import Iterator, List, Tuple, Union
 
 from thewired.loginfo import make_log_adapter
 from thewired.exceptions import NsidError, InvalidNsidError, NsidSanitizationError
@@ -49,7 +50,6 @@ class Nsid(NsidBase):
             nsid: the string to be converted into an NSID
         """
         super().__init__()
-        log = make_log_adapter(logger, self.__class__, '__init__')
         self.nsid = ''
 
         validate_nsid(nsid, symrefs_ok=False, fully_qualified=fully_qualified)
@@ -57,6 +57,19 @@ class Nsid(NsidBase):
         self.nsid = str(nsid)
 
 
+    @classmethod
+    def trusted(cls, nsid: str, separator=None) -> 'Nsid':
+        """
+        Description:
+            make an Nsid from a string the caller has already validated, without validating
+            it again (e.g. a validated parent NSID joined with a validated segment)
+        """
+        obj = cls.__new__(cls)
+        NsidBase.__init__(obj, separator)
+        obj.nsid = nsid
+        return obj
+
+
     def __repr__(self):
         return f'Nsid({self.nsid})'
 
@@ -76,8 +89,6 @@ def validate_nsid(nsid, nsid_root_ok=True, symrefs_ok=True, separator='.', fully
 
 
 def is_valid_nsid_str(nsid, nsid_root_ok=True, symrefs_ok=True, separator='.', fully_qualified=True):
-    log = make_log_adapter(logger, None, 'is_valid_nsid_str')
-
     if isinstance(nsid, Nsid):
         #- already has been validated
         #- this technically could allow someone to instantiate
@@ -121,14 +132,12 @@ def is_valid_nsid_str(nsid, nsid_root_ok=True, symrefs_ok=True, separator='.', f
 
 
 def is_valid_nsid_link(symref, separator='.'):
-    log = make_log_adapter(logger, None, 'is_valid_nsid_link')
-    if symref.startswith(Nsid.nsid_link_prefix):
+    if isinstance(symref, str) and symref.startswith(Nsid.nsid_link_prefix):
         prefix,nsid = symref.split(Nsid.nsid_link_prefix)
         return is_valid_nsid_str(nsid, symrefs_ok=False, separator=separator)
 
 def is_valid_nsid_ref(ref, separator='.'):
-    log = make_log_adapter(logger, None, 'is_valid_nsid_ref')
-    if ref.startswith(Nsid.nsid_ref_prefix):
+    if isinstance(ref, str) and ref.startswith(Nsid.nsid_ref_prefix):
         prefix,nsid = ref.split(Nsid.nsid_ref_prefix)
         return is_valid_nsid_str(nsid, symrefs_ok=False, separator=separator)
 
@@ -155,7 +164,6 @@ def sanitize_nsid(nsid, separator='.'):
 
 
 def make_child_nsid(parent_nsid, child, separator='.'):
-    log = make_log_adapter(logger, None, 'make_child_nsid') 
     if is_valid_nsid_str(parent_nsid, separator=separator, fully_qualified=False):
         if  is_valid_nsid_str(child, separator=separator, fully_qualified=False):
             if parent_nsid == separator:    #is root?
@@ -197,22 +205,36 @@ def list_nsid_segments(nsid, separator='.', skip_root=False) -> List:
             segments.remove(segments[0])
     return segments
 
-def find_common_prefix(nsid1, nsid2, separator='.'):
-    nsid1 = str(nsid1) if isinstance(nsid1, Nsid) else nsid1
-    nsid2 = str(nsid2) if isinstance(nsid2, Nsid) else nsid2
-
-    nsid1_parts = get_nsid_parts(nsid1, separator=separator)
-    nsid2_parts = get_nsid_parts(nsid2, separator=separator)
+def split_common_prefix(nsid1, nsid2, separator='.') -> Tuple[Union[str, None], str, str]:
+    """
+    Description:
+        single pass over both NSIDs that finds their common prefix and strips it from each
+    Input:
+        nsid1: first NSID (str or Nsid)
+        nsid2: second NSID (str or Nsid)
+    Output:
+        3-tuple of (common_prefix, nsid1 remainder, nsid2 remainder)
+        common_prefix is None when the two NSIDs share no leading segment, in which case
+        the remainders are the unmodified inputs
+    """
+    nsid1_parts = str(nsid1).split(separator)
+    nsid2_parts = str(nsid2).split(separator)
 
     i = 0
-    while (i < len(nsid1_parts) and
-            i < len(nsid2_parts) and
-            nsid1_parts[i] == nsid2_parts[i]):
+    max_i = min(len(nsid1_parts), len(nsid2_parts))
+    while i < max_i and nsid1_parts[i] == nsid2_parts[i]:
         i += 1
+
     if i == 0:
-        return None
-    else:
-        return separator.join(nsid1_parts[0:i])
+        return None, separator.join(nsid1_parts), separator.join(nsid2_parts)
+
+    return (separator.join(nsid1_parts[0:i]),
+            separator.join(nsid1_parts[i:]),
+            separator.join(nsid2_parts[i:]))
+
+
+def find_common_prefix(nsid1, nsid2, separator='.'):
+    return split_common_prefix(nsid1, nsid2, separator=separator)[0]
 
 
 def strip_schema(nsid):
@@ -230,41 +252,53 @@ def strip_prefix(prefix, nsid, separator='.'):
 
 
 def strip_common_prefix(nsid1, nsid2, separator='.'):
-    nsid1 = str(nsid1)
-    nsid2 = str(nsid2)
-    common_prefix = find_common_prefix(nsid1, nsid2, separator=separator)
-    common_prefix_len = len(common_prefix.split(separator))
-
-    stripped_nsid1 = list()
-    common_prefix_parts = common_prefix.split(separator)
-    for n, part in enumerate(nsid1.split(separator)):
-        if n > len(common_prefix_parts) - 1:
-            stripped_nsid1.append(part)
-    stripped_nsid1 = separator.join(stripped_nsid1)
-
-    #- same thing for nsid2
-    stripped_nsid2 = list()
-    common_prefix_parts = common_prefix.split(separator)
-    for n, part in enumerate(nsid2.split(separator)):
-        if n > len(common_prefix_parts) - 1:
-            stripped_nsid2.append(part)
-    stripped_nsid2 = separator.join(stripped_nsid2)
-
-    return stripped_nsid1, stripped_nsid2
-
-
-def get_nsid_ancestry(nsid, separator='.'): 
-    nsid_segments = get_nsid_parts(nsid)
-    ancestry = list()
-    for i in range(len(nsid_segments)):
-        new_ancestor_segments = list()
-        for n in range(i+1):
-            new_ancestor_segments.append(nsid_segments[n])
-        new_ancestor = separator.join(new_ancestor_segments)
-        if new_ancestor == '':
-            new_ancestor = separator
-        ancestry.append(new_ancestor)
-    return ancestry
+    return split_common_prefix(nsid1, nsid2, separator=separator)[1:]
+
+
+def iter_nsid_ancestry(nsid, separator='.') -> Iterator[str]:
+    """
+    Description:
+        lazily yield every ancestor of an NSID, from the root down to and including the
+        NSID itself. Each ancestor is a single slice of the input string, so this is
+        linear in the depth of the NSID and stops doing work as soon as the caller does.
+    Input:
+        nsid: fully qualified or relative NSID (str or Nsid)
+    Output:
+        generator of NSID strings
+    """
+    nsid = str(nsid)
+    if nsid in ('', separator):
+        yield separator
+        return
+
+    end = nsid.find(separator)
+    if end == 0:
+        #- fully qualified: root comes first
+        yield separator
+        end = nsid.find(separator, 1)
+
+    while end != -1:
+        yield nsid[:end]
+        end = nsid.find(separator, end + 1)
+    yield nsid
+
+
+@lru_cache(maxsize=4096)
+def _cached_nsid_ancestry(nsid: str, separator: str) -> Tuple[str, ...]:
+    return tuple(iter_nsid_ancestry(nsid, separator=separator))
+
+
+def cached_nsid_ancestry(nsid, separator='.') -> Tuple[str, ...]:
+    """
+    Description:
+        same as iter_nsid_ancestry, but returns an immutable tuple that is memoized per NSID
+        string. Use this for NSIDs that are looked up over and over again.
+    """
+    return _cached_nsid_ancestry(str(nsid), separator)
+
+
+def get_nsid_ancestry(nsid, separator='.') -> List[str]:
+    return list(iter_nsid_ancestry(nsid, separator=separator))
 
 
 def nsid_basename(nsid, separator='.'):
@@ -0,0 +1,194 @@
+"""
+Purpose:
+    mapping type keyed by NSID that stores its keys as a tree of NSID segments
+
+    lookups, inserts and deletes walk one trie level per NSID segment, so they cost
+    O(depth) regardless of how many keys are stored. The tree shape also makes
+    "closest configured ancestor" (longest prefix) and "everything under this prefix"
+    queries just as cheap, instead of needing a linear scan over all the keys.
+"""
+
+from collections.abc import MutableMapping
+from typing import Any, Iterator, Tuple, Union
+
+from thewired.namespace.nsid import Nsid
+
+
+class _TrieNode(object):
+    __slots__ = ('children', 'value')
+
+    def __init__(self):
+        self.children = dict()
+        self.value = _EMPTY
+
+
+#- marks trie nodes that exist only as a path to deeper keys
+_EMPTY = object()
+
+
+class NsidTrie(MutableMapping):
+    """
+    Description:
+        MutableMapping from NSID strings to arbitrary values
+
+        Keys may be fully qualified (".a.b") or relative ("a.b"); Nsid objects are
+        accepted anywhere a key is and are stored by their string value.
+        The root NSID "." is an ancestor of every fully qualified key.
+    """
+    def __init__(self, mapping=None, separator='.'):
+        """
+        Input:
+            mapping: optional mapping of NSIDs to values to initially populate the trie
+            separator: NSID segment separator
+        """
+        self.separator = separator
+        self._root = _TrieNode()
+        self._len = 0
+        if mapping:
+            self.update(mapping)
+
+
+    def _segments(self, nsid: Union[str, Nsid]) -> Tuple[str, ...]:
+        nsid = str(nsid)
+        if nsid == self.separator:
+            return ('',)
+        return tuple(nsid.split(self.separator))
+
+
+    def _find(self, nsid):
+        node = self._root
+        for segment in self._segments(nsid):
+            try:
+                node = node.children[segment]
+            except KeyError:
+                return None
+        return node
+
+
+    def __getitem__(self, nsid):
+        node = self._find(nsid)
+        if node is None or node.value is _EMPTY:
+            raise KeyError(nsid)
+        return node.value
+
+
+    def __setitem__(self, nsid, value):
+        node = self._root
+        for segment in self._segments(nsid):
+            try:
+                node = node.children[segment]
+            except KeyError:
+                node.children[segment] = node = _TrieNode()
+        if node.value is _EMPTY:
+            self._len += 1
+        node.value = value
+
+
+    def __delitem__(self, nsid):
+        path = [self._root]
+        segments = self._segments(nsid)
+        for segment in segments:
+            try:
+                path.append(path[-1].children[segment])
+            except KeyError:
+                raise KeyError(nsid) from None
+
+        if path[-1].value is _EMPTY:
+            raise KeyError(nsid)
+        path[-1].value = _EMPTY
+        self._len -= 1
+
+        #- prune trie nodes that no longer lead to any value
+        for n in range(len(segments), 0, -1):
+            node = path[n]
+            if node.value is not _EMPTY or node.children:
+                break
+            del path[n-1].children[segments[n-1]]
+
+
+    def __contains__(self, nsid):
+        node = self._find(nsid)
+        return node is not None and node.value is not _EMPTY
+
+
+    def __len__(self):
+        return self._len
+
+
+    def __iter__(self) -> Iterator[str]:
+        for key, _ in self._walk(self._root, []):
+            yield key
+
+
+    def _make_key(self, segments):
+        if segments == ['']:
+            return self.separator
+        return self.separator.join(segments)
+
+
+    def _walk(self, node, segments):
+        #- iterative depth-first walk; deep NSIDs should not hit the recursion limit
+        stack = [(node, segments)]
+        while stack:
+            node, segments = stack.pop()
+            if node.value is not _EMPTY:
+                yield self._make_key(segments), node.value
+            for segment in reversed(list(node.children)):
+                stack.append((node.children[segment], segments + [segment]))
+
+
+    def items(self, prefix: Union[str, Nsid, None]=None) -> Iterator[Tuple[str, Any]]:
+        """
+        Description:
+            iterate over (nsid, value) pairs, optionally only those at or below <prefix>
+        Input:
+            prefix: only yield keys that are equal to, or descendants of, this NSID
+        """
+        if prefix is None:
+            return self._walk(self._root, [])
+
+        segments = list(self._segments(prefix))
+        node = self._find(prefix)
+        if node is None:
+            return iter(())
+        return self._walk(node, segments)
+
+
+    def longest_prefix(self, nsid: Union[str, Nsid]) -> Tuple[str, Any]:
+        """
+        Description:
+            find the deepest key that is equal to, or an ancestor of, <nsid>
+        Output:
+            (key, value) 2-tuple of the closest match
+            raises KeyError if no key is a prefix of <nsid>
+        """
+        node = self._root
+        segments = self._segments(nsid)
+        best_depth = -1
+        best_value = _EMPTY
+
+        for depth, segment in enumerate(segments):
+            try:
+                node = node.children[segment]
+            except KeyError:
+                break
+            if node.value is not _EMPTY:
+                best_depth = depth
+                best_value = node.value
+
+        if best_value is _EMPTY:
+            raise KeyError(nsid)
+        return self._make_key(list(segments[0:best_depth+1])), best_value
+
+
+    def depth(self, nsid: Union[str, Nsid]) -> int:
+        """
+        Description:
+            number of trie levels an NSID occupies. Useful to measure the distance between
+            a key and the match returned by longest_prefix()
+        """
+        return len(self._segments(nsid))
+
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self.items())})"
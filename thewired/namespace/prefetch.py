@@ -0,0 +1,103 @@
+"""
+Purpose:
+    fill the provider result caches of many SecondLifeNodes at once, so that a following
+    burst of synchronous attribute reads (e.g. rendering a report) never waits on a
+    provider
+
+    the provider calls are run on a thread pool, as they are expected to be I/O bound
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger, DEBUG
+from typing import Dict, Iterable, Tuple, Union
+
+from thewired.exceptions import PrefetchError
+from thewired.loginfo import make_log_adapter, enabled_for
+
+logger = getLogger(__name__)
+
+
+class PrefetchReport(object):
+    """
+    Description:
+        outcome of a prefetch run
+        fetched: number of (node, attribute) pairs successfully stored
+        errors: maps (nsid, attribute) to the exception its provider raised
+    """
+    def __init__(self):
+        self.fetched = 0
+        self.errors: Dict[Tuple[str, str], BaseException] = dict()
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def raise_for_errors(self):
+        """
+        Description:
+            raise a PrefetchError carrying every collected failure, if there were any
+        """
+        if self.errors:
+            raise PrefetchError(self.errors)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(fetched={self.fetched}, errors={len(self.errors)})"
+
+
+def prefetch(nodes, attrs: Union[str, Iterable[str]], max_workers: int=8, cache=None) -> PrefetchReport:
+    """
+    Description:
+        call the providers for <attrs> on every node that provides them, on a thread pool,
+        and store the results in each node's result cache
+
+    Input:
+        nodes: iterable of nodes; nodes without a refresh() method (i.e. not SecondLifeNodes)
+            are skipped, as are attributes a node does not back with a callable provider or
+            does not cache (e.g. left out of its "attributes" cache option)
+        attrs: attribute name or names to prefetch
+        max_workers: thread pool size
+        cache: None to only warm the caches nodes already have; otherwise cache options
+            (see TTLCache.from_options) used to turn on a cache, for good, on the nodes that
+            have none. Note that True means a cache without expiry
+
+    Output:
+        PrefetchReport; failures are collected per (nsid, attribute) instead of raised
+    """
+    log = make_log_adapter(logger, None, 'prefetch')
+    debug = enabled_for(DEBUG, logger)
+    attrs = [attrs] if isinstance(attrs, str) else list(attrs)
+
+    jobs = list()
+    for node in nodes:
+        try:
+            provided = node.provider_attributes()
+        except AttributeError:
+            continue
+        wanted = [attr for attr in attrs if attr in provided]
+        if wanted and cache is not None:
+            node.enable_cache(cache)
+        #- a refresh of an attribute that isn't cached would just throw the value away
+        jobs.extend((node, attr) for attr in wanted if node.is_cached(attr))
+
+    if debug:
+        log.debug(f"prefetching {len(jobs)} attributes with {max_workers=}")
+    report = PrefetchReport()
+    if not jobs:
+        return report
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thewired-prefetch') as pool:
+        #- run each job in a copy of the caller's context so the request id and span
+        #- collectors follow it into the pool
+        futures = [(node, attr, pool.submit(contextvars.copy_context().run, node.refresh, attr)) for node, attr in jobs]
+        for node, attr, future in futures:
+            err = future.exception()
+            if err is None:
+                report.fetched += 1
+            else:
+                log.warning(f"prefetch of {node.nsid}.{attr} failed: {err!r}")
+                report.errors[(str(node.nsid), attr)] = err
+
+    if debug:
+        log.debug(f"exiting: {report}")
+    return report
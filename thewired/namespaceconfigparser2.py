@@ -1,4 +1,3 @@
-import pprint
 import sys
 import typing
 from typing import Dict, Union, Callable, List
@@ -10,11 +9,109 @@ from .namespace import Namespace
 from .namespace import NamespaceNodeBase, SecondLifeNode
 from .namespace import nsid
 
-from thewired.exceptions import NamespaceError
+from thewired.exceptions import NamespaceError, NamespaceCollisionError
+from thewired import metrics as _metrics
 
-from logging import getLogger, LoggerAdapter
+from logging import getLogger, DEBUG
+from thewired.loginfo import make_log_adapter, enabled_for, LazyFormat
+from thewired.spans import span
 logger = getLogger(__name__)
 
+
+
+def _freeze(value):
+    """
+    Description:
+        hashable, canonical form of a (deserialized) config value: equal configs freeze to
+        equal values, regardless of mapping order
+    Output:
+        the frozen value
+    Notes:
+        raises TypeError for values that can not be frozen (unhashable objects that are not
+        mappings, lists, tuples or sets)
+    """
+    if isinstance(value, Mapping):
+        return (Mapping, frozenset((_freeze(k), _freeze(v)) for k,v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_freeze(v) for v in value))
+    if isinstance(value, (set, frozenset)):
+        return (frozenset, frozenset(_freeze(v) for v in value))
+    #- keep 1, 1.0 and True apart
+    hash(value)
+    return (type(value), value)
+
+
+
+class _DetachedNamespace(object):
+    """
+    Description:
+        stands in for the namespace of the nodes a worker process sends back
+    """
+    pass
+
+
+
+class _DeferredRef(object):
+    """
+    Description:
+        stands in for the value of an nsid-ref:// until it can be looked up
+    """
+    __slots__ = ('nsid',)
+
+    def __init__(self, nsid):
+        self.nsid = nsid
+
+
+
+class _DeferredLookup(object):
+    """
+    Description:
+        lookup namespace of a worker process: defers every nsid-ref:// lookup to the parent
+        process, where all sections can be seen
+    """
+    def get(self, nsid):
+        return _DeferredRef(str(nsid))
+
+
+
+def _parse_section(parent_nsid: str, key: str, dictConfig: Mapping, node_factory: type, fast_build: bool) -> Union[bytes, None]:
+    """
+    Description:
+        worker process side of NamespaceConfigParser2(workers=...): parse one top level
+        section into a namespace of its own
+    Output:
+        the pickled section node, detached from the worker's namespace, or None if it can't
+        be pickled
+    """
+    import pickle
+    ns = Namespace()
+    if parent_nsid != ns.delineator:
+        ns.add(parent_nsid)
+    parser = NamespaceConfigParser2(namespace=ns, lookup_ns=_DeferredLookup(), node_factory=node_factory,
+        fast_build=fast_build)
+    parser.parse({key: dictConfig}, prefix=parent_nsid)
+    section = ns.get(nsid.make_child_nsid(parent_nsid, key))
+
+    detached = _DetachedNamespace()
+    stack = [section]
+    while stack:
+        node = stack.pop()
+        child_prefix = f'{node.nsid}.'
+        for attr, value in list(vars(node).items()):
+            if value is ns:
+                setattr(node, attr, detached)
+            elif isinstance(value, NamespaceNodeBase) and str(value.nsid) == child_prefix + attr:
+                stack.append(value)
+    try:
+        return pickle.dumps(section)
+    except Exception as err:
+        if enabled_for(DEBUG, logger):
+            log = make_log_adapter(logger, NamespaceConfigParser2, '_parse_section')
+            log.debug(f"can't send back {key=}, it will be parsed serially: {err!r}")
+        return None
+
+
+
 class NamespaceConfigParser2(object):
     """
     Description:
@@ -32,7 +129,10 @@ class NamespaceConfigParser2(object):
             lookup_ns=None,
             node_factory:type=NamespaceNodeBase,
             callback_target_keys:Union[List[str],None]=None,
-            input_mutator_callback:Union[Callable, None]=None):
+            input_mutator_callback:Union[Callable, None]=None,
+            fast_build:bool=False,
+            workers:int=0,
+            lazy_init:bool=False):
         """
         Input:
             namespace: a Namespace/Handle object where the parsed nodes will be added
@@ -41,6 +141,24 @@ class NamespaceConfigParser2(object):
                   can handle the new type
             callback_target_keys: a list of strings that are keys in the config that should trigger a call to the callback function
             input_mutator_callback: will be called with the config dict whenever a target key is parsed
+            fast_build: build the namespace in a single pass, attaching every new node directly to
+                its parent instead of looking the parent up through the Namespace API for every key.
+                The resulting namespace is the same. Only used when parsing into a Namespace (not a
+                handle) without input mutators; keys that are not plain NSID segments are parsed
+                the regular way
+            workers: with more than 1, parse() parses the top level sections of the config in a
+                pool of this many worker processes and grafts the resulting subtrees into the
+                namespace. Only used under the same conditions as fast_build. nsid-ref://
+                values are resolved once every section is grafted, so they may refer to any
+                section. Sections that can't be sent back from a worker (e.g. nodes of
+                "__type__" classes, which can't be pickled) are parsed in this process instead.
+                Workers are started with forkserver (spawn where that is not available), never
+                fork, so node factories must be importable by name. Not used with lazy_init
+            lazy_init: objects declared with nested meta keys in an "__init__" block are not
+                constructed while parsing; the node gets a thewired.lazyobject.LazyObject that
+                constructs the object (once, thread-safely) when it is first used. Parses
+                serially even with workers: a worker can't hand a proxy back, and node
+                factories reading their parameters would construct objects in the worker
 
         Notes:
             input_mutator_callback needs to take 2 arguments are return a 2-tuple
@@ -77,6 +195,15 @@ class NamespaceConfigParser2(object):
         self.ns = namespace if namespace else Namespace()
         #-TODO: use seperate lookup ns
         self.lookup_ns = lookup_ns if lookup_ns else self.ns
+        self.fast_build = fast_build
+        self.workers = workers
+        self.lazy_init = lazy_init
+
+        #- "__class__" dotted path -> resolved factory
+        self._class_cache: Dict[str, callable] = dict()
+        #- frozen "__type__" spec -> the class created for it, so that identical specs
+        #- share one class instead of getting a new one per node
+        self._type_cache: Dict[tuple, type] = dict()
 
 
 
@@ -95,91 +222,451 @@ class NamespaceConfigParser2(object):
         Output:
             a namespace object representing the nodes specifed in the dictConfig object
         """
-        log = LoggerAdapter(logger, dict(name_ext=f'{self.__class__.__name__}.parse'))
-        log.debug(f"entering: {self.ns=} {prefix=} {dictConfig=}")
-        ns = self.ns
-        lookup_ns = self.lookup_ns
+        if self.workers > 1 and not self.lazy_init and self._builds_directly():
+            return self._parallel_parse(dictConfig, prefix)
+        if self._can_fast_build():
+            return self._fast_parse(dictConfig, prefix)
+        return self._parse(dictConfig, prefix)
+
 
+
+    def _parse(self, dictConfig: dict, prefix:str='') -> Union[Namespace, None]:
+        """
+        Description:
+            parse() one key at a time through the Namespace API
+        """
+        with span('parse', prefix or '.'):
+            log = make_log_adapter(logger, self.__class__, 'parse')
+            debug = enabled_for(DEBUG, logger)
+            if debug:
+                log.debug(f"entering: {self.ns=} {prefix=} {dictConfig=}")
+            ns = self.ns
+            lookup_ns = self.lookup_ns
+
+            try:
+                dictConfig.keys()
+            except (AttributeError, TypeError):
+                return None
+
+            #- create namespace as dictConfig describes
+            for key in dictConfig.copy().keys():
+                current_key = key
+
+                if key in self._input_mutator_targets:
+                    if debug:
+                        log.debug(f"calling input mutator: {key=}")
+                        log.debug(f"namespace before input mutator run: {ns=}")
+                    dictConfig, current_key = self._input_mutator(dictConfig, key)
+                    if debug:
+                        import pprint
+                        log.debug(f"input mutator returned: {key=}")
+                        log.debug("input mutator returned: dictConfig=%s", LazyFormat(pprint.pformat, dictConfig, width=10))
+                        log.debug(f"namespace after input mutator run: {ns=}")
+
+                #- NB: meta keys can not be top level keys with this current pattern
+                if current_key not in self.meta_keys:
+                    if debug:
+                        log.debug(f"parsing non-meta-key: {current_key=}")
+                    node_factory = self._create_factory(dictConfig[current_key], self.default_node_factory)
+
+                    if node_factory:
+                        if current_key is None:
+                            #add new node in place of / overwriting previous node
+                            if debug:
+                                log.debug(f"special case node path detected: overwrite previous node, place new one at {prefix=}")
+                            try:
+                                ns.remove(prefix)
+                            except NamespaceError as e:
+                                if debug:
+                                    log.debug("Failed to remove {prefix=}, which should actually exist at this point..")
+                                pass
+                            new_node_nsid = prefix
+                        else:
+                            #add new node in its own space
+                            if debug:
+                                log.debug(f"making child nsid: {prefix=} {current_key=}")
+                            new_node_nsid = nsid.make_child_nsid(prefix, current_key)
+
+                        if debug:
+                            log.debug(f"adding {new_node_nsid=} to {ns=}")
+                        new_node = ns.add_exactly_one(new_node_nsid, node_factory)
+
+                        if isinstance(dictConfig[current_key], Mapping):
+                            if debug:
+                                log.debug(f"recursing on remaining Mapping config: {current_key=}")
+                            self._parse(dictConfig=dictConfig[current_key], prefix=new_node_nsid)
+                    else:
+                        if debug:
+                            log.debug(f"No node_factory returned by self._create_factory() {current_key=}.")
+                            log.debug("not recursing: no more Mappings to parse {current_key=}")
+                        if current_key is None:
+                            raise ValueError("Can't use 'None' as an attribute name for a node!")
+                        else:
+                            current_node = ns.get(prefix)
+                            if debug:
+                                log.debug(f"checking how to set {current_node.nsid}.{current_key} to {dictConfig[current_key]}")
+                            if isinstance(dictConfig[current_key], str):
+                                if nsid.is_valid_nsid_ref(dictConfig[current_key]):
+                                    if debug:
+                                        log.debug(f"found reference to NSID: {current_key=} {dictConfig[current_key]=}")
+                                        log.debug(f"Setting value to current dereferenced value: {dictConfig[current_key]=}")
+                                    _value = lookup_ns.get(nsid.get_nsid_from_ref(dictConfig[current_key]))
+                                    setattr(current_node, current_key, _value)
+                                elif nsid.is_valid_nsid_link(dictConfig[current_key]):
+                                    if debug:
+                                        log.debug(f"Found symbolic link to NSID: {current_key=} {dictConfig[current_key]=}")
+                                    current_nsid = current_node.nsid
+                                    if debug:
+                                        log.debug(f"Creating type that can dereference symbolic NSIDs. {current_node.nsid=}")
+                                    secondlife = { current_key: dictConfig[current_key] }
+                                    factory = partial(SecondLifeNode,
+                                            nsid=current_node.nsid,
+                                            namespace=self.ns,
+                                            secondlife_ns=self.lookup_ns,
+                                            secondlife = secondlife)
+                                    ns.remove(str(current_nsid))
+                                    ns.add(current_nsid, factory)
+                            else:
+                                setattr(current_node, current_key, dictConfig[current_key])
+
+
+                    if debug:
+                        log.debug(f"exiting: {current_key=}")
+
+            return ns
+
+
+
+    def _builds_directly(self) -> bool:
+        #- handles and input mutators can rewrite what a key means; leave them to _parse()
+        from .namespace.namespace import NamespaceHandle
+        return not self._input_mutator_targets and not isinstance(self.ns, NamespaceHandle)
+
+
+
+    def _can_fast_build(self) -> bool:
+        return self.fast_build and self._builds_directly()
+
+
+
+    def _fast_parse(self, dictConfig: dict, prefix: str='') -> Union[Namespace, None]:
+        """
+        Description:
+            parse() with fast_build: walk the config once, keeping the parent node at hand
+        """
         try:
             dictConfig.keys()
         except (AttributeError, TypeError):
             return None
 
-        #- create namespace as dictConfig describes
-        for key in dictConfig.copy().keys():
-            current_key = key
+        parent = self.ns.root if prefix in ('', self.ns.delineator) else self.ns.get(prefix)
+        self._build(parent, dictConfig)
+        return self.ns
 
-            if key in self._input_mutator_targets:
-                log.debug(f"calling input mutator: {key=}")
-                log.debug(f"namespace before input mutator run: {ns=}")
-                dictConfig, current_key = self._input_mutator(dictConfig, key)
-                pretty_dictConfig = pprint.pformat(dictConfig, width=10)
-                log.debug(f"input mutator returned: {key=}")
-                log.debug(f"input mutator returned: dictConfig={pretty_dictConfig}")
-                log.debug(f"namespace after input mutator run: {ns=}")
 
-            #- NB: meta keys can not be top level keys with this current pattern
-            if current_key not in self.meta_keys:
-                log.debug(f"parsing non-meta-key: {current_key=}")
-                node_factory = self._create_factory(dictConfig[current_key], self.default_node_factory)
 
-                if node_factory:
-                    if current_key is None:
-                        #add new node in place of / overwriting previous node
-                        log.debug(f"special case node path detected: overwrite previous node, place new one at {prefix=}")
-                        try:
-                            ns.remove(prefix)
-                        except NamespaceError as e:
-                            log.debug("Failed to remove {prefix=}, which should actually exist at this point..")
-                            pass
-                        new_node_nsid = prefix
-                    else:
-                        #add new node in its own space
-                        log.debug(f"making child nsid: {prefix=} {current_key=}")
-                        new_node_nsid = nsid.make_child_nsid(prefix, current_key)
+    def reparse(self, old_config: Mapping, new_config: Mapping, prefix: str='') -> Union[Namespace, None]:
+        """
+        Description:
+            bring a namespace parsed from <old_config> in line with <new_config>, touching
+            only what differs between them: nodes whose config is gone are removed, new ones
+            are parsed and changed attributes are set again. Nodes keep their identity (and
+            with it caches and resolved links pointing at them) unless their own
+            "__class__"/"__init__"/"__type__" or nsid:// values changed; those nodes are
+            removed and parsed again, subtree and all.
+        Input:
+            old_config: the config the namespace was last parsed (or reparsed) from
+            new_config: the config to apply
+            prefix: the prefix both were parsed under
+        Output:
+            the namespace
+        Notes:
+            nsid-ref:// values that didn't change are looked up again if their target was
+            removed or replaced along the way
+        """
+        log = make_log_adapter(logger, self.__class__, 'reparse')
+        debug = enabled_for(DEBUG, logger)
+        try:
+            old_config.keys()
+            new_config.keys()
+        except (AttributeError, TypeError):
+            return None
 
-                    log.debug(f"adding {new_node_nsid=} to {ns=}")
-                    new_node = ns.add_exactly_one(new_node_nsid, node_factory)
+        node_nsid = self.ns.delineator if prefix in ('', self.ns.delineator) else str(prefix)
+        with span('parse', f'{node_nsid} (reparse)'):
+            removed = list()
+            self._reparse_node(node_nsid, old_config, new_config, removed)
+            if removed and self.lookup_ns is self.ns:
+                self._reresolve_refs(self.ns.get(node_nsid), new_config, removed)
+        if debug:
+            log.debug(f"removed or replaced: {removed}")
+        return self.ns
+
+
+
+    def _reparse_node(self, node_nsid: str, old_config: Mapping, new_config: Mapping, removed: list) -> None:
+        """
+        Description:
+            apply the differences between <old_config> and <new_config> to the node at <node_nsid>
+        """
+        ns = self.ns
+        node = ns.get(node_nsid)
+        base = '' if node_nsid == ns.delineator else node_nsid
+
+        for key in old_config.keys():
+            if key not in self.meta_keys and key not in new_config:
+                self._unset(node, base, key, old_config[key], removed)
+
+        for key, value in list(new_config.items()):
+            if key in self.meta_keys:
+                continue
+            if key in old_config:
+                old_value = old_config[key]
+                if old_value == value:
+                    continue
+                if isinstance(old_value, Mapping) and isinstance(value, Mapping) and \
+                        self._same_node_spec(old_value, value):
+                    self._reparse_node(f'{base}.{key}', old_value, value, removed)
+                    continue
+                self._unset(node, base, key, old_value, removed)
+
+            self._parse_serially({key: value}, prefix=node_nsid)
+            #- an nsid:// value replaces the node
+            node = ns.get(node_nsid)
+
+
+
+    def _same_node_spec(self, old_config: Mapping, new_config: Mapping) -> bool:
+        """
+        Output:
+            True if the node both configs describe can be kept: same factory and parameters,
+            and no nsid:// values (which replace the node while it is parsed)
+        """
+        for key in self.meta_keys:
+            if old_config.get(key) != new_config.get(key):
+                return False
+        for config in (old_config, new_config):
+            for value in config.values():
+                if isinstance(value, str) and nsid.is_valid_nsid_link(value):
+                    return False
+        return True
 
-                    if isinstance(dictConfig[current_key], Mapping):
-                        log.debug(f"recursing on remaining Mapping config: {current_key=}")
-                        self.parse(dictConfig=dictConfig[current_key], prefix=new_node_nsid)
-                else:
-                    log.debug(f"No node_factory returned by self._create_factory() {current_key=}.")
-                    log.debug("not recursing: no more Mappings to parse {current_key=}")
-                    if current_key is None:
-                        raise ValueError("Can't use 'None' as an attribute name for a node!")
-                    else:
-                        current_node = ns.get(prefix)
-                        log.debug(f"checking how to set {current_node.nsid}.{current_key} to {dictConfig[current_key]}")
-                        if isinstance(dictConfig[current_key], str):
-                            if nsid.is_valid_nsid_ref(dictConfig[current_key]):
-                                log.debug(f"found reference to NSID: {current_key=} {dictConfig[current_key]=}")
-                                log.debug(f"Setting value to current dereferenced value: {dictConfig[current_key]=}")
-                                _value = lookup_ns.get(nsid.get_nsid_from_ref(dictConfig[current_key]))
-                                setattr(current_node, current_key, _value)
-                            elif nsid.is_valid_nsid_link(dictConfig[current_key]):
-                                log.debug(f"Found symbolic link to NSID: {current_key=} {dictConfig[current_key]=}")
-                                current_nsid = current_node.nsid
-                                log.debug(f"Creating type that can dereference symbolic NSIDs. {current_node.nsid=}")
-                                secondlife = { current_key: dictConfig[current_key] }
-                                factory = partial(SecondLifeNode,
-                                        nsid=current_node.nsid,
-                                        namespace=self.ns,
-                                        secondlife_ns=self.lookup_ns,
-                                        secondlife = secondlife)
-                                ns.remove(str(current_nsid))
-                                ns.add(current_nsid, factory)
-                        else:
-                            setattr(current_node, current_key, dictConfig[current_key])
 
 
-                log.debug(f"exiting: {current_key=}")
+    def _unset(self, node: NamespaceNodeBase, base: str, key: str, old_value, removed: list) -> None:
+        """
+        Description:
+            undo what parsing <key>: <old_value> did to <node>
+        """
+        if isinstance(old_value, Mapping):
+            child_nsid = f'{base}.{key}'
+            try:
+                self.ns.remove(child_nsid)
+            except (NamespaceError, AttributeError):
+                #- already gone, e.g. replaced by an nsid:// value
+                return
+            removed.append(child_nsid)
+        elif isinstance(old_value, str) and not nsid.is_valid_nsid_ref(old_value):
+            #- plain strings are never set and nsid:// values are handled by replacing the node
+            pass
+        else:
+            try:
+                delattr(node, key)
+            except AttributeError:
+                pass
+
+
+
+    def _reresolve_refs(self, node: NamespaceNodeBase, dictConfig: Mapping, removed: list) -> None:
+        """
+        Description:
+            look up again the nsid-ref:// values below <node> that point at or under a
+            removed NSID
+        """
+        for key, value in dictConfig.items():
+            if key in self.meta_keys:
+                continue
+            if isinstance(value, Mapping):
+                child = vars(node).get(key)
+                if isinstance(child, NamespaceNodeBase):
+                    self._reresolve_refs(child, value, removed)
+            elif isinstance(value, str) and nsid.is_valid_nsid_ref(value):
+                target = str(nsid.get_nsid_from_ref(value))
+                if any(target == r or target.startswith(r + '.') for r in removed):
+                    setattr(node, key, self.lookup_ns.get(target))
+
+
+
+    def _parallel_parse(self, dictConfig: dict, prefix: str='') -> Union[Namespace, None]:
+        """
+        Description:
+            parse() with workers: parse each top level section in a worker process, graft the
+            subtrees in config order, parse whatever is left here and then resolve the
+            nsid-ref:// values found in the grafted sections
+        """
+        log = make_log_adapter(logger, self.__class__, '_parallel_parse')
+        debug = enabled_for(DEBUG, logger)
+        try:
+            dictConfig.keys()
+        except (AttributeError, TypeError):
+            return None
 
+        ns = self.ns
+        parent = ns.root if prefix in ('', ns.delineator) else ns.get(prefix)
+        parent_nsid = str(parent.nsid)
+        #- mappings under a plain new key can be parsed on their own; everything else is parsed here
+        sections = [key for key, value in dictConfig.items()
+            if isinstance(key, str) and key.isidentifier() and key not in self.meta_keys
+                and isinstance(value, Mapping) and key not in vars(parent)]
+        if len(sections) < 2:
+            return self._parse_serially(dictConfig, prefix)
+
+        import multiprocessing
+        import pickle
+        from concurrent.futures import ProcessPoolExecutor
+        #- not fork: the process may already run thewired threads (refreshers, a reloader,
+        #- prefetch pools) and a forked child can deadlock on a lock one of them held
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        with span('parse', f'{parent_nsid} (parallel)'):
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(sections)),
+                    mp_context=multiprocessing.get_context(start_method)) as pool:
+                futures = dict((key, pool.submit(_parse_section, parent_nsid, key, dictConfig[key],
+                    self.default_node_factory, self.fast_build)) for key in sections)
+
+                refs = list()
+                grafted = set()
+                for key in sections:
+                    try:
+                        pickled = futures[key].result()
+                    except Exception as err:
+                        #- e.g. the node factory could not be sent to the worker
+                        if debug:
+                            log.debug(f"worker failed on {key=}: {err!r}")
+                        pickled = None
+                    if pickled is None:
+                        continue
+                    section = pickle.loads(pickled)
+                    refs.extend(self._attach(section))
+                    setattr(parent, key, section)
+                    grafted.add(key)
+
+        if debug:
+            log.debug(f"grafted {len(grafted)} of {len(sections)} sections; {len(refs)} nsid-ref values to resolve")
+        rest = dict((key, value) for key, value in dictConfig.items() if key not in grafted)
+        if rest:
+            self._parse_serially(rest, prefix)
+
+        for node, attr, ref in refs:
+            setattr(node, attr, self.lookup_ns.get(ref.nsid))
         return ns
 
 
 
+    def _parse_serially(self, dictConfig: dict, prefix: str='') -> Union[Namespace, None]:
+        if self._can_fast_build():
+            return self._fast_parse(dictConfig, prefix)
+        return self._parse(dictConfig, prefix)
+
+
+
+    def _attach(self, section: NamespaceNodeBase) -> list:
+        """
+        Description:
+            point the nodes of a subtree sent back by _parse_section() at this parser's
+            namespaces
+        Output:
+            list of (node, attribute, _DeferredRef) for the nsid-ref:// values still to resolve
+        """
+        refs = list()
+        registry = _metrics.registry
+        stack = [section]
+        while stack:
+            node = stack.pop()
+            if registry is not None:
+                registry.count_op('add', node.nsid)
+            child_prefix = f'{node.nsid}.'
+            for attr, value in list(vars(node).items()):
+                if isinstance(value, _DetachedNamespace):
+                    setattr(node, attr, self.ns)
+                elif isinstance(value, _DeferredLookup):
+                    setattr(node, attr, self.lookup_ns)
+                elif isinstance(value, _DeferredRef):
+                    refs.append((node, attr, value))
+                elif isinstance(value, NamespaceNodeBase) and str(value.nsid) == child_prefix + attr:
+                    stack.append(value)
+        return refs
+
+
+
+    def _build(self, node: NamespaceNodeBase, dictConfig: Mapping) -> None:
+        """
+        Description:
+            add the nodes and attributes <dictConfig> describes to <node>, recursing into
+            mappings with the new child node as the parent
+        Notes:
+            same outcome as _parse(); every key is checked once to be a valid NSID segment and
+            child NSIDs are built from the already valid parent NSID
+        """
+        node_nsid = str(node.nsid)
+        with span('parse', node_nsid):
+            log = make_log_adapter(logger, self.__class__, '_build')
+            debug = enabled_for(DEBUG, logger)
+            ns = self.ns
+            base = '' if node_nsid == ns.delineator else node_nsid
+
+            for key in list(dictConfig.keys()):
+                if key in self.meta_keys:
+                    continue
+                value = dictConfig[key]
+
+                if not (isinstance(key, str) and key.isidentifier()):
+                    #- e.g. dotted keys; _parse() knows what to do with those
+                    if debug:
+                        log.debug(f"not a plain NSID segment, parsing the regular way: {key=}")
+                    self._parse({key: value}, prefix=node_nsid)
+                    node = ns.get(node_nsid)
+                    continue
+
+                node_factory = self._create_factory(value, self.default_node_factory)
+                if node_factory:
+                    child_nsid = f'{base}.{key}'
+                    existing = vars(node).get(key)
+                    if isinstance(existing, NamespaceNodeBase):
+                        raise NamespaceCollisionError(f'A node with the nsid "{child_nsid}" already exists in the namespace.')
+
+                    registry = _metrics.registry
+                    if registry is not None:
+                        registry.count_op('add', child_nsid)
+                    try:
+                        child = node_factory(nsid=nsid.Nsid.trusted(child_nsid), namespace=ns)
+                    except TypeError as e:
+                        raise TypeError(f"node_factory failed to create node: {str(e)}") from e
+                    setattr(node, key, child)
+                    if debug:
+                        log.debug(f"added {child=}")
+
+                    if isinstance(value, Mapping):
+                        self._build(child, value)
+
+                elif isinstance(value, str) and nsid.is_valid_nsid_ref(value):
+                    setattr(node, key, self.lookup_ns.get(nsid.get_nsid_from_ref(value)))
+
+                elif isinstance(value, str) and nsid.is_valid_nsid_link(value):
+                    #- the node becomes a SecondLifeNode resolving the link, as in _parse()
+                    factory = partial(SecondLifeNode,
+                            nsid=node.nsid,
+                            namespace=ns,
+                            secondlife_ns=self.lookup_ns,
+                            secondlife={key: value})
+                    ns.remove(node_nsid)
+                    node = ns.add(node.nsid, factory)[-1]
+
+                elif not isinstance(value, str):
+                    #- like _parse(), other strings are not set
+                    setattr(node, key, value)
+
+
+
     def _create_factory(self, dictConfig: dict, default_factory: Union[None, callable]=None) -> Union[partial, None]:
         """
         Description:
@@ -195,15 +682,18 @@ class NamespaceConfigParser2(object):
         Output:
             a partial made from the parsed factory function with the parsed factory function params
         """
-        log = LoggerAdapter(logger, dict(name_ext=f'{self.__class__.__name__}._create_factory'))
+        log = make_log_adapter(logger, self.__class__, '_create_factory')
+        debug = enabled_for(DEBUG, logger)
 
-        log.debug(f"Entering: {dictConfig=}")
+        if debug:
+            log.debug(f"Entering: {dictConfig=}")
         default_factory = default_factory if default_factory else self.default_node_factory
         try:
             keys = dictConfig.keys()
         except AttributeError:
             #- the dictConfig isn't a dict anymore
-            log.debug("No factory: not a dict")
+            if debug:
+                log.debug("No factory: not a dict")
             return None
 
         # create only the callable here
@@ -212,7 +702,8 @@ class NamespaceConfigParser2(object):
         # parse the parameters here (combined with the callable and returned as a partial)
         init_params = self._parse_meta_factory_function_params(dictConfig)
 
-        log.debug(f"Exiting: {node_factory_function=} {init_params=}")
+        if debug:
+            log.debug(f"Exiting: {node_factory_function=} {init_params=}")
         return partial(node_factory_function, **init_params)
 
 
@@ -233,9 +724,11 @@ class NamespaceConfigParser2(object):
             called by:
                 * _create_factory
         """
-        log = LoggerAdapter(logger, dict(name_ext=f'{self.__class__.__name__}._parse_meta_factory_function'))
+        log = make_log_adapter(logger, self.__class__, '_parse_meta_factory_function')
+        debug = enabled_for(DEBUG, logger)
 
-        log.debug(f"Entering: {dictConfig=}")
+        if debug:
+            log.debug(f"Entering: {dictConfig=}")
         factory_func = self._parse_meta_factory_function_dynamic(dictConfig)
         if not factory_func:
             factory_func = self._parse_meta_factory_function_static(dictConfig, default_factory_function)
@@ -244,7 +737,8 @@ class NamespaceConfigParser2(object):
         # if not factory_func:
         # factory_func = default_factory_func
 
-        log.debug(f"Exiting: {factory_func=}")
+        if debug:
+            log.debug(f"Exiting: {factory_func=}")
         return factory_func
 
 
@@ -255,23 +749,42 @@ class NamespaceConfigParser2(object):
         expects to find a "__type__" key that maps to a dictionary value with keys for 'name', 'bases', 'dict'
         """
         #- dyty == "dynamic type"
-        log = LoggerAdapter(logger, dict(name_ext=f'{self.__class__.__name__}._parse_meta_factory_function_dynamic'))
+        log = make_log_adapter(logger, self.__class__, '_parse_meta_factory_function_dynamic')
+        debug = enabled_for(DEBUG, logger)
         try:
             dyty_name = dictConfig["__type__"]["name"]
             dyty_bases = dictConfig["__type__"]["bases"]
             dyty_dict = dictConfig["__type__"]["dict"]
 
+            try:
+                cache_key = _freeze((dyty_name, dyty_bases, dyty_dict))
+                dyty = self._type_cache[cache_key]
+            except TypeError:
+                #- something in the spec can't be frozen; build a new class every time
+                cache_key = None
+            except KeyError:
+                pass
+            else:
+                if debug:
+                    log.debug(f"returning cached dynamic type factory function: {dyty=}")
+                return dyty
+
             dyty_bases = self._parse_meta_factory_function_dynamic_bases(dyty_bases)
             
-            log.debug(f"{dyty_name=}")
-            log.debug(f"{dyty_bases=}")
-            log.debug(f"{dyty_dict=}")
+            if debug:
+                log.debug(f"{dyty_name=}")
+                log.debug(f"{dyty_bases=}")
+                log.debug(f"{dyty_dict=}")
             dyty = type(dyty_name, dyty_bases, dyty_dict)
-            log.debug(f"returning dynamic type factory function: {dyty=}")
+            if cache_key is not None:
+                self._type_cache[cache_key] = dyty
+            if debug:
+                log.debug(f"returning dynamic type factory function: {dyty=}")
             return dyty
 
         except KeyError:
-            log.debug("returning None: no dynamic type spec found")
+            if debug:
+                log.debug("returning None: no dynamic type spec found")
             return None
 
 
@@ -290,8 +803,10 @@ class NamespaceConfigParser2(object):
         TODO: this was straight copied from _parse_meta_factory_function_static. Refactor into a shared method call
             that can capture the similar logic for importing the module and getting the symbol as an object
         """
-        log = LoggerAdapter(logger, dict(name_ext=f'{self.__class__.__name__}._parse_meta_factory_function_dynamic_bases'))
-        log.debug("Entering")
+        log = make_log_adapter(logger, self.__class__, '_parse_meta_factory_function_dynamic_bases')
+        debug = enabled_for(DEBUG, logger)
+        if debug:
+            log.debug("Entering")
 
         bases = list()  # will be returned value
 
@@ -310,7 +825,8 @@ class NamespaceConfigParser2(object):
                 #- fail with a ValueError
 
                 #- try to use thewired as the base import lib name
-                log.debug("value error importing: \"{module_name}\". Defaulting to 'thewired'.")
+                if debug:
+                    log.debug("value error importing: \"{module_name}\". Defaulting to 'thewired'.")
                 module = import_module("thewired")
 
             finally:
@@ -319,15 +835,18 @@ class NamespaceConfigParser2(object):
                         cls = getattr(module, symbol_name)
 
                     except AttributeError as err:
-                        log.debug(f"specified class ({symbol_name}) does not exist in specified module ({module_name})!")
+                        if debug:
+                            log.debug(f"specified class ({symbol_name}) does not exist in specified module ({module_name})!")
                         raise ValueError(f"\"{symbol_name} does not exist in {module_name}!") from err
 
                     else:
                         bases.append(cls)
                 else:
-                    log.debug(f"no such module name: {module_name} from symbol {basename}")
+                    if debug:
+                        log.debug(f"no such module name: {module_name} from symbol {basename}")
 
-        log.debug(f"Exiting: {bases=}")
+        if debug:
+            log.debug(f"Exiting: {bases=}")
         return tuple(bases)
 
 
@@ -345,8 +864,20 @@ class NamespaceConfigParser2(object):
             always returns a callable. Either what was parsed or the default if it failed to parse
             TODO: unify semanitcs btw this and dynamci parser. return None instead of passing default
         """
-        log = LoggerAdapter(logger, dict(name_ext=f'{self.__class__.__name__}._parse_meta_factory_function_static'))
-        log.debug(f"Entering: {dictConfig=}")
+        log = make_log_adapter(logger, self.__class__, '_parse_meta_factory_function_static')
+        debug = enabled_for(DEBUG, logger)
+        if debug:
+            log.debug(f"Entering: {dictConfig=}")
+
+        try:
+            node_factory = self._class_cache[dictConfig["__class__"]]
+        except (KeyError, TypeError):
+            #- no "__class__" key or not resolved yet
+            pass
+        else:
+            if debug:
+                log.debug(f"Exiting with cached {node_factory=}")
+            return node_factory
 
         #- pick back up here in case of KeyError
         nf_module = None    #- "node factory module" - the python module that has the node factory function defined
@@ -354,13 +885,15 @@ class NamespaceConfigParser2(object):
             nf_module_name = '.'.join(dictConfig["__class__"].split('.')[0:-1])
             nf_symbol_name = dictConfig["__class__"].split('.')[-1]
             nf_module = import_module(nf_module_name)
-            log.debug(f"{nf_module_name=} | {nf_symbol_name=} | {nf_module=}")
+            if debug:
+                log.debug(f"{nf_module_name=} | {nf_symbol_name=} | {nf_module=}")
 
         except KeyError:
             #- no "__class__" key
             #- leave node_factory set to the default
-            log.debug(f"key error when trying to access '__class__': keys: {list(dictConfig.keys())}")
-            log.debug(f"returning {default_factory_function=}")
+            if debug:
+                log.debug(f"key error when trying to access '__class__': keys: {list(dictConfig.keys())}")
+                log.debug(f"returning {default_factory_function=}")
             return default_factory_function
 
         except ValueError:
@@ -370,7 +903,8 @@ class NamespaceConfigParser2(object):
             #- fail with a ValueError
 
             #- try to use the current module as the module containing the node factory
-            log.debug("value error importing namespace factory module: \"{nf_module_name}\"")
+            if debug:
+                log.debug("value error importing namespace factory module: \"{nf_module_name}\"")
             nf_module = sys.modules[__name__]
 
         finally:
@@ -378,18 +912,24 @@ class NamespaceConfigParser2(object):
                 try:
                     node_factory = getattr(nf_module, nf_symbol_name)
                 except AttributeError as err:
-                    log.debug("specified factory function does not exist in specified module!")
+                    if debug:
+                        log.debug("specified factory function does not exist in specified module!")
                     raise ValueError(f"parsed factory function ({nf_symbol_name}) does not exist in specified module ({nf_module})!") from err
 
                 if not callable(node_factory):
-                    log.debug(f"specified node factory is not callable! {dictConfig=}")
+                    if debug:
+                        log.debug(f"specified node factory is not callable! {dictConfig=}")
                     raise ValueError(f"parsed node factory {dictConfig['__class__']} is not callable!")
 
+                self._class_cache[dictConfig["__class__"]] = node_factory
+
             else:
-                log.debug(f"Exiting: {default_factory_function=}")
+                if debug:
+                    log.debug(f"Exiting: {default_factory_function=}")
                 return default_factory_function
 
-        log.debug(f"Exiting {node_factory=}")
+        if debug:
+            log.debug(f"Exiting {node_factory=}")
         return node_factory
 
 
@@ -415,33 +955,40 @@ class NamespaceConfigParser2(object):
             Only works with dict /kwarg params ATM
             TODO: make this work with serialized positional args as well
         """
-        log = LoggerAdapter(logger, dict(name_ext=f'{self.__class__.__name__}._parse_meta_factory_function_params'))
-        log.debug(f"Entering: {dictConfig=}")
+        log = make_log_adapter(logger, self.__class__, '_parse_meta_factory_function_params')
+        debug = enabled_for(DEBUG, logger)
+        if debug:
+            log.debug(f"Entering: {dictConfig=}")
 
         init_params = dict()
 
         if not dictConfig:
-            log.debug("no dictConfig: returning empty dict")
+            if debug:
+                log.debug("no dictConfig: returning empty dict")
             return dict()
         try:
             init_params_config = dictConfig["__init__"]
         except KeyError as err:
             #- no __init__ key, leave it as an empty dict
-            log.debug("no __init__ key. trying [__type__][dict]")
+            if debug:
+                log.debug("no __init__ key. trying [__type__][dict]")
             #return dict()
             try:
                 init_params_config = dictConfig["__type__"]["dict"]
             except KeyError as e:
-                log.debug("no ['__type__']['dict'] key found. returning empty dict")
+                if debug:
+                    log.debug("no ['__type__']['dict'] key found. returning empty dict")
                 return dict()
 
 
         #- there is an "__init__" or ["__type__"]["dict"] subkey for this node factory parameter
-        log.debug("found meta subkey")
+        if debug:
+            log.debug("found meta subkey")
         try:
             init_param_names = init_params_config.keys()
         except AttributeError:
-            log.debug(f"init_params_config is not a mapping: {init_params_config=}")
+            if debug:
+                log.debug(f"init_params_config is not a mapping: {init_params_config=}")
             pass
 
         else:
@@ -450,23 +997,35 @@ class NamespaceConfigParser2(object):
             #- to be passed as parameters into the node factory bare function to complete
             #- the node factory function partial
             for init_param_name in init_param_names:
-                log.debug(f"parsing {init_param_name=}")
-                log.debug(f"init_params_config[{init_param_name}]: {init_params_config[init_param_name]}")
+                if debug:
+                    log.debug(f"parsing {init_param_name=}")
+                    log.debug(f"init_params_config[{init_param_name}]: {init_params_config[init_param_name]}")
                 if isinstance(init_params_config[init_param_name], Mapping):
-                    log.debug(f"init_params_config[{init_param_name=}] is a dict")
+                    if debug:
+                        log.debug(f"init_params_config[{init_param_name=}] is a dict")
                     if set(init_params_config[init_param_name].keys()).intersection(set(self.meta_keys)):
-                        log.debug(f"found recursive parameter definition: {init_param_name=}")
-                        log.debug(f"recursive parameter config: {init_params_config[init_param_name]=}")
+                        if debug:
+                            log.debug(f"found recursive parameter definition: {init_param_name=}")
+                            log.debug(f"recursive parameter config: {init_params_config[init_param_name]=}")
 
                         #- recursive call here
-                        init_params[init_param_name] = self._create_factory(init_params_config[init_param_name], object)()
-                        log.debug(f"created new object: {init_params[init_param_name]=}")
+                        param_factory = self._create_factory(init_params_config[init_param_name], object)
+                        if self.lazy_init:
+                            from thewired.lazyobject import LazyObject
+                            init_params[init_param_name] = LazyObject(param_factory)
+                        else:
+                            init_params[init_param_name] = param_factory()
+                        if debug:
+                            log.debug(f"created new object: {init_params[init_param_name]=}")
                     else:
                         init_params[init_param_name] = init_params_config[init_param_name]
                 else:
-                    log.debug(f"not a dict: directly assigning init_params[{init_param_name}]")
+                    if debug:
+                        log.debug(f"not a dict: directly assigning init_params[{init_param_name}]")
                     init_params[init_param_name] = init_params_config[init_param_name]
-                    log.debug(f"assigned: init_params_config[{init_param_name}]: {init_params_config[init_param_name]}")
+                    if debug:
+                        log.debug(f"assigned: init_params_config[{init_param_name}]: {init_params_config[init_param_name]}")
 
-        log.debug(f"Exiting: {init_params=}")
+        if debug:
+            log.debug(f"Exiting: {init_params=}")
         return init_params
@@ -0,0 +1,186 @@
+"""
+call-tree profiler for provider calls
+
+    import thewired
+    with thewired.profile('provide.collapsed') as prof:
+        provider.provide()
+    print(prof.report())
+
+records every span (see thewired.spans) started inside the `with` block: provider calls,
+addendum builds, implementor calls, formatter calls and namespace lookups. Spans with the
+same name under the same parent are merged, giving a tree of call counts and total wall
+and CPU time. The tree can be written in the "collapsed stack" format read by
+flamegraph.pl, speedscope and similar tools.
+
+only work done in the profiled context is seen. The thread pools thewired runs work on
+(Namespace.prefetch, executors for synchronous providers called from async code) carry
+the context along; other threads started inside the block are not followed.
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+
+from thewired import spans
+
+__all__ = ['profile', 'Profile', 'CallNode']
+
+#- Profile -> the node that spans started in the current thread/task become children of;
+#- one for all profiles, as context variables are never freed. Replaced, never mutated
+_current_nodes = contextvars.ContextVar('thewired_profile_nodes', default=None)
+
+
+class CallNode(object):
+    """
+    Description:
+        one node of the call tree: all calls of <name> made from the same parent
+    """
+    __slots__ = ('name', 'count', 'wall', 'cpu', 'children')
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.children = dict()
+
+    def child(self, name):
+        try:
+            return self.children[name]
+        except KeyError:
+            node = self.children[name] = CallNode(name)
+            return node
+
+    @property
+    def self_wall(self):
+        return max(self.wall - sum(c.wall for c in self.children.values()), 0.0)
+
+    @property
+    def self_cpu(self):
+        return max(self.cpu - sum(c.cpu for c in self.children.values()), 0.0)
+
+    def as_dict(self):
+        return dict(
+            name=self.name,
+            count=self.count,
+            wall=self.wall,
+            cpu=self.cpu,
+            children=[c.as_dict() for c in self.children.values()])
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.name!r}, count={self.count}, wall={self.wall:.6f}, cpu={self.cpu:.6f})"
+
+
+class Profile(object):
+    """
+    Description:
+        span collector building a CallNode tree. The root node has no timings of its own;
+        its children are the outermost spans
+    """
+    def __init__(self):
+        self.root = CallNode('<root>')
+        self._lock = threading.Lock()
+        self._tokens = dict()       #- id(span) -> _current_nodes token
+
+
+    def span_start(self, span):
+        name = self._frame_name(span)
+        nodes = _current_nodes.get() or dict()
+        with self._lock:
+            node = nodes.get(self, self.root).child(name)
+            self._tokens[id(span)] = _current_nodes.set({**nodes, self: node})
+
+
+    def span_end(self, span):
+        node = _current_nodes.get()[self]
+        with self._lock:
+            node.count += 1
+            node.wall += span.wall_time
+            node.cpu += span.cpu_time
+            _current_nodes.reset(self._tokens.pop(id(span)))
+
+
+    @staticmethod
+    def _frame_name(span):
+        #- ';' separates frames in the collapsed format
+        return f"{span.category}:{span.name}".replace(';', ',').replace('\n', ' ')
+
+
+    def walk(self):
+        """
+        Description:
+            depth-first iteration over the tree (root excluded)
+        Output:
+            yields (path, node) tuples, where path is the list of node names from the
+            outermost span down to and including node
+        """
+        stack = [([node.name], node) for node in reversed(list(self.root.children.values()))]
+        while stack:
+            path, node = stack.pop()
+            yield path, node
+            for child in reversed(list(node.children.values())):
+                stack.append((path + [child.name], child))
+
+
+    def collapsed(self, weight='wall'):
+        """
+        Description:
+            the tree in collapsed-stack format: one "frame;frame;frame value" line per
+            node with non-zero self time
+        Input:
+            weight: "wall" or "cpu"; values are self time in microseconds
+        """
+        if weight not in ('wall', 'cpu'):
+            raise ValueError(f"weight must be 'wall' or 'cpu', not {weight!r}")
+        lines = list()
+        with self._lock:
+            for path, node in self.walk():
+                value = int(round((node.self_wall if weight == 'wall' else node.self_cpu) * 1e6))
+                if value > 0:
+                    lines.append(f"{';'.join(path)} {value}")
+        return lines
+
+
+    def write_collapsed(self, path, weight='wall'):
+        with open(path, 'w') as f:
+            for line in self.collapsed(weight=weight):
+                f.write(line + '\n')
+
+
+    def report(self):
+        """
+        Output:
+            indented text rendering of the tree with call counts, wall and CPU time
+        """
+        lines = [f"{'calls':>7} {'wall ms':>10} {'cpu ms':>10}  name"]
+        with self._lock:
+            for path, node in self.walk():
+                indent = '  ' * (len(path) - 1)
+                lines.append(f"{node.count:>7} {node.wall * 1e3:>10.3f} {node.cpu * 1e3:>10.3f}  {indent}{node.name}")
+        return '\n'.join(lines)
+
+
+    def as_dict(self):
+        with self._lock:
+            return self.root.as_dict()
+
+
+
+@contextmanager
+def profile(path=None, weight='wall'):
+    """
+    Description:
+        profile everything the `with` block does through thewired
+    Input:
+        path: if given, the collapsed-stack output is written here when the block exits
+        weight: "wall" or "cpu" time for the written file
+    Output:
+        yields the Profile
+    """
+    prof = Profile()
+    with spans.collecting(prof):
+        try:
+            yield prof
+        finally:
+            if path is not None:
+                prof.write_collapsed(path, weight=weight)
@@ -1,4 +1,19 @@
-from .providerabc import Provider, get_provider_classes
-from .addendumformatter import AddendumFormatter
-from .providermap import ProviderMap
-from .parametizedcall import ParametizedCall
+#- public names are imported on first use (see thewired.util.lazy_attributes)
+from thewired.util import lazy_attributes
+
+_lazy_names = {
+    'Provider': '.providerabc',
+    'get_provider_classes': '.providerabc',
+    'AddendumFormatter': '.addendumformatter',
+    'ProviderMap': '.providermap',
+    'ParametizedCall': '.parametizedcall',
+}
+
+__all__ = list(_lazy_names)
+__getattr__, __dir__ = lazy_attributes(__name__, _lazy_names)
+
+if False:  # typing.TYPE_CHECKING
+    from .providerabc import Provider, get_provider_classes
+    from .addendumformatter import AddendumFormatter
+    from .providermap import ProviderMap
+    from .parametizedcall import ParametizedCall
@@ -1,14 +1,21 @@
-from logging import getLogger, LoggerAdapter
+from logging import getLogger
 logger = getLogger(__name__)
 
-import importlib, itertools
+import importlib, itertools, time
 from collections.abc import Mapping, Iterable, Sequence
 
 from thewired.exceptions import NamespaceLookupError
 from thewired.util import is_nsid_ref
+from thewired.singleflight import SingleFlight
+from thewired.loginfo import make_log_adapter
+from thewired import metrics as _metrics
+from thewired.spans import span, request_context
 from .providerabc import Provider
 from .parametizedcall import ParametizedCall
 
+#- coalesces concurrent identical implementor calls across all AddendumFormatters
+_implementor_flights = SingleFlight()
+
 class AddendumFormatter(Provider):
     """
     Description:
@@ -20,7 +27,7 @@ class AddendumFormatter(Provider):
     """
     def __init__(self, implementor_namespace, implementor, nsroot=None,
         addendum=None, formatter=None, implementor_key=None,\
-        implementor_state_namespace=None, pre_exec=None, post_exec=None):
+        implementor_state_namespace=None, pre_exec=None, post_exec=None, coalesce=False):
         """
         Input:
             implementor_namespace: where to lookup the implmentor NSIDs
@@ -37,12 +44,14 @@ class AddendumFormatter(Provider):
                 have the nodes support a "state" attribute that returns "on" or "off".
             pre_exec_call: what to call before evaluating the provider's implmentation
             post_exec_call: what to call after the provider's implementation has run
+            coalesce: if True, concurrent provide() calls that would evaluate the same addendum
+                against the same implementor share a single evaluation and its result
 
         Notes:
             roughly equivalent to:
                 return self.formatter(eval("self.implementor{}".format(addendum)))
         """
-        log = LoggerAdapter(logger, {'name_ext' : 'AddendumFormatter.__init__'})
+        log = make_log_adapter(logger, AddendumFormatter, '__init__')
         log.debug("Entering")
         self.implementor_ns = implementor_namespace
         #implementor can be an object or an NSID reference
@@ -52,6 +61,7 @@ class AddendumFormatter(Provider):
         self.implementor_state_ns = implementor_state_namespace
         self._pre_exec = pre_exec
         self._post_exec = post_exec
+        self.coalesce = coalesce
 
         if isinstance(implementor, str):
             #- treat as NSID
@@ -110,45 +120,46 @@ class AddendumFormatter(Provider):
             **kwargs: passed to the ParametizedCall object if this is a dynamic addendum
                 type
         """
-        log = LoggerAdapter(logger, {'name_ext': 'AddendumFormatter.get_addendum'})
-        log.debug("Entering")
-        log.debug("args: {}".format(args))
-        log.debug("kwargs: {}".format(kwargs))
-
-        if implementor and self.key:
-            log.debug("Getting key function")
-            key_func = self.get_key_func()
-            key = key_func(implementor)
-        else:
-            key = None
-        log.debug("key: {}".format(key))
-
-        log.debug("_addendums: {}".format(self._addendums))
-        addendums = list()
-        for addendum in self._addendums:
-            if is_nsid_ref(addendum):
-                log.debug("Dereferencing addendum: {}".format(addendum))
-                addendum = self.nsroot.get(addendum)
-            
-            if isinstance(addendum, Mapping):
-                log.debug("Found mapping addendum")
-                if ParametizedCall.is_param_call_map(addendum):
-                    log.debug("Found Parametized Call addendum")
-                    method_name, params = ParametizedCall.get_params(addendum, **kwargs)
-                    addendum = ParametizedCall(self.nsroot, method_name, params)
-                    log.debug("Instantiated ParametizedCall")
-
-            if callable(addendum):
-                log.debug("Calling addendum w/ key: {}".format(key))
-                addendums.append(addendum(nsid=nsid, implementor=implementor, key=key))
+        with span('addendum', str(nsid)):
+            log = make_log_adapter(logger, AddendumFormatter, 'get_addendum')
+            log.debug("Entering")
+            log.debug("args: %s", args)
+            log.debug("kwargs: %s", kwargs)
+
+            if implementor and self.key:
+                log.debug("Getting key function")
+                key_func = self.get_key_func()
+                key = key_func(implementor)
             else:
-                log.debug("Using bare addendum text: {}".format(addendum))
-                addendums.append(addendum)
-
-        final_addendum = ''.join(addendums)
-        log.debug("final addendum: {}".format(final_addendum))
-        log.debug("Exiting")
-        return final_addendum
+                key = None
+            log.debug("key: %s", key)
+
+            log.debug("_addendums: %s", self._addendums)
+            addendums = list()
+            for addendum in self._addendums:
+                if is_nsid_ref(addendum):
+                    log.debug("Dereferencing addendum: %s", addendum)
+                    addendum = self.nsroot.get(addendum)
+            
+                if isinstance(addendum, Mapping):
+                    log.debug("Found mapping addendum")
+                    if ParametizedCall.is_param_call_map(addendum):
+                        log.debug("Found Parametized Call addendum")
+                        method_name, params = ParametizedCall.get_params(addendum, **kwargs)
+                        addendum = ParametizedCall(self.nsroot, method_name, params)
+                        log.debug("Instantiated ParametizedCall")
+
+                if callable(addendum):
+                    log.debug("Calling addendum w/ key: %s", key)
+                    addendums.append(addendum(nsid=nsid, implementor=implementor, key=key))
+                else:
+                    log.debug("Using bare addendum text: %s", addendum)
+                    addendums.append(addendum)
+
+            final_addendum = ''.join(addendums)
+            log.debug("final addendum: %s", final_addendum)
+            log.debug("Exiting")
+            return final_addendum
 
 
     def get_key_func(self):
@@ -199,13 +210,14 @@ class AddendumFormatter(Provider):
         from thewired import DelegateNode
         # sad face
 
-        log = LoggerAdapter(logger, {'name_ext' : 'AddendumFormatter._get_implementor_iterator'})
+        log = make_log_adapter(logger, AddendumFormatter, '_get_implementor_iterator')
         log.debug("entering")
 
         #- find which implementor object(s) to use
         if self.implementor is None:
             #- use NSID if there is no direct object
-            implementors = list(self.implementor_ns.get_leaf_nodes(self.implementor_nsid))
+            with span('namespace', 'get_leaf_nodes'):
+                implementors = list(self.implementor_ns.get_leaf_nodes(self.implementor_nsid))
             log.debug(f"got implementors {implementors}")
             imp_iter = list(zip([I.nsid for I in implementors], implementors))
             log.debug(f"paired with NSIDS: {imp_iter}")
@@ -234,7 +246,9 @@ class AddendumFormatter(Provider):
 
         Input:
             *args: passed into self.get_addendum method
-            request_id: None (unused in this provider)
+            request_id: correlation id for this call; it becomes the current request id
+                (see thewired.spans) for everything done while providing. None keeps the
+                current one
             show_progress: show a message when calling each implementor object
             **kwargs: passed into self.get_addendum method
 
@@ -243,49 +257,70 @@ class AddendumFormatter(Provider):
             implmentor object, else, we will default to looking up the implmentor in a
             root node and iterating over all the sub-nodes.
         """
-        log = LoggerAdapter(logger, {'name_ext' : 'AddendumFormatter.provide'})
-        log.debug("Entering")
-        log.debug("varargs: {}".format(args))
-        log.debug("kwargs: {}".format(kwargs))
-
-        imp_iter = self._get_implementor_iterator()
-        #DEBUG
-        imp_iter = list(imp_iter)
-        log.debug("got implementor iterator: {}".format(imp_iter))
-        #- loop through all the iterators and apply the addendum
-        all_outputs = list()
-        formatted_outputs = list()
-        all_formatted_outputs = list()
-
-        for nsid, implementor in imp_iter:
-            if self.implementor_state_ns:
-                try:
-                    log.debug("checking implementor flipswitch via nsid: {}".format(nsid))
-                    if not self.implementor_state_ns.get(nsid):
-                        #- skip til next implementor
-                        log.debug("Skipping inactive implementor: {}".format(nsid))
-                        continue
-                except NamespaceLookupError:
-                    log.warning("No dynamic state for implementor: {}".format(nsid))
-
-            #- per-implementor addendums use key method
-            addendum = self.get_addendum(nsid, implementor, *args, **kwargs)
-            if show_progress:
-                log.info("Calling: {}{}".format(nsid, addendum))
-
-            #TODO: define globals and locals
-            outputs = eval("implementor{}".format(addendum), globals(), locals())
-            all_outputs += outputs
-            formatted_outputs = self.formatter(outputs)
-            all_formatted_outputs += formatted_outputs
-            if show_progress:
+        with request_context(request_id), span('provider', self.__class__.__name__):
+            log = make_log_adapter(logger, AddendumFormatter, 'provide')
+            log.debug("Entering")
+            log.debug("varargs: %s", args)
+            log.debug("kwargs: %s", kwargs)
+
+            imp_iter = self._get_implementor_iterator()
+            #DEBUG
+            imp_iter = list(imp_iter)
+            log.debug("got implementor iterator: %s", imp_iter)
+            #- loop through all the iterators and apply the addendum
+            all_outputs = list()
+            formatted_outputs = list()
+            all_formatted_outputs = list()
+
+            for nsid, implementor in imp_iter:
+                if self.implementor_state_ns:
+                    try:
+                        log.debug("checking implementor flipswitch via nsid: %s", nsid)
+                        if not self.implementor_state_ns.get(nsid):
+                            #- skip til next implementor
+                            log.debug("Skipping inactive implementor: %s", nsid)
+                            continue
+                    except NamespaceLookupError:
+                        log.warning("No dynamic state for implementor: {}".format(nsid))
+
+                #- per-implementor addendums use key method
+                addendum = self.get_addendum(nsid, implementor, *args, **kwargs)
+                if show_progress:
+                    log.info("Calling: %s%s", nsid, addendum)
+
+                registry = _metrics.registry
+                start = time.perf_counter() if registry is not None else None
                 try:
-                    n = len(list(outputs))
-                except TypeError:
-                    n = 1 if outputs else 0
-                log.info("        {} objects returned".format(n))
-        log.info("Total: {}".format(len(all_formatted_outputs)))
-        return all_formatted_outputs
+                    with span('implementor', str(nsid)):
+                        if self.coalesce:
+                            outputs = _implementor_flights.do((id(self), str(nsid), id(implementor), addendum),
+                                self._eval_addendum, implementor, addendum)
+                        else:
+                            outputs = self._eval_addendum(implementor, addendum)
+                finally:
+                    if registry is not None:
+                        registry.observe_implementor(nsid, time.perf_counter() - start)
+                all_outputs += outputs
+                with span('formatter', getattr(self.formatter, '__name__', str(self.formatter))):
+                    formatted_outputs = self.formatter(outputs)
+                all_formatted_outputs += formatted_outputs
+                if show_progress:
+                    try:
+                        n = len(list(outputs))
+                    except TypeError:
+                        n = 1 if outputs else 0
+                    log.info("        %s objects returned", n)
+            log.info("Total: %s", len(all_formatted_outputs))
+            return all_formatted_outputs
+
+
+    def _eval_addendum(self, implementor, addendum):
+        """
+        Description:
+            evaluate the addendum against one implementor object
+        """
+        #TODO: define globals and locals
+        return eval("implementor{}".format(addendum), globals(), locals())
 
 
     def __str__(self):
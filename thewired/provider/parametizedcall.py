@@ -1,9 +1,12 @@
-from logging import getLogger, LoggerAdapter
+from logging import getLogger
 logger = getLogger(__name__)
 
 import copy
 import collections
+import collections.abc
 from thewired.util import is_nsid_ref
+from thewired.loginfo import make_log_adapter
+from thewired.spans import span
 
 class ParametizedCall(object):
     """
@@ -40,14 +43,14 @@ class ParametizedCall(object):
         Ouput: a 2-tuple of (method_name, params dict)
         """
 
-        log = LoggerAdapter(logger, {'name_ext' : 'ParametizedCall.get_params'})
+        log = make_log_adapter(logger, ParametizedCall, 'get_params')
         log.debug("Entered")
-        log.debug("kwargs: {}".format(str(kwargs)))
+        log.debug("kwargs: %s", kwargs)
 
         params_marker = cls._param_dict_mark_key
 
         params = copy.deepcopy(map[params_marker])
-        log.debug("raw params: {}".format(params))
+        log.debug("raw params: %s", params)
         method_name = params['defaults'].pop('method_name')
         param_chain = collections.ChainMap(kwargs, params['defaults'])
         param_set_name = kwargs.pop('_params', None)
@@ -88,46 +91,47 @@ class ParametizedCall(object):
             a string suitable for use in an Addendum provider
         """
 
-        log = LoggerAdapter(logger, {'name_ext' : 'ParametizedCall.make_addendum'})
-        unpack_str = ''
-        for k,v in self.params.items():
+        with span('addendum', f'ParametizedCall.{self.method_name}'):
+            log = make_log_adapter(logger, ParametizedCall, 'make_addendum')
+            unpack_str = ''
+            for k,v in self.params.items():
 
-            #- dereference symbolic ref values
-            if is_nsid_ref(v):
-                log.debug("Dereferencing symbolic ref: {}".format(v))
-                v = self.nsroot._lookup_symbolic_ref(v, follow_symrefs=True)
-                log.debug("deref: {}".format(v))
+                #- dereference symbolic ref values
+                if is_nsid_ref(v):
+                    log.debug("Dereferencing symbolic ref: %s", v)
+                    v = self.nsroot._lookup_symbolic_ref(v, follow_symrefs=True)
+                    log.debug("deref: %s", v)
 
-            #- dereference sequence items
-            if isinstance(v, collections.Sequence) and not isinstance(v, str):
-                v = self.stringify_sequence(v, key=key)
-                unpack_str += '{} = {}, '.format(k,v)
-                continue
+                #- dereference sequence items
+                if isinstance(v, collections.abc.Sequence) and not isinstance(v, str):
+                    v = self.stringify_sequence(v, key=key)
+                    unpack_str += '{} = {}, '.format(k,v)
+                    continue
 
-            if isinstance(v, collections.Mapping) and key is not None:
-                try:
-                    v = v[key]
-                    #unpack_str += '{} = {}, '.format(k,v[key])
-                except KeyError as err:
-                    #- subkey not present
-                    msg = "Subkey '{}' not present; not using".format(key)
-                    log.debug(msg)
-                    if need_key:
-                        raise
-
-            if isinstance(v, str):
-                unpack_str += '{} = \'{}\', '.format(k,v)
-            else:
-                #- immediate non-string value
-                unpack_str += '{} = {}, '.format(k,v)
+                if isinstance(v, collections.abc.Mapping) and key is not None:
+                    try:
+                        v = v[key]
+                        #unpack_str += '{} = {}, '.format(k,v[key])
+                    except KeyError as err:
+                        #- subkey not present
+                        msg = "Subkey '{}' not present; not using".format(key)
+                        log.debug(msg)
+                        if need_key:
+                            raise
+
+                if isinstance(v, str):
+                    unpack_str += '{} = \'{}\', '.format(k,v)
+                else:
+                    #- immediate non-string value
+                    unpack_str += '{} = {}, '.format(k,v)
 
 
-        #- chop off last ", "
-        unpack_str = unpack_str[0:-2]
+            #- chop off last ", "
+            unpack_str = unpack_str[0:-2]
 
-        addendum = '.' + self.method_name + '(' + unpack_str + ')'
-        log.debug("returning addendum: {}".format(addendum))
-        return addendum
+            addendum = '.' + self.method_name + '(' + unpack_str + ')'
+            log.debug("returning addendum: %s", addendum)
+            return addendum
 
 
 
@@ -139,22 +143,22 @@ class ParametizedCall(object):
             to pass back a string that can be used as an eval-able string, thus the list
             braces themselves should be literals, but every item inside should be a string
         """
-        seq_str = '['
+        log = make_log_adapter(logger, ParametizedCall, 'stringify_sequence')
+        items = list()
         dref_seq = self.deref_sequence_items(seq)
 
         for item in dref_seq:
-            if isinstance(item, collections.Mapping) and key is not None:
+            if isinstance(item, collections.abc.Mapping) and key is not None:
                 try:
-                    seq_str += "'{}'".format(item[key])
+                    items.append("'{}'".format(item[key]))
                 except KeyError as err:
                     msg = "Subkey '{}' not present!".format(key)
                     log.error(msg)
                     raise ValueError(msg) from err
             else:
-                seq_str += "'{}'".format(item)
-        seq_str += ']'
+                items.append("'{}'".format(item))
 
-        return seq_str
+        return '[' + ', '.join(items) + ']'
         
 
     def deref_sequence_items(self, seq):
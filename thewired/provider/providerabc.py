@@ -77,8 +77,9 @@ class Provider(abc.ABC):
         Description:
             this method is called to provide an implementation for a specific request.
         Input:
-            request_id: an identifier the underlying Provider can use to determine what
-            flowchart of operations to execute using the implementors.
+            request_id: correlation id for the request. Providers make it the current
+            request id (thewired.spans.request_context) while they work, so that logs,
+            spans and traces of everything done for the request can be tied together.
         '''
         pass
 
@@ -4,8 +4,10 @@ logger = getLogger(__name__)
 
 
 import collections
+import collections.abc
 from .providerabc import Provider, ProviderError
 from thewired.exceptions import NamespaceLookupError, ProviderMapLookupError
+from thewired.loginfo import make_log_adapter
 
 
 FAIL_CANARY = '_provider_map_lookup_canary_fail_return_value_'
@@ -17,6 +19,9 @@ class ProviderMap(collections.UserDict):
         The initial namespace key is usually the namespace ID of a User Interfacing Node
         object and it will usually map this node's namespace id + an attribute name to a
         name that is then looked up in the provider namespace.
+
+        Keys are stored in an NsidTrie, so a lookup that falls back to a parent's provider
+        costs the same O(depth) walk as an exact lookup.
     '''
     def __init__(self, mapping=None, provider_ns=None, fail_to_parent=False, fail_up_height=0):
         '''
@@ -39,62 +44,58 @@ class ProviderMap(collections.UserDict):
         self.fail_to_parent = fail_to_parent
         self.fail_up_height = fail_up_height
 
+        # avoid circular import if this is at the top
+        # (thewired.namespace -> NamespaceNode -> ProviderMap)
+        from thewired.namespace.nsidtrie import NsidTrie
+        self.data = NsidTrie()
+
         #- Check ProviderMap initial mapping for valid Provider objects
         if mapping:
-            if isinstance(mapping, collections.Mapping):
+            if isinstance(mapping, collections.abc.Mapping):
                 if len(mapping.values()) > 0:
                     log.debug("Checking ProviderMap initial mapping for valid Provider objects")
                     for provider in mapping.values():
                         #- TODO: Duckify by catching this when providers are used, not
                         #-       instantiated
-                        if provider is not None and not isinstance(Provider):
-                            log.error('Invalid provider: {}'.format(str(p)))
-                            msg = 'NamespaceNode providers must be an instance of Provider None, not {}'.format(p)
+                        if provider is not None and not isinstance(provider, (Provider, str)):
+                            log.error('Invalid provider: {}'.format(str(provider)))
+                            msg = 'NamespaceNode providers must be an instance of Provider, an NSID or None, not {}'.format(provider)
                             raise ValueError(msg)
 
                     providers = list(mapping.keys())
                     log.debug("Setting providers for the attributes: {}".format(providers))
-                    self.data = mapping
+                    self.data.update(mapping)
             else:
-                msg = "Non collections.Mapping type passed for ProviderMap mapping"
+                msg = "Non collections.abc.Mapping type passed for ProviderMap mapping"
                 raise ValueError(msg)
 
-        else:
-            self.data = dict()
-
 
 
 
     def cascading__getitem__(self, item_key):
         '''
         Description:
-            place holder for implementing cascading fail up for providers to fail over to
-            the providers earlier in the provider namespace
-        '''
-        current = self.data
-        current_provider = None
-        key_path = item_key.split('.')
+            fail up to the provider of the closest ancestor of <item_key> that has one,
+            as long as that ancestor is no more than <fail_up_height> levels above it
 
-        for n, key in enumerate(key_path):
-            try:
-                current = current[key]
-                current_provider = current.provider
-
-            except KeyError as err:
-                if self.fail_to_parent:
-                    log_level = logging.DEBUG
-                    fail_height = len(key_path) - n
-                    if fail_height > self.fail_up_height:
-                        current_provider = None
-                else:
-                    log_level = logging.WARNING
-                    current_provider = None
+        Output:
+            the provider for the closest ancestor (or item_key itself)
+            raises ProviderMapLookupError if there is none within fail_up_height
+        '''
+        log = make_log_adapter(logger, ProviderMap, 'cascading__getitem__')
+        try:
+            parent_key, provider = self.data.longest_prefix(item_key)
+        except KeyError:
+            raise ProviderMapLookupError('No provider for {}'.format(item_key)) from None
 
-                log.log(log_level, 'No provider found for {}'.format(item_key))
-                log.debug('Last provider found in lookup: {}'.format(key_path[n-1]))
-                break
+        fail_height = self.data.depth(item_key) - self.data.depth(parent_key)
+        if fail_height > self.fail_up_height:
+            msg = 'No provider for {} within {} levels (closest: {})'.format(
+                item_key, self.fail_up_height, parent_key)
+            raise ProviderMapLookupError(msg)
 
-        return current_provider
+        log.debug('Using provider for %s to provide %s', parent_key, item_key)
+        return provider
 
 
     def set_provider(self, key, provider):
@@ -120,9 +121,8 @@ class ProviderMap(collections.UserDict):
 
 
     def get_provider(self, key):
-        log = LoggerAdapter(logger, {'name_ext': 'ProviderMap.get_provider'})
         try:
-            provider_ = self.data[key]
+            provider_ = self[key]
             if isinstance(provider_, Provider):
                 return provider_
 
@@ -141,10 +141,12 @@ class ProviderMap(collections.UserDict):
 
 
     def __getitem__(self, key):
-        log = LoggerAdapter(logger, {'name_ext' : 'ProviderMap.__getitem__'})
+        log = make_log_adapter(logger, ProviderMap, '__getitem__')
         val = self.data.get(key, FAIL_CANARY)
-        log.debug('data.get({}) returned: {}'.format(key, val))
-        if val == FAIL_CANARY:
+        log.debug('data.get(%s) returned: %s', key, val)
+        if val is FAIL_CANARY:
+            if self.fail_to_parent:
+                return self.cascading__getitem__(key)
             raise ProviderMapLookupError('No provider for {}'.format(key))
         else:
             return val
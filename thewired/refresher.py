@@ -0,0 +1,226 @@
+"""
+background refresh workers for stale-while-revalidate caching
+
+a caller that finds a stale cache entry hands the refresh to a BackgroundRefresher and
+returns the stale value right away. The refresher runs the refresh on one of its worker
+threads. Its queue is bounded: when it is full, new refresh requests are dropped (the stale
+value keeps being served, and a later read will ask again). Requests for a key that is
+already queued or running are dropped too, so a hot stale entry is refreshed only once.
+
+refreshes run as soon as a worker is free; they are not delayed by a random amount. What
+spreads them out is the expiry jitter of TTLCache(jitter=): a refresh is only requested when
+a stale entry is read, so entries that were set together go stale, and get refreshed, at
+different times.
+"""
+
+import queue
+import threading
+import time
+
+from logging import getLogger, LoggerAdapter
+logger = getLogger(__name__)
+
+
+class _Summary(object):
+    """
+    Description:
+        running count/sum/min/max of a series of observations
+    """
+    __slots__ = ('count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def as_dict(self):
+        return dict(
+            count=self.count,
+            mean=self.total / self.count if self.count else None,
+            min=self.min,
+            max=self.max)
+
+
+#- put on the queue by stop(); a worker exits when it takes one
+_STOP = object()
+
+
+class BackgroundRefresher(object):
+    """
+    Description:
+        bounded queue of refresh jobs, worked through by a small pool of daemon threads
+        that are started on first use and stopped by stop() (or on leaving a with block)
+    """
+    def __init__(self, max_queue=1024, workers=2):
+        """
+        Input:
+            max_queue: most refresh jobs that can wait at once; more are dropped
+            workers: number of worker threads
+        """
+        self.max_queue = max_queue
+        self.workers = workers
+        #- unbounded so stop() can always add its sentinels; submit() enforces max_queue
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._threads = list()
+
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+        self._staleness = _Summary()
+        self._latency = _Summary()
+
+
+    def _start(self):
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'thewired-refresher-{n}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+
+    def submit(self, key, func, *args, staleness=None, **kwargs):
+        """
+        Description:
+            queue func(*args, **kwargs) to run in the background
+        Input:
+            key: identifies what is being refreshed; a job for a key that is already queued
+                or running is dropped
+            staleness: how many seconds past expiry the value being replaced is, recorded
+                for metrics
+        Output:
+            True if the job was queued, False if it was dropped
+        """
+        with self._lock:
+            if staleness is not None:
+                self._staleness.observe(staleness)
+            if key in self._pending:
+                return False
+            if self._queue.qsize() >= self.max_queue:
+                self.dropped += 1
+                return False
+            if not self._threads:
+                self._start()
+            self._queue.put_nowait((key, func, args, kwargs))
+            self._pending.add(key)
+            self.submitted += 1
+            return True
+
+
+    def _work(self):
+        log = LoggerAdapter(logger, dict(name_ext=f'{self.__class__.__name__}._work'))
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                self._queue.task_done()
+                return
+            key, func, args, kwargs = job
+            start = time.perf_counter()
+            try:
+                func(*args, **kwargs)
+            except Exception as err:
+                log.warning(f"background refresh of {key} failed: {err!r}")
+                with self._lock:
+                    self.failed += 1
+            else:
+                with self._lock:
+                    self.completed += 1
+            finally:
+                with self._lock:
+                    self._latency.observe(time.perf_counter() - start)
+                    self._pending.discard(key)
+                self._queue.task_done()
+
+
+    def join(self):
+        """
+        Description:
+            block until every queued refresh job has finished
+        """
+        self._queue.join()
+
+
+    def stop(self, timeout=None):
+        """
+        Description:
+            stop the worker threads once they have run the jobs queued so far, and wait for
+            them. Submitting again starts new workers
+        Input:
+            timeout: most seconds to wait for each worker; None waits until they are done
+        """
+        with self._lock:
+            threads, self._threads = self._threads, list()
+            for _ in threads:
+                self._queue.put_nowait(_STOP)
+        for thread in threads:
+            thread.join(timeout)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+    def stats(self):
+        """
+        Output:
+            dict of counters plus summaries (count/mean/min/max, in seconds) of how stale
+            served values were and how long refreshes took
+        """
+        with self._lock:
+            return dict(
+                queued=self._queue.qsize(),
+                max_queue=self.max_queue,
+                submitted=self.submitted,
+                dropped=self.dropped,
+                completed=self.completed,
+                failed=self.failed,
+                staleness_age=self._staleness.as_dict(),
+                refresh_latency=self._latency.as_dict())
+
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(max_queue={self.max_queue}, workers={self.workers})"
+
+
+_default_refresher = None
+_default_refresher_lock = threading.Lock()
+
+def get_default_refresher():
+    """
+    Output:
+        the process-wide BackgroundRefresher used by SecondLifeNodes, created on first use
+    """
+    global _default_refresher
+    with _default_refresher_lock:
+        if _default_refresher is None:
+            _default_refresher = BackgroundRefresher()
+        return _default_refresher
+
+
+def set_default_refresher(refresher, timeout=None):
+    """
+    Description:
+        replace the process-wide BackgroundRefresher (e.g. to change its queue size or
+        number of workers). Jobs already queued on the old one still run, then its workers
+        are stopped
+    Input:
+        refresher: the new default
+        timeout: passed to stop() of the old default
+    """
+    global _default_refresher
+    with _default_refresher_lock:
+        old, _default_refresher = _default_refresher, refresher
+    if old is not None and old is not refresher:
+        old.stop(timeout)
@@ -0,0 +1,286 @@
+"""
+hot reload of config files into a Namespace
+
+a ConfigReloader polls the modification time and size of its config files from a daemon
+thread. Once they have changed and then stayed unchanged for <debounce> seconds (editors
+and deploy tools often write a file in several steps), the files are loaded and parsed into
+a brand new Namespace on that thread, and the new namespace is published through a
+NamespaceRef by swapping a single reference:
+
+    ref = NamespaceRef()
+    reloader = ConfigReloader('config.yaml', ref, interval=1.0, debounce=0.5)
+    reloader.start()
+    ...
+    ns = ref.current            #- one consistent version for as long as it is held
+    ns.get('.some.node')
+    ref.get('.some.node')       #- same, for a single lookup
+
+readers never see a partly built namespace: a namespace is only published once it has
+been parsed completely, and every read goes through one version. If loading or parsing
+fails, the current namespace stays published, the error is logged and kept in
+ConfigReloader.last_error, and a reload "error" is counted in thewired.metrics (if
+enabled).
+
+nothing beyond the standard library is needed for JSON configs; YAML configs need PyYAML.
+"""
+
+import os
+import threading
+import time
+from logging import getLogger, DEBUG
+from typing import Callable, List, Union
+
+from thewired import metrics as _metrics
+from thewired.loginfo import make_log_adapter, enabled_for
+
+logger = getLogger(__name__)
+
+
+
+class NamespaceRef(object):
+    """
+    Description:
+        holds the currently published Namespace. Publishing replaces the reference in one
+        step, so whoever reads .current gets either the old or the new namespace, whole
+    """
+    def __init__(self, namespace=None):
+        self._namespace = namespace
+        self._lock = threading.Lock()
+        #- incremented by every swap()
+        self.version = 0 if namespace is None else 1
+
+
+    @property
+    def current(self):
+        """
+        Output:
+            the published namespace (None before the first one is published); keep using the
+            returned object to see one version across several lookups
+        """
+        return self._namespace
+
+
+    def get(self, nsid):
+        """
+        Description:
+            look up <nsid> in the published namespace
+        """
+        return self._namespace.get(nsid)
+
+
+    def swap(self, namespace):
+        """
+        Description:
+            publish <namespace>
+        Output:
+            the namespace published before
+        """
+        with self._lock:
+            old = self._namespace
+            self._namespace = namespace
+            self.version += 1
+        return old
+
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(version={self.version}, namespace={self._namespace!r})"
+
+
+
+def load_config_files(paths: List[str]) -> dict:
+    """
+    Description:
+        default loader: read each file (JSON, or YAML by a .yaml/.yml extension) and merge
+        the top level keys, later files winning
+    """
+    import json
+    config = dict()
+    for path in paths:
+        with open(path) as f:
+            if path.endswith(('.yaml', '.yml')):
+                import yaml
+                loaded = yaml.safe_load(f)
+            else:
+                loaded = json.load(f)
+        if loaded:
+            config.update(loaded)
+    return config
+
+
+
+def parse_config(config: dict):
+    """
+    Description:
+        default parse function: a new Namespace from NamespaceConfigParser2
+    """
+    from thewired.namespaceconfigparser2 import NamespaceConfigParser2
+    return NamespaceConfigParser2(fast_build=True).parse(config)
+
+
+
+class ConfigReloader(object):
+    """
+    Description:
+        watches config files and publishes a newly parsed Namespace into a NamespaceRef
+        whenever they change (see module docstring)
+    """
+    def __init__(self,
+            paths: Union[str, List[str]],
+            ref: Union[NamespaceRef, None]=None,
+            interval: float=1.0,
+            debounce: float=0.5,
+            load: Callable[[List[str]], dict]=load_config_files,
+            parse: Callable[[dict], object]=parse_config):
+        """
+        Input:
+            paths: config file path, or list of paths loaded together
+            ref: NamespaceRef to publish into; a new one if not given
+            interval: seconds between checks of the files
+            debounce: seconds the files must stay unchanged after a change before reloading
+            load: called with the list of paths; returns the config
+            parse: called with the config; returns the new namespace
+        """
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.ref = ref if ref is not None else NamespaceRef()
+        self.interval = interval
+        self.debounce = debounce
+        self.load = load
+        self.parse = parse
+        #- label of the reload metrics
+        self.source = ','.join(self.paths)
+
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._signature = None
+
+
+    def signature(self) -> tuple:
+        """
+        Output:
+            (path, mtime ns, size) of every file; (path, None, None) for a missing one
+        """
+        entries = list()
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                entries.append((path, None, None))
+            else:
+                entries.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+
+    def reload(self, raise_errors: bool=False) -> bool:
+        """
+        Description:
+            load and parse the config files now and publish the result
+        Input:
+            raise_errors: raise a load/parse error instead of only recording it
+        Output:
+            True if a new namespace was published
+        """
+        log = make_log_adapter(logger, self.__class__, 'reload')
+        debug = enabled_for(DEBUG, logger)
+        with self._reload_lock:
+            #- taken before reading, so a change made while parsing is picked up next time
+            signature = self.signature()
+            start = time.perf_counter()
+            try:
+                namespace = self.parse(self.load(self.paths))
+            except Exception as err:
+                self.failures += 1
+                self.last_error = err
+                registry = _metrics.registry
+                if registry is not None:
+                    registry.count_reload(self.source, 'error')
+                log.warning(f"reloading {self.source} failed, keeping the current namespace: {err!r}")
+                if raise_errors:
+                    raise
+                return False
+            finally:
+                #- don't retry the same broken files on every check
+                self._signature = signature
+
+            self.ref.swap(namespace)
+            self.reloads += 1
+            self.last_error = None
+            registry = _metrics.registry
+            if registry is not None:
+                registry.count_reload(self.source, 'ok')
+            if debug:
+                log.debug(f"published version {self.ref.version} of {self.source} "
+                    f"in {time.perf_counter() - start:.3f}s")
+            return True
+
+
+    def check(self) -> bool:
+        """
+        Description:
+            one check of the files; reloads if they changed. Waits for the debounce period
+            to pass without further changes first
+        Output:
+            True if a new namespace was published
+        """
+        signature = self.signature()
+        if signature == self._signature:
+            return False
+        while not self._stop.wait(self.debounce):
+            settled = self.signature()
+            if settled == signature:
+                break
+            signature = settled
+        else:
+            return False
+        return self.reload()
+
+
+    def start(self) -> 'ConfigReloader':
+        """
+        Description:
+            publish the config if nothing is published yet, then start watching
+        Notes:
+            the first load raises its errors: there is no older namespace to keep serving
+        """
+        if self.ref.current is None:
+            self.reload(raise_errors=True)
+        elif self._signature is None:
+            self._signature = self.signature()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='thewired-reloader', daemon=True)
+            self._thread.start()
+        return self
+
+
+    def stop(self, timeout: Union[float, None]=None) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+
+
+    def _watch(self):
+        log = make_log_adapter(logger, self.__class__, '_watch')
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as err:
+                #- keep watching; the next check tries again
+                log.exception(f"checking {self.source} failed: {err!r}")
+
+
+    def __enter__(self):
+        return self.start()
+
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(paths={self.paths!r}, version={self.ref.version})"
@@ -0,0 +1,108 @@
+"""
+single-flight call coalescing
+
+when many callers ask for the same expensive result at the same time, only the first one
+(the "leader") actually calls the underlying function. Everyone else who arrives while
+that call is in flight waits for it and gets the same return value, or the same exception.
+Once the call finishes, the next caller with that key starts a new flight.
+
+threads and asyncio tasks are coalesced separately: do() is for threads, ado() for
+coroutines running on an event loop
+"""
+
+import threading
+
+
+class _Call(object):
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Description:
+        group of in-flight calls, keyed by any hashable value
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = dict()            #- key -> _Call
+        self._async_calls = dict()      #- (loop, key) -> asyncio.Future
+
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Description:
+            call func(*args, **kwargs), unless a call for <key> is already in flight in another
+            thread, in which case wait for that call and share its outcome
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+
+    async def ado(self, key, coroutine_function, *args, **kwargs):
+        """
+        Description:
+            await coroutine_function(*args, **kwargs), unless a call for <key> is already in
+            flight on this event loop, in which case await that call's outcome instead
+        """
+        #- imported here so synchronous users never pay for importing asyncio
+        import asyncio
+        flight_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            future = self._async_calls.get(flight_key)
+            leader = future is None
+            if leader:
+                future = self._async_calls[flight_key] = asyncio.get_running_loop().create_future()
+
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            result = await coroutine_function(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            #- mark the exception as retrieved; the leader re-raises it itself
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._async_calls[flight_key]
+
+
+    def in_flight(self):
+        """
+        Output:
+            number of calls currently in flight (threaded and async)
+        """
+        with self._lock:
+            return len(self._calls) + len(self._async_calls)
@@ -0,0 +1,180 @@
+"""
+lightweight timing spans for the package's hot paths
+
+instrumented code marks the interesting parts of its work with span():
+
+    with span('implementor', str(nsid)):
+        outputs = self._eval_addendum(implementor, addendum)
+
+nothing is recorded unless a collector is listening. Collectors are added for the
+current context only (and so for the code running inside a `with` block, see
+thewired.profile()) or process-wide. With no collectors, span() returns a shared no-op
+context manager, so the cost of an instrumented call is one context variable lookup.
+
+a collector is any object with span_start(span) and span_end(span) methods. They are
+called on the thread that runs the span.
+
+this module also holds the request id: a correlation id set by Provider.provide(request_id=...)
+(or request_context()) and carried by a context variable through everything the request
+does, including thread pool and executor work started from it. Every span records it.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+__all__ = ['span', 'Span', 'collecting', 'add_global_collector', 'remove_global_collector',
+           'current_request_id', 'request_context']
+
+
+#- correlation id of the request being served in the current context
+_request_id = contextvars.ContextVar('thewired_request_id', default=None)
+
+#- collectors for the current context
+_context_collectors = contextvars.ContextVar('thewired_span_collectors', default=())
+
+#- collectors for every context and thread
+_global_collectors = ()
+_global_collectors_lock = threading.Lock()
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span(object):
+    """
+    Description:
+        one timed piece of work
+    Attributes:
+        category: kind of work, e.g. "provider", "addendum", "implementor", "formatter",
+            "namespace", "parse" or "construct"
+        name: what specifically, e.g. the NSID of an implementor
+        args: extra details for collectors that want them
+        start, end: time.perf_counter() readings (seconds)
+        cpu_start, cpu_end: time.thread_time() readings (seconds)
+        thread_id: threading.get_ident() of the thread that ran the span
+        request_id: the current request id when the span was created
+        error: True if the span's block raised
+    """
+    __slots__ = ('category', 'name', 'args', 'collectors', 'start', 'end', 'cpu_start', 'cpu_end',
+                 'thread_id', 'request_id', 'error')
+
+    def __init__(self, category, name, args, collectors):
+        self.category = category
+        self.name = name
+        self.args = args
+        self.collectors = collectors
+        self.start = self.end = self.cpu_start = self.cpu_end = None
+        self.thread_id = None
+        self.request_id = _request_id.get()
+        self.error = False
+
+    @property
+    def wall_time(self):
+        return self.end - self.start
+
+    @property
+    def cpu_time(self):
+        return self.cpu_end - self.cpu_start
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self.cpu_start = time.thread_time()
+        self.start = time.perf_counter()
+        for collector in self.collectors:
+            collector.span_start(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end = time.perf_counter()
+        self.cpu_end = time.thread_time()
+        self.error = exc_type is not None
+        for collector in reversed(self.collectors):
+            collector.span_end(self)
+        return False
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.category!r}, {self.name!r})"
+
+
+def span(category, name, **args):
+    """
+    Description:
+        context manager timing the block it wraps for every listening collector
+    Input:
+        category: kind of work (see Span)
+        name: what specifically is being done
+        **args: extra details passed along to collectors
+    """
+    collectors = _context_collectors.get()
+    if _global_collectors:
+        collectors = collectors + _global_collectors
+    if not collectors:
+        return _NULL_SPAN
+    return Span(category, name, args, collectors)
+
+
+def current_request_id():
+    """
+    Output:
+        the request id of the request being served in this context, or None
+    """
+    return _request_id.get()
+
+
+@contextmanager
+def request_context(request_id):
+    """
+    Description:
+        make <request_id> the current request id while the `with` block runs. A None
+        request_id keeps whatever id is already current
+    """
+    if request_id is None:
+        yield _request_id.get()
+        return
+    token = _request_id.set(request_id)
+    try:
+        yield request_id
+    finally:
+        _request_id.reset(token)
+
+
+@contextmanager
+def collecting(collector):
+    """
+    Description:
+        have <collector> see every span started in the current context while the `with`
+        block runs
+    """
+    token = _context_collectors.set(_context_collectors.get() + (collector,))
+    try:
+        yield collector
+    finally:
+        _context_collectors.reset(token)
+
+
+def add_global_collector(collector):
+    """
+    Description:
+        have <collector> see every span in every thread until remove_global_collector()
+    """
+    global _global_collectors
+    with _global_collectors_lock:
+        if collector not in _global_collectors:
+            _global_collectors = _global_collectors + (collector,)
+
+
+def remove_global_collector(collector):
+    global _global_collectors
+    with _global_collectors_lock:
+        _global_collectors = tuple(c for c in _global_collectors if c is not collector)
@@ -0,0 +1,144 @@
+"""
+Chrome trace-event export
+
+    from thewired.tracing import trace
+    with trace('provide.trace.json'):
+        provider.provide(request_id='req-42')
+
+writes every span (see thewired.spans) of the `with` block as a "complete" (ph: X) event
+of the Chrome trace-event format, loadable in chrome://tracing, Perfetto or speedscope.
+Each event carries its request id in its args, and write() can keep only the events of
+one request.
+
+a ChromeTracer can also be started process-wide (start()/stop()) to see spans from every
+thread, e.g. config parsing in one thread and provider calls in others.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from thewired import spans
+
+__all__ = ['ChromeTracer', 'trace']
+
+
+class ChromeTracer(object):
+    """
+    Description:
+        span collector that keeps finished spans as trace events, up to <max_events>;
+        spans past that are counted in .dropped and not kept
+    """
+    def __init__(self, max_events=100000):
+        self.max_events = max_events
+        self.dropped = 0
+        self._events = list()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+
+    def span_start(self, span):
+        pass
+
+
+    def span_end(self, span):
+        args = dict(span.args)
+        if span.request_id is not None:
+            args['request_id'] = span.request_id
+        if span.error:
+            args['error'] = True
+        event = dict(
+            name=span.name,
+            cat=span.category,
+            ph='X',
+            ts=(span.start - self._origin) * 1e6,
+            dur=(span.end - span.start) * 1e6,
+            pid=self._pid,
+            tid=span.thread_id,
+            args=args)
+        with self._lock:
+            if len(self._events) < self.max_events:
+                self._events.append(event)
+            else:
+                self.dropped += 1
+
+
+    def collecting(self):
+        """
+        Description:
+            context manager: trace the spans of the current context while the `with` block runs
+        """
+        return spans.collecting(self)
+
+
+    def start(self):
+        """
+        Description:
+            trace spans from every thread until stop()
+        """
+        spans.add_global_collector(self)
+
+
+    def stop(self):
+        spans.remove_global_collector(self)
+
+
+    def events(self, request_id=None):
+        """
+        Output:
+            list of trace event dicts, in the order the spans finished
+        Input:
+            request_id: if given, only events recorded while serving this request
+        """
+        with self._lock:
+            events = list(self._events)
+        if request_id is not None:
+            events = [e for e in events if e['args'].get('request_id') == request_id]
+        return events
+
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+            self.dropped = 0
+
+
+    def write(self, path, request_id=None):
+        """
+        Description:
+            write the events as a Chrome trace-event JSON file
+        Input:
+            path: file to write
+            request_id: if given, only write this request's events
+        """
+        with open(path, 'w') as f:
+            json.dump(dict(traceEvents=self.events(request_id=request_id), displayTimeUnit='ms'), f)
+
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(max_events={self.max_events})"
+
+
+
+@contextmanager
+def trace(path=None, request_id=None, max_events=100000):
+    """
+    Description:
+        trace everything the `with` block does through thewired
+    Input:
+        path: if given, the trace is written here when the block exits
+        request_id: if given, only that request's events are written
+        max_events: most events kept
+    Output:
+        yields the ChromeTracer
+    """
+    tracer = ChromeTracer(max_events=max_events)
+    with tracer.collecting():
+        try:
+            yield tracer
+        finally:
+            if path is not None:
+                tracer.write(path, request_id=request_id)
@@ -0,0 +1,202 @@
+"""
+small thread-safe key/value cache with per-entry expiry and a bounded size
+
+used to remember the results of provider calls (see SecondLifeNode) so that reading the
+same dynamic attribute many times in a row only calls the provider once per TTL
+
+optionally, expired entries can be kept around for a while longer (stale_ttl) so that a
+caller can serve the stale value while it refreshes the entry in the background
+"""
+
+import random
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+#- returned by TTLCache.get when there is no fresh entry and no default was given
+MISSING = object()
+
+
+class TTLCache(object):
+    """
+    Description:
+        LRU-ordered mapping of keys to values where every entry expires <ttl> seconds after
+        it was set. When more than <maxsize> entries are stored, the least recently used one
+        is evicted.
+
+        hits and misses are counted on every get(); stale_hits on every get_entry() that
+        returns a stale value
+    """
+    def __init__(self, ttl=None, maxsize=128, stale_ttl=0, jitter=0, timer=time.monotonic):
+        """
+        Input:
+            ttl: seconds an entry stays valid. None means entries never expire
+            maxsize: maximum number of entries. None means unbounded
+            stale_ttl: seconds past its expiry that an entry is kept and can still be read
+                (as stale) through get_entry()
+            jitter: fraction of ttl by which each entry's expiry is randomly moved earlier or
+                later (0.1 -> +/-10%), so entries set together don't all expire together
+            timer: clock used for expiry; must be monotonic
+        """
+        if ttl is not None and ttl < 0:
+            raise ValueError(f"ttl must be None or >= 0, not {ttl}")
+        if maxsize is not None and maxsize < 1:
+            raise ValueError(f"maxsize must be None or >= 1, not {maxsize}")
+        if stale_ttl < 0:
+            raise ValueError(f"stale_ttl must be >= 0, not {stale_ttl}")
+        if not 0 <= jitter < 1:
+            raise ValueError(f"jitter must be in [0, 1), not {jitter}")
+
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self.jitter = jitter
+        self._timer = timer
+        self._data = OrderedDict()      #- key -> (value, expires_at)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+
+    @classmethod
+    def from_options(cls, options):
+        """
+        Description:
+            build a cache from the forms accepted in configs and constructor arguments
+        Input:
+            options: one of
+                * None/False - no cache; returns None
+                * True - a cache with default settings
+                * a mapping of keyword arguments for TTLCache (e.g. {"ttl": 30, "maxsize": 64})
+                * an existing TTLCache, which is returned as-is
+        """
+        if options is None or options is False:
+            return None
+        if options is True:
+            return cls()
+        if isinstance(options, cls):
+            return options
+        try:
+            return cls(**options)
+        except TypeError as err:
+            raise ValueError(f"invalid cache options: {options}") from err
+
+
+    def get(self, key, default=MISSING):
+        """
+        Description:
+            return the cached value for <key> if it has not expired, else <default>
+        """
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires_at is not None:
+                now = self._timer()
+                if now >= expires_at:
+                    if now - expires_at >= self.stale_ttl:
+                        del self._data[key]
+                    self.misses += 1
+                    return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+
+    def get_entry(self, key):
+        """
+        Description:
+            like get(), but also returns entries that have expired less than stale_ttl
+            seconds ago
+        Output:
+            2-tuple of (value, expired_for)
+                * fresh entry: (value, None)
+                * stale entry: (value, seconds since it expired)
+                * no usable entry: (MISSING, None)
+        """
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return MISSING, None
+
+            now = self._timer()
+            if expires_at is None or now < expires_at:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value, None
+
+            expired_for = now - expires_at
+            if expired_for >= self.stale_ttl:
+                del self._data[key]
+                self.misses += 1
+                return MISSING, None
+
+            self._data.move_to_end(key)
+            self.stale_hits += 1
+            return value, expired_for
+
+
+    def set(self, key, value):
+        """
+        Description:
+            store <value> for <key>, resetting its expiry and evicting the least recently
+            used entry if the cache is full
+        """
+        if self.ttl is None:
+            expires_at = None
+        elif self.jitter:
+            expires_at = self._timer() + self.ttl * random.uniform(1 - self.jitter, 1 + self.jitter)
+        else:
+            expires_at = self._timer() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+
+    def invalidate(self, key):
+        """
+        Description:
+            drop the entry for <key>, if there is one
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+    def cache_info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+
+    def __contains__(self, key):
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                return False
+            return expires_at is None or self._timer() < expires_at
+
+
+    def __len__(self):
+        return len(self._data)
+
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(ttl={self.ttl}, maxsize={self.maxsize}, stale_ttl={self.stale_ttl})"
@@ -1,3 +1,6 @@
+import importlib
+import sys
+
 NSID_REF_PREFIX = 'nsid://'
 
 def is_nsid_ref(value):
@@ -24,3 +27,33 @@ def get_nsid_from_ref(value):
         value: the NSID reference
     """
     return ''.join(value.split(NSID_REF_PREFIX)[1:])
+
+
+
+def lazy_attributes(package_name, names):
+    """
+    Description:
+        module-level __getattr__ and __dir__ for a package whose public names are imported
+        on first use instead of when the package itself is imported
+
+    Input:
+        package_name: __name__ of the package
+        names: maps each public name to the module defining it (relative to the package)
+
+    Output:
+        (__getattr__, __dir__) to assign in the package's __init__
+    """
+    def __getattr__(name):
+        try:
+            module_name = names[name]
+        except KeyError:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}") from None
+        value = getattr(importlib.import_module(module_name, package_name), name)
+        #- later lookups find it directly
+        setattr(sys.modules[package_name], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package_name])) | set(names))
+
+    return __getattr__, __dir__